@@ -0,0 +1,112 @@
+"""
+Benchmark A* with the straight-line travel time bound and with landmarks (ALT) against plain Dijkstra
+on central-to-outer routes, and the cost of building and refreshing the landmark index.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_astar
+
+The real network and station table are fetched from the web service; when it cannot be reached only
+the synthetic networks are measured. Synthetic stations are scattered around central London and
+joined to their nearest neighbours, with travel times that follow the distance between them.
+"""
+import time
+import numpy as np
+from londontube import query
+from londontube.Network import Network
+from londontube.landmarks import build_landmarks
+from londontube.stations import StationDirectory, haversine, station_directory
+
+
+class CountingNeighbours(list):
+    """Neighbour lists that count how many nodes a search expands."""
+    settled = 0
+
+    def __getitem__(self, node):
+        self.settled += 1
+        return super().__getitem__(node)
+
+
+def synthetic_tube(n_stations, n_nearest=3, seed=0):
+    rng = np.random.default_rng(seed)
+    lats = 51.51 + rng.normal(0, 0.05, n_stations)
+    lons = -0.13 + rng.normal(0, 0.08, n_stations)
+    directory = StationDirectory([[f"Station {i}", i, lat, lon] for i, (lat, lon) in enumerate(zip(lats, lons))])
+    distances = haversine(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+    np.fill_diagonal(distances, np.inf)
+    rows = np.repeat(np.arange(n_stations), n_nearest)
+    cols = np.argsort(distances, axis=1)[:, :n_nearest].ravel()
+    # About 0.5 km per minute, slowed down by up to half on every connection
+    weights = np.ceil(distances[rows, cols] / 0.5 * rng.uniform(1, 1.5, len(rows)))
+    network = Network.from_edges(n_stations, np.concatenate([rows, cols]), np.concatenate([cols, rows]),
+                                 np.concatenate([weights, weights]))
+    return network, directory
+
+
+def central_to_outer(directory, n_nodes, n_routes=10):
+    known = np.flatnonzero(~np.isnan(directory.latitudes[:n_nodes]))
+    lats, lons = directory.latitudes[known], directory.longitudes[known]
+    order = known[np.argsort(haversine(lats, lons, np.mean(lats), np.mean(lons)))]
+    return [(int(start), int(dest)) for start in order[:n_routes] for dest in order[-n_routes:]]
+
+
+def measure(search, pairs, neighbours):
+    """Return the mean latency and the mean number of nodes settled by a search."""
+    neighbours.settled = 0
+    start = time.perf_counter()
+    for pair in pairs:
+        search(*pair)
+    return (time.perf_counter() - start) / len(pairs), neighbours.settled / len(pairs)
+
+
+def compare(label, network, directory):
+    neighbours = CountingNeighbours(Network.neighbour_lists(network))
+    speed = directory.max_speed(network)
+    pairs = central_to_outer(directory, network.n_nodes)
+
+    def dijkstra(start, dest):
+        return Network.shortest_path(start, dest, neighbours)
+
+    def astar(start, dest):
+        bounds = directory.travel_time_bounds(dest, speed, network.n_nodes)
+        return Network.astar(start, dest, neighbours, bounds)
+
+    start = time.perf_counter()
+    index = build_landmarks(network, k=8)
+    build_time = time.perf_counter() - start
+
+    def alt(start, dest):
+        return Network.astar(start, dest, neighbours, index.bounds(dest))
+
+    for start, dest in pairs:
+        assert dijkstra(start, dest)[1] == astar(start, dest)[1] == alt(start, dest)[1]
+    dijkstra_time, dijkstra_settled = measure(dijkstra, pairs, neighbours)
+    print(f"{label:<28} dijkstra {dijkstra_settled:7.0f} nodes {dijkstra_time * 1e3:7.3f} ms")
+    for name, search in (("A* (geographic)", astar), ("ALT (8 landmarks)", alt)):
+        search_time, settled = measure(search, pairs, neighbours)
+        print(f"{'':28} {name:<17} {settled:7.0f} nodes {search_time * 1e3:7.3f} ms   "
+              f"speedup {dijkstra_time / search_time:5.2f}x")
+
+    # Delay the connections of a few stations, as on a disruption day
+    rows, cols, weights = network.edges()
+    delayed_stations = np.random.default_rng(0).choice(network.n_nodes, 5, replace=False)
+    delayed = Network.from_edges(network.n_nodes, rows, cols,
+                                 np.where(np.isin(rows, delayed_stations), weights * 2, weights))
+    start = time.perf_counter()
+    index.refresh(delayed)
+    refresh_time = time.perf_counter() - start
+    print(f"{'':28} landmark index: build {build_time * 1e3:8.2f} ms   refresh {refresh_time * 1e3:8.2f} ms")
+
+
+def main():
+    try:
+        compare("real network (296 nodes)", query.real_time_network("2023-12-19"), station_directory())
+    except ConnectionError as error:
+        print(f"real network skipped: {error}")
+    for n_stations in (296, 2000, 5000):
+        network, directory = synthetic_tube(n_stations)
+        compare(f"synthetic ({n_stations} nodes)", network, directory)
+
+
+if __name__ == "__main__":
+    main()
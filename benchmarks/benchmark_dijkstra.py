@@ -0,0 +1,111 @@
+"""
+Benchmark the heap-based Dijkstra search against the original O(V²) implementation.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_dijkstra
+
+The real 296-station network is fetched from the web service; when it cannot be reached only the
+synthetic networks are measured.
+"""
+import time
+import numpy as np
+from londontube import query
+from londontube.Network import Network
+
+
+def legacy_dijkstra(start_node, dest_node, adjacency_matrix):
+    """The original implementation of `Network.dijkstra`, kept here as the reference point."""
+    tenative_cost = list(np.full((1, len(adjacency_matrix[0])), np.inf).flatten())
+    tenative_cost[start_node] = 0
+    previous_node = [start_node] * len(adjacency_matrix[0])
+    current_node = start_node
+    visited_nodes = []
+    unvisited_nodes = list(np.arange(0, len(adjacency_matrix[0])))
+    while True:
+        matrix = np.array(adjacency_matrix, dtype=int)
+        index_neighbours = np.full((1, len(matrix[0])), False).flatten()
+        row = matrix[current_node]
+        for j in range(len(row)):
+            if (row[j] > 0) and (j not in list(np.where(index_neighbours == True)[0])):
+                index_neighbours[j] = True
+        for node in np.where(index_neighbours)[0]:
+            proposed_cost = adjacency_matrix[current_node][node] + tenative_cost[current_node]
+            if proposed_cost < tenative_cost[node]:
+                tenative_cost[node] = proposed_cost
+                previous_node[node] = current_node
+        visited_nodes.append(current_node)
+        unvisited_nodes.remove(current_node)
+        if dest_node in visited_nodes:
+            break
+        if min([tenative_cost[i] for i in unvisited_nodes]) == np.inf:
+            return None
+        costs = [tenative_cost[i] for i in unvisited_nodes]
+        current_node = unvisited_nodes[costs.index(min(costs))]
+    return tenative_cost[dest_node]
+
+
+def synthetic_neighbours(n_nodes, seed=0):
+    """
+    Build neighbour lists for a connected tube-like network: a ring of stations with random
+    chords, each weighted with a travel time of 1 to 5 minutes.
+    """
+    rng = np.random.default_rng(seed)
+    sources = np.concatenate([np.arange(n_nodes), rng.integers(0, n_nodes, n_nodes // 2)])
+    targets = np.concatenate([(np.arange(n_nodes) + 1) % n_nodes, rng.integers(0, n_nodes, n_nodes // 2)])
+    weights = rng.integers(1, 6, len(sources)).astype(float)
+    neighbours = [[] for _ in range(n_nodes)]
+    for u, v, w in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+        if u != v:
+            neighbours[u].append((v, w))
+            neighbours[v].append((u, w))
+    return neighbours
+
+
+def dense_matrix(neighbours):
+    matrix = np.zeros((len(neighbours), len(neighbours)))
+    for u, row in enumerate(neighbours):
+        for v, w in row:
+            matrix[u, v] = w if matrix[u, v] == 0 else min(matrix[u, v], w)
+    return matrix
+
+
+def time_queries(search, pairs, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for s, t in pairs:
+            search(s, t)
+    return (time.perf_counter() - start) / (repeats * len(pairs))
+
+
+def compare(label, matrix, pairs):
+    legacy = time_queries(lambda s, t: legacy_dijkstra(s, t, matrix), pairs)
+    neighbours = Network.neighbour_lists(matrix)
+    heap = time_queries(lambda s, t: Network.shortest_path(s, t, neighbours), pairs, repeats=20)
+    print(f"{label:<28} legacy {legacy * 1e3:9.2f} ms   heap {heap * 1e3:7.3f} ms   speedup {legacy / heap:8.0f}x")
+
+
+def main():
+    rng = np.random.default_rng(1)
+    try:
+        tube = query.real_time_network("2023-12-19")
+        pairs = rng.integers(0, tube.n_nodes, (20, 2)).tolist()
+        compare("real network (296 nodes)", tube.adjacency_matrix, pairs)
+    except ConnectionError as error:
+        print(f"real network skipped: {error}")
+
+    for n_nodes in (296, 1000):
+        matrix = dense_matrix(synthetic_neighbours(n_nodes))
+        pairs = rng.integers(0, n_nodes, (5, 2)).tolist()
+        compare(f"synthetic ({n_nodes} nodes)", matrix, pairs)
+
+    # The legacy search needs a dense matrix and is far too slow beyond a few thousand nodes.
+    for n_nodes in (10_000, 100_000):
+        neighbours = synthetic_neighbours(n_nodes)
+        pairs = rng.integers(0, n_nodes, (20, 2)).tolist()
+        heap = time_queries(lambda s, t: Network.shortest_path(s, t, neighbours), pairs)
+        print(f"{f'synthetic ({n_nodes} nodes)':<28} legacy        n/a      heap {heap * 1e3:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark applying the disruptions of a date line by line against the compiled, vectorised pass.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_disruptions
+"""
+import csv
+import json
+import time
+from io import StringIO
+import numpy as np
+from londontube import query
+from londontube.Network import Network
+from londontube.disruptions import BaselineNetwork, compile_disruptions
+from benchmarks import stand_in_service
+
+
+def line_matrices():
+    matrices = []
+    for body in stand_in_service.synthetic_lines():
+        matrix = np.zeros((296, 296))
+        for station1, station2, travel_time in (map(int, row) for row in csv.reader(StringIO(body))):
+            matrix[station1, station2] = matrix[station2, station1] = travel_time
+        matrices.append(matrix)
+    return matrices
+
+
+def line_by_line(matrices, disruptions):
+    """Apply every disruption to a dense copy of every line, as real_time_network used to."""
+    lines = [query.apply_disruptions(Network(296, matrix.copy()), i, disruptions) for i, matrix in enumerate(matrices)]
+    return Network.merge(*lines)
+
+
+def best_of(function, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    matrices = line_matrices()
+    baseline = BaselineNetwork([Network(296, matrix).to_csr() for matrix in matrices])
+    for n_disruptions in (20, 200, 1000):
+        disruptions = query.parse_disruptions_data(json.loads(
+            stand_in_service.synthetic_disruptions("2023-12-15", n_disruptions=n_disruptions)))
+        legacy, expected = best_of(lambda: line_by_line(matrices, disruptions))
+        vectorised, result = best_of(lambda: baseline.apply(compile_disruptions(disruptions)))
+        assert np.array_equal(result.adjacency_matrix, expected.adjacency_matrix)
+        print(f"{n_disruptions:5d} disruptions   line by line {legacy * 1e3:8.2f} ms   "
+              f"vectorised {vectorised * 1e3:6.2f} ms   speedup {legacy / vectorised:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
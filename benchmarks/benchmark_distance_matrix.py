@@ -0,0 +1,54 @@
+"""
+Benchmark `Network.distance_matrix` against calling `Network.dijkstra` for every origin-destination pair.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_distance_matrix
+
+Calling `Network.dijkstra` with an adjacency matrix, as the journey planner used to, prepares the
+network again for every pair; the per-pair timing is measured on a sample of pairs.
+"""
+import os
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+import numpy as np
+from londontube.Network import Network
+from benchmarks.benchmark_parallel import synthetic_network
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_nodes, n_sources, n_targets in ((296, 100, 100), (5000, 200, 200)):
+        network = synthetic_network(n_nodes)
+        matrix = network.adjacency_matrix.copy()
+        sources = rng.choice(n_nodes, n_sources, replace=False).tolist()
+        targets = rng.choice(n_nodes, n_targets, replace=False).tolist()
+        sample = list(zip(sources[:20], targets[:20]))
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            for s, t in sample:
+                Network.dijkstra(s, t, matrix)
+            per_pair_matrix = (time.perf_counter() - start) / len(sample)
+            start = time.perf_counter()
+            for s, t in sample:
+                Network.dijkstra(s, t, network)
+            per_pair_network = (time.perf_counter() - start) / len(sample)
+        n_pairs = n_sources * n_targets
+        print(f"{n_nodes} nodes, {n_sources}x{n_targets}   dijkstra per pair (matrix) "
+              f"{per_pair_matrix * n_pairs:8.1f} s (estimated)   dijkstra per pair (Network) "
+              f"{per_pair_network * n_pairs:6.2f} s (estimated)")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            costs = network.distance_matrix(sources, targets, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{'':24s}distance_matrix, {workers} worker(s) {elapsed:6.2f} s   "
+                  f"speedup {per_pair_matrix * n_pairs / elapsed:7.0f}x / {per_pair_network * n_pairs / elapsed:5.1f}x")
+        with redirect_stdout(StringIO()):
+            for (i, s), (j, t) in zip(enumerate(sources[:20]), enumerate(targets[:20])):
+                result = Network.dijkstra(s, t, network)
+                assert costs[i, j] == (np.inf if result is None else result[1])
+
+
+if __name__ == "__main__":
+    main()
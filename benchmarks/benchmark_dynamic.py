@@ -0,0 +1,50 @@
+"""
+Benchmark repairing the undisrupted shortest path trees of a few commuter origins for many dates
+against searching them again from scratch.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_dynamic
+"""
+import json
+import time
+from datetime import date, timedelta
+import numpy as np
+from londontube import query
+from londontube.Network import Network
+from londontube.disruptions import BaselineNetwork, compile_disruptions
+from londontube.dynamic import DynamicShortestPathTrees
+from benchmarks import stand_in_service
+from benchmarks.benchmark_disruptions import line_matrices
+
+
+def main():
+    baseline = BaselineNetwork([Network(296, matrix).to_csr() for matrix in line_matrices()])
+    undisrupted = baseline.apply(compile_disruptions([]))
+    origins = np.random.default_rng(0).choice(296, 20, replace=False).tolist()
+    dates = [str(date(2022, 1, 1) + timedelta(days=i)) for i in range(730)]
+    networks = [baseline.apply(compile_disruptions(query.parse_disruptions_data(json.loads(
+        stand_in_service.synthetic_disruptions(day))))) for day in dates]
+
+    start = time.perf_counter()
+    trees = DynamicShortestPathTrees(undisrupted, origins)
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    repaired = [costs for network in networks for costs in trees.repair(network)[0]]
+    repair = time.perf_counter() - start
+
+    # Searching from scratch also needs the neighbour lists of every date
+    start = time.perf_counter()
+    searched = [Network.shortest_path_tree(origin, neighbours)[0]
+                for neighbours in (Network.neighbour_lists(network) for network in networks) for origin in origins]
+    scratch = time.perf_counter() - start
+
+    assert all(np.array_equal(a, b) for a, b in zip(repaired, searched))
+    print(f"{len(origins)} origins x {len(dates)} dates   from scratch {scratch:6.2f} s   "
+          f"repaired {repair:6.2f} s (+ {setup * 1e3:.1f} ms for the baseline trees)   "
+          f"speedup {scratch / repair:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark queries on a contraction hierarchy against plain Dijkstra, and the time to build it.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_hierarchy
+
+The real network is fetched from the web service; when it cannot be reached only the synthetic
+networks are measured.
+"""
+import pickle
+import time
+import numpy as np
+from londontube import query
+from londontube.Network import Network
+from londontube.hierarchy import build_hierarchy
+from benchmarks.benchmark_astar import synthetic_tube
+
+
+def time_queries(search, pairs):
+    start = time.perf_counter()
+    for pair in pairs:
+        search(*pair)
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def reachable_pairs(network, n_pairs, rng):
+    """Random pairs of nodes with a path between them, since the synthetic networks may be disconnected."""
+    pairs = []
+    while len(pairs) < n_pairs:
+        start_node = int(rng.integers(0, network.n_nodes))
+        costs = Network.shortest_path_tree(start_node, network.neighbours)[0]
+        pairs += [(start_node, int(dest_node)) for dest_node in rng.choice(np.flatnonzero(costs < np.inf), 10)]
+    return pairs[:n_pairs]
+
+
+def compare(label, network, pairs):
+    start = time.perf_counter()
+    hierarchy = build_hierarchy(network)
+    build_time = time.perf_counter() - start
+    neighbours = network.neighbours
+    for start_node, dest_node in pairs:
+        assert hierarchy.shortest_path(start_node, dest_node)[1] == \
+            Network.shortest_path(start_node, dest_node, neighbours)[1]
+    dijkstra = time_queries(lambda s, t: Network.shortest_path(s, t, neighbours), pairs)
+    ch = time_queries(hierarchy.shortest_path, pairs)
+    shortcuts = int((hierarchy.middles >= 0).sum())
+    print(f"{label:<28} build {build_time * 1e3:9.1f} ms ({shortcuts} shortcuts, "
+          f"{len(pickle.dumps(hierarchy)) / 1024:.0f} KiB pickled)   dijkstra {dijkstra * 1e3:7.3f} ms   "
+          f"CH {ch * 1e3:6.3f} ms   speedup {dijkstra / ch:5.1f}x")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    try:
+        tube = query.real_time_network("2023-12-19")
+        compare("real network (296 nodes)", tube, reachable_pairs(tube, 200, rng))
+    except ConnectionError as error:
+        print(f"real network skipped: {error}")
+    for n_stations in (296, 2000, 5000):
+        network, _ = synthetic_tube(n_stations)
+        compare(f"synthetic ({n_stations} nodes)", network, reachable_pairs(network, 200, rng))
+
+
+if __name__ == "__main__":
+    main()
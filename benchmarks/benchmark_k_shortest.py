@@ -0,0 +1,71 @@
+"""
+Benchmark the k shortest paths against a single shortest path query, and against Yen's algorithm with
+plain Dijkstra spur searches and no pruning.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_k_shortest
+"""
+import heapq
+import time
+import numpy as np
+from londontube.Network import Network
+from benchmarks.benchmark_astar import synthetic_tube
+from benchmarks.benchmark_disruptions import line_matrices
+from benchmarks.benchmark_hierarchy import reachable_pairs
+
+K = 5
+
+
+def plain_yen(network, start_node, dest_node, k):
+    """Yen's algorithm as usually written: a Dijkstra search for every spur node of every path."""
+    neighbours = network.neighbours
+    no_heuristic = np.zeros(network.n_nodes)
+    edge_weights = [dict(node_neighbours) for node_neighbours in neighbours]
+    paths = [tuple(Network.shortest_path(start_node, dest_node, neighbours))]
+    candidates = []
+    seen = {tuple(paths[0][0])}
+    while len(paths) < k:
+        last_path = paths[-1][0]
+        for i, spur_node in enumerate(last_path[:-1]):
+            root = last_path[:i + 1]
+            root_cost = sum(edge_weights[a][b] for a, b in zip(root, root[1:]))
+            blocked_heads = {path[i + 1] for path, _ in paths if path[:i + 1] == root}
+            spur = Network.spur_path(spur_node, dest_node, neighbours, no_heuristic, set(root[:-1]), blocked_heads)
+            if spur is not None and tuple(root[:-1] + spur[0]) not in seen:
+                seen.add(tuple(root[:-1] + spur[0]))
+                heapq.heappush(candidates, (root_cost + spur[1], root[:-1] + spur[0]))
+        if not candidates:
+            break
+        cost, path = heapq.heappop(candidates)
+        paths.append((path, cost))
+    return paths
+
+
+def time_queries(search, pairs):
+    start = time.perf_counter()
+    results = [search(*pair) for pair in pairs]
+    return (time.perf_counter() - start) / len(pairs), results
+
+
+def compare(label, network, pairs):
+    neighbours = network.neighbours
+    single, _ = time_queries(lambda s, t: Network.shortest_path(s, t, neighbours), pairs)
+    pruned, paths = time_queries(lambda s, t: network.k_shortest_paths(s, t, K), pairs)
+    plain, expected = time_queries(lambda s, t: plain_yen(network, s, t, K), pairs)
+    assert [[cost for _, cost in result] for result in paths] == [[cost for _, cost in result] for result in expected]
+    print(f"{label:<28} single {single * 1e3:6.3f} ms   k={K} {pruned * 1e3:7.3f} ms ({pruned / single:4.1f}x a single query)   "
+          f"plain Yen {plain * 1e3:8.3f} ms ({plain / single:5.1f}x)")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    tube = Network.merge(*(Network(296, matrix) for matrix in line_matrices())).to_csr()
+    compare("stand-in tube (296 nodes)", tube, reachable_pairs(tube, 100, rng))
+    for n_stations in (2000, 5000):
+        network, _ = synthetic_tube(n_stations)
+        compare(f"synthetic ({n_stations} nodes)", network, reachable_pairs(network, 50, rng))
+
+
+if __name__ == "__main__":
+    main()
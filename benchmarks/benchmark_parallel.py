@@ -0,0 +1,63 @@
+"""
+Benchmark batch routing in one process against a pool of processes sharing the network.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_parallel
+
+Every pool size from 1 up to the number of CPUs is measured; throughput can only scale with the
+cores that are actually available.
+"""
+import os
+import time
+import numpy as np
+from londontube.Network import Network
+from londontube.parallel import route_pairs
+from benchmarks.benchmark_dijkstra import synthetic_neighbours
+
+
+def synthetic_network(n_nodes, seed=0):
+    rows, cols, weights = [], [], []
+    for node, neighbours in enumerate(synthetic_neighbours(n_nodes, seed)):
+        for neighbour, weight in neighbours:
+            rows.append(node)
+            cols.append(neighbour)
+            weights.append(weight)
+    return Network.from_edges(n_nodes, np.array(rows), np.array(cols), np.array(weights))
+
+
+def serial(network, pairs):
+    """Route the pairs in this process, one shortest path tree per start node."""
+    trees = {}
+    results = []
+    for start, dest in pairs:
+        if start not in trees:
+            trees[start] = Network.shortest_path_tree(start, network.neighbours)
+        costs, previous_nodes = trees[start]
+        results.append((Network.path_from_tree(start, dest, previous_nodes), float(costs[dest])))
+    return results
+
+
+def main():
+    rng = np.random.default_rng(0)
+    cpus = os.cpu_count() or 1
+    pool_sizes = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    for n_nodes, n_sources in ((296, 296), (5000, 400)):
+        network = synthetic_network(n_nodes)
+        sources = rng.choice(n_nodes, n_sources, replace=False)
+        pairs = [(int(source), int(dest)) for source in sources for dest in rng.integers(0, n_nodes, 50)]
+        start = time.perf_counter()
+        expected = serial(network, pairs)
+        baseline = time.perf_counter() - start
+        print(f"{n_nodes:5d} nodes, {len(pairs)} pairs   one process {len(pairs) / baseline:9.0f} pairs/s")
+        for workers in pool_sizes:
+            start = time.perf_counter()
+            result = route_pairs(network, pairs, workers)
+            elapsed = time.perf_counter() - start
+            assert result == expected
+            print(f"{'':26s}{workers:2d} workers {len(pairs) / elapsed:9.0f} pairs/s   "
+                  f"speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark fetching the disruptions of the whole calendar one date at a time against the bounded
+concurrent prefetch, and answering them from the stored calendar.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_prefetch
+
+The web service is replaced by a local stand-in that adds a fixed latency to every request.
+"""
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from londontube import query
+from benchmarks import stand_in_service
+
+
+def main(latency=0.02):
+    server, url = stand_in_service.start(latency)
+    query.configure_client(base_url=url)
+    query.configure_cache(directory=tempfile.mkdtemp())
+    dates = [str(date(2023, 1, 1) + timedelta(days=i)) for i in range(731)]
+    print(f"round trip latency: {latency * 1e3:.0f} ms, {len(dates)} dates")
+
+    start = time.perf_counter()
+    fetched = [query.query_disruptions(date_str) for date_str in dates]
+    print(f"one date at a time   {time.perf_counter() - start:8.2f} s")
+
+    for max_workers in (8, 16):
+        start = time.perf_counter()
+        query.prefetch_disruptions(max_workers=max_workers, refresh=True)
+        print(f"prefetch, {max_workers:2d} workers {time.perf_counter() - start:8.2f} s")
+    path = os.path.join(query.cache.directory, "disruptions.npz")
+    print(f"stored calendar      {os.path.getsize(path) / 1024:8.1f} KiB")
+
+    start = time.perf_counter()
+    stored = [query.query_disruptions(date_str) for date_str in dates]
+    print(f"from the calendar    {time.perf_counter() - start:8.4f} s")
+    assert stored == fetched
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
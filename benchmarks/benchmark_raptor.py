@@ -0,0 +1,61 @@
+"""
+Benchmark the round-based search for the journeys that trade changes of line for travel time against
+repeated Dijkstra searches of the line network with a range of interchange penalties.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_raptor
+"""
+import time
+import numpy as np
+from londontube.Network import Network
+from londontube.disruptions import BaselineNetwork, compile_disruptions
+from londontube.raptor import line_rounds, pareto_journeys
+from benchmarks.benchmark_disruptions import line_matrices
+
+# The penalties a caller would otherwise try, in minutes per change
+PENALTIES = [0, 1, 2, 3, 5, 8, 13, 1000]
+
+
+def main():
+    layered = BaselineNetwork([Network(296, matrix).to_csr() for matrix in line_matrices()]).apply_layered(
+        compile_disruptions([]))
+    rng = np.random.default_rng(0)
+    components = layered.network.components
+    pairs = [(int(a), int(b)) for a, b in rng.integers(0, 296, (400, 2)) if a != b and components[a] == components[b]][:200]
+
+    # The travel times along every line are computed once per network
+    start = time.perf_counter()
+    layered.line_tables
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pareto = [pareto_journeys(layered, *pair) for pair in pairs]
+    rounds = (time.perf_counter() - start) / len(pairs)
+
+    start = time.perf_counter()
+    swept = [[layered.shortest_path(*pair, penalty) for penalty in PENALTIES] for pair in pairs]
+    dijkstra = (time.perf_counter() - start) / len(pairs)
+
+    # The penalties only find the journeys that are best for some penalty
+    found = 0
+    for journeys, results in zip(pareto, swept):
+        options = {(duration, sum(a != b for a, b in zip(lines, lines[1:]))) for _, lines, duration in results}
+        found += len(options & {(duration, changes) for _, _, duration, changes in journeys})
+    n_journeys = sum(len(journeys) for journeys in pareto)
+
+    # One round-based search answers every destination of a start station
+    start = time.perf_counter()
+    for start_node in {start_node for start_node, _ in pairs}:
+        line_rounds(layered, start_node)
+    per_start = (time.perf_counter() - start) / len({start_node for start_node, _ in pairs})
+
+    print(f"{len(pairs)} pairs, {n_journeys} journeys on the time/changes front "
+          f"({found} found by the {len(PENALTIES)} penalties)")
+    print(f"line tables {setup * 1e3:.1f} ms once per network")
+    print(f"round-based {rounds * 1e3:6.2f} ms per pair ({per_start * 1e3:.2f} ms for all destinations of a start)   "
+          f"dijkstra x {len(PENALTIES)} penalties {dijkstra * 1e3:6.2f} ms per pair   speedup {dijkstra / rounds:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark building the real-time network with serial and concurrent fetching of the line feeds.
+
+Run from the repository root::
+
+    python -m benchmarks.benchmark_real_time_network
+
+The web service is replaced by a local stand-in that adds a fixed latency to every request.
+"""
+import tempfile
+import time
+from londontube import query
+from benchmarks import stand_in_service
+
+
+def main(latency=0.05):
+    server, url = stand_in_service.start(latency)
+    query.configure_client(base_url=url)
+    query.configure_cache(directory=tempfile.mkdtemp(), enabled=False)
+    print(f"round trip latency: {latency * 1e3:.0f} ms")
+    for max_workers in (1, 4, 12):
+        query.network_cache.invalidate()
+        start = time.perf_counter()
+        query.baseline_network(max_workers=max_workers, refresh=True)
+        query.real_time_network("2023-12-15", max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+        print(f"cold, max_workers={max_workers:<3} {elapsed * 1e3:8.1f} ms  ({elapsed / latency:5.1f} round trips)")
+
+    # With the lines in memory only the disruptions of the date are fetched
+    query.network_cache.invalidate()
+    start = time.perf_counter()
+    query.real_time_network("2023-12-16")
+    elapsed = time.perf_counter() - start
+    print(f"warm baseline        {elapsed * 1e3:8.1f} ms  ({elapsed / latency:5.1f} round trips)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+A local stand-in for the London tube web service, used by the benchmarks.
+
+It serves synthetic line, station and disruption data for the 296-station network and adds a fixed
+latency to every request, so that the cost of network round trips can be measured offline.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+
+def synthetic_lines(n_stations=296, n_lines=12, seed=0):
+    """Return the CSV body of every line: each line is a random chain of stations."""
+    rng = np.random.default_rng(seed)
+    lines = []
+    for i in range(n_lines):
+        stations = rng.choice(n_stations, size=40, replace=False)
+        times = rng.integers(1, 6, len(stations) - 1)
+        lines.append("".join(f"{a},{b},{t}\n" for a, b, t in zip(stations[:-1], stations[1:], times)))
+    # Chain every station once so that the whole network is connected
+    times = rng.integers(1, 6, n_stations - 1)
+    lines[0] += "".join(f"{a},{a + 1},{t}\n" for a, t in zip(range(n_stations - 1), times))
+    return lines
+
+
+def synthetic_stations(n_stations=296, seed=0):
+    """Return the CSV body of the station table, with stations scattered around central London."""
+    rng = np.random.default_rng(seed)
+    lats = 51.51 + rng.normal(0, 0.05, n_stations)
+    lons = -0.13 + rng.normal(0, 0.1, n_stations)
+    rows = "".join(f"{i},Station {i},{lat:.4f},{lon:.4f}\n" for i, (lat, lon) in enumerate(zip(lats, lons)))
+    return "station index,station name,latitude,longitude\n" + rows
+
+
+def synthetic_disruptions(date_str, n_stations=296, n_disruptions=20):
+    """Return the JSON body of the disruptions of a date, seeded by the date."""
+    rng = np.random.default_rng(int(date_str.replace("-", "")))
+    disruptions = []
+    for i in range(n_disruptions):
+        disruption = {"delay": int(rng.integers(1, 10))}
+        if rng.random() < 0.7:
+            disruption["line"] = int(rng.integers(0, 12))
+        size = 2 if rng.random() < 0.6 else 1
+        disruption["stations"] = rng.choice(n_stations, size=size, replace=False).tolist()
+        disruptions.append(disruption)
+    return json.dumps(disruptions)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.05
+    lines = synthetic_lines()
+    stations = synthetic_stations()
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        with StandInHandler.lock:
+            StandInHandler.requests_served += 1
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/line/query":
+            body = self.lines[int(params["line_identifier"])]
+        elif url.path == "/stations/query":
+            body = self.stations
+        elif url.path == "/disruptions/query":
+            body = synthetic_disruptions(params["date"])
+        else:
+            body = "ok"
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(latency=0.05):
+    """
+    Start the stand-in service in a background thread.
+
+    Returns
+    -------
+    tuple of (ThreadingHTTPServer, str)
+        The running server and its base URL. Call `server.shutdown()` to stop it.
+    """
+    StandInHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1 @@
+# Make the londontube package importable when running pytest from a checkout.
@@ -1,10 +1,211 @@
+import heapq
 import numpy as np
 
 class Network:
-    def __init__(self, n_nodes, adjacency_matrix):
+    def __init__(self, n_nodes, adjacency_matrix=None, indptr=None, indices=None, weights=None):
+        """
+        A network is stored either as a dense adjacency matrix or, when `indptr`, `indices` and `weights`
+        are given instead, in compressed sparse row (CSR) form: the neighbours of node i are
+        `indices[indptr[i]:indptr[i+1]]` with the matching edge weights in `weights`.
+        """
         self.n_nodes = n_nodes
-        self.adjacency_matrix = adjacency_matrix   
-    
+        self._adjacency_matrix = adjacency_matrix
+        if adjacency_matrix is None:
+            self._csr = (np.asarray(indptr, dtype=np.int64),
+                         np.asarray(indices, dtype=np.int64),
+                         np.asarray(weights, dtype=float))
+        else:
+            self._csr = None
+        self._neighbours = None
+        self._reverse_neighbours = None
+        self._components = None
+
+    def _clear_caches(self):
+        """Forget everything derived from the edges, after they were modified."""
+        if self._adjacency_matrix is not None:
+            self._csr = None
+        self._neighbours = None
+        self._reverse_neighbours = None
+        self._components = None
+
+    @property
+    def storage(self):
+        """The storage mode of the network, either "dense" or "csr"."""
+        return "csr" if self._adjacency_matrix is None else "dense"
+
+    @property
+    def adjacency_matrix(self):
+        """
+        The dense adjacency matrix of the network.
+
+        For a CSR-backed network the matrix is materialised on first access and from then on it is the
+        storage of the network, so in-place edits to it are seen by later operations.
+        """
+        if self._adjacency_matrix is None:
+            indptr, indices, weights = self._csr
+            matrix = np.zeros((self.n_nodes, self.n_nodes))
+            rows = np.repeat(np.arange(self.n_nodes), np.diff(indptr))
+            matrix[rows, indices] = weights
+            self._adjacency_matrix = matrix
+            self._clear_caches()
+        return self._adjacency_matrix
+
+    @adjacency_matrix.setter
+    def adjacency_matrix(self, adjacency_matrix):
+        self._adjacency_matrix = adjacency_matrix
+        self._clear_caches()
+
+    @property
+    def csr(self):
+        """
+        The (indptr, indices, weights) arrays of the network in compressed sparse row form.
+
+        For a dense network they are computed on first use and are not refreshed if `adjacency_matrix`
+        is modified in place afterwards.
+        """
+        if self._csr is None:
+            matrix = np.asarray(self._adjacency_matrix, dtype=float)
+            rows, cols = np.nonzero(matrix > 0)
+            indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=self.n_nodes), out=indptr[1:])
+            self._csr = (indptr, cols.astype(np.int64), matrix[rows, cols])
+        return self._csr
+
+    @property
+    def neighbours(self):
+        """
+        The neighbour lists of the network, computed on first use and then reused by later searches.
+
+        The lists are not refreshed if `adjacency_matrix` is modified in place afterwards.
+        """
+        if self._neighbours is None:
+            self._neighbours = Network.neighbour_lists(self)
+        return self._neighbours
+
+    @property
+    def reverse_neighbours(self):
+        """
+        The neighbour lists of the network with every connection reversed, computed on first use. A
+        search on them from a node finds the costs of the shortest paths to that node.
+
+        The lists are not refreshed if `adjacency_matrix` is modified in place afterwards.
+        """
+        if self._reverse_neighbours is None:
+            rows, cols, weights = self.edges()
+            self._reverse_neighbours = Network.neighbour_lists(Network.from_edges(self.n_nodes, cols, rows, weights))
+        return self._reverse_neighbours
+
+    @property
+    def components(self):
+        """
+        The connected component label of every node, computed on first use (see `Network.component_labels`).
+
+        The labels are not refreshed if `adjacency_matrix` is modified in place afterwards.
+        """
+        if self._components is None:
+            self._components = Network.component_labels(self)
+        return self._components
+
+    def to_csr(self):
+        """
+        Return a CSR-backed copy of the network.
+
+        Returns
+        -------
+        Network
+            A new Network object storing the same edges in compressed sparse row form.
+        """
+        indptr, indices, weights = self.csr
+        return Network(self.n_nodes, indptr=indptr.copy(), indices=indices.copy(), weights=weights.copy())
+
+    def from_edges(n_nodes, rows, cols, weights):
+        """
+        Build a CSR-backed network from a list of edges.
+
+        Edges with a weight of 0 are treated as absent, and where the same edge is listed more than once
+        the lowest weight is kept.
+
+        Parameters
+        ----------
+        n_nodes : int
+            The number of nodes in the network.
+        rows, cols : numpy.ndarray of int
+            The start and end node of every edge.
+        weights : numpy.ndarray of float
+            The weight of every edge.
+
+        Returns
+        -------
+        Network
+            A new CSR-backed Network object.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        weights = np.asarray(weights, dtype=float)
+        present = weights > 0
+        rows, cols, weights = rows[present], cols[present], weights[present]
+        keys = rows * n_nodes + cols
+        # Sort by edge and then by weight, so the first entry of every edge is the cheapest one
+        order = np.lexsort((weights, keys))
+        keys, first = np.unique(keys[order], return_index=True)
+        weights = weights[order][first]
+        rows, cols = np.divmod(keys, n_nodes)
+        indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+        return Network(n_nodes, indptr=indptr, indices=cols, weights=weights)
+
+    def edges(self):
+        """
+        Return the edges of the network.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The start nodes, end nodes and weights of every edge, ordered by start node.
+        """
+        indptr, indices, weights = self.csr
+        rows = np.repeat(np.arange(self.n_nodes), np.diff(indptr))
+        return rows, indices, weights
+
+    def scale_edge(self, station1, station2, factor):
+        """
+        Multiply the weight of the direct connection from station1 to station2 by a factor, in place.
+
+        Parameters
+        ----------
+        station1, station2 : int
+            The start and end node of the connection.
+        factor : float
+            The factor to apply. A factor of 0 removes the connection.
+        """
+        if self.storage == "dense":
+            self._adjacency_matrix[station1, station2] *= factor
+        else:
+            indptr, indices, weights = self._csr
+            row = slice(indptr[station1], indptr[station1 + 1])
+            weights[row][indices[row] == station2] *= factor
+        self._clear_caches()
+
+    def scale_node(self, station, factor):
+        """
+        Multiply the weight of every connection to and from a station by a factor, in place.
+
+        Parameters
+        ----------
+        station : int
+            The node whose connections are delayed.
+        factor : float
+            The factor to apply. A factor of 0 closes the station.
+        """
+        if self.storage == "dense":
+            self._adjacency_matrix[station, :] *= factor
+            self._adjacency_matrix[:, station] *= factor
+        else:
+            indptr, indices, weights = self._csr
+            weights[indptr[station]:indptr[station + 1]] *= factor
+            weights[indices == station] *= factor
+        self._clear_caches()
+
     def __add__(self, Network2):
         """
         Enable the Network class to use the '+' operator with another Network object of the same size 
@@ -18,7 +219,9 @@ class Network:
         Returns
         -------
         Network
-            A new Network object representing the element-wise sum of the adjacency matrices.
+            A new Network object representing the element-wise sum of the adjacency matrices: where both
+            networks have an edge the lowest weight is kept. The result is CSR-backed if either of the two
+            networks is.
 
         Raises
         ------
@@ -28,19 +231,49 @@ class Network:
         if self.n_nodes != Network2.n_nodes:
             raise ValueError("The two objects have different numbers of nodes")
 
-        new_adjacency_matrix = np.empty((len(self.adjacency_matrix), len(self.adjacency_matrix[0])))
-        
-        for i in range(len(self.adjacency_matrix)):
-            for j in range(len(self.adjacency_matrix[i])):
-                if self.adjacency_matrix[i][j] == 0 and Network2.adjacency_matrix[i][j] == 0:
-                    new_adjacency_matrix[i][j] = 0
-                elif self.adjacency_matrix[i][j] == 0 or Network2.adjacency_matrix[i][j] == 0:
-                    new_adjacency_matrix[i][j] = max(self.adjacency_matrix[i][j], Network2.adjacency_matrix[i][j])
-                else:
-                    new_adjacency_matrix[i][j] = min(self.adjacency_matrix[i][j], Network2.adjacency_matrix[i][j])
-        return Network(self.n_nodes, new_adjacency_matrix)
+        return Network.merge(self, Network2)
 
-    def distant_neighbours(n, v, adjacency_matrix): 
+    def merge(*networks):
+        """
+        Merge any number of networks of the same size into a new Network object in a single pass.
+
+        A weight of 0 means there is no edge. Where more than one network has an edge between the same
+        two nodes, the lowest weight is kept.
+
+        Parameters
+        ----------
+        *networks : Network
+            The Network objects to merge, all with the same number of nodes.
+
+        Returns
+        -------
+        Network
+            A new Network object holding the merged edges. The result is CSR-backed if any of the networks is.
+
+        Raises
+        ------
+        ValueError
+            If no networks are given or the Network objects have different numbers of nodes.
+        """
+        if len(networks) == 0:
+            raise ValueError("At least one network is required")
+        n_nodes = networks[0].n_nodes
+        if any(network.n_nodes != n_nodes for network in networks):
+            raise ValueError("The two objects have different numbers of nodes")
+
+        if any(network.storage == "csr" for network in networks):
+            rows, cols, weights = zip(*(network.edges() for network in networks))
+            return Network.from_edges(n_nodes, np.concatenate(rows), np.concatenate(cols), np.concatenate(weights))
+
+        # Treat missing edges as infinitely expensive, so a running minimum keeps the cheapest edge
+        new_adjacency_matrix = np.full((n_nodes, n_nodes), np.inf)
+        for network in networks:
+            matrix = np.asarray(network.adjacency_matrix, dtype=float)
+            np.minimum(new_adjacency_matrix, np.where(matrix == 0, np.inf, matrix), out=new_adjacency_matrix)
+        new_adjacency_matrix[np.isinf(new_adjacency_matrix)] = 0
+        return Network(n_nodes, new_adjacency_matrix)
+
+    def distant_neighbours(n, v, adjacency_matrix, exact=False):
         """
         Compute the n-distance neighbours of a particular node in a graph.
 
@@ -50,28 +283,341 @@ class Network:
             The desired distance from the given node.
         v : int
             The index of the node for which neighbors are to be found.
-        adjacency_matrix : list of list of int
-            The adjacency matrix representing the graph.
+        adjacency_matrix : list of list of int or Network
+            The adjacency matrix representing the graph, or a (dense or CSR-backed) Network object.
+        exact : bool, optional
+            If True, only return the nodes exactly n steps away instead of all nodes within n steps.
+            Default is False.
 
         Returns
         -------
         list of int
-            A list containing the indices of nodes that are at a distance of n from the given node v.
+            A list containing the indices of nodes that are at a distance of n from the given node v,
+            in increasing order.
+        """
+        reached = Network.distant_neighbours_batch(n, [v], adjacency_matrix, exact)
+        return np.flatnonzero(reached[0]).tolist()
+
+    def distant_neighbours_batch(n, sources, adjacency_matrix, exact=False):
         """
-        matrix = np.array(adjacency_matrix, dtype=int)
-        neighbours = [v]
-        index_neighbours = np.full((1,len(matrix[0])), False).flatten()
+        Compute the n-distance neighbours of many nodes at once with a breadth-first search.
+
+        Every hop only expands the edges of the newly reached nodes, so each hop costs O(V + E) per source.
+
+        Parameters
+        ----------
+        n : int
+            The desired distance from the given nodes.
+        sources : list of int
+            The indices of the nodes for which neighbours are to be found.
+        adjacency_matrix : list of list of int or Network
+            The adjacency matrix representing the graph, or a (dense or CSR-backed) Network object.
+        exact : bool, optional
+            If True, only mark the nodes exactly n steps away instead of all nodes within n steps.
+            Default is False.
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            A matrix with one row per source node, where entry [i, j] is True if node j is a neighbour
+            of sources[i]. A source node is never its own neighbour.
+        """
+        graph = Network.as_network(adjacency_matrix)
+        indptr, indices, weights = graph.csr
+        sources = np.asarray(sources, dtype=np.int64)
+        rows = np.arange(len(sources))
+
+        visited = np.zeros((len(sources), graph.n_nodes), dtype=bool)
+        visited[rows, sources] = True
+        frontier = visited.copy()
         for i in range(n):
-            for index in neighbours:
-                row = matrix[index]
-                for j in range(len(row)):
-                    if (row[j] > 0) and (j not in list(np.where(index_neighbours == True)[0])):
-                        index_neighbours[j] = True
-            neighbours += list(set(np.where(index_neighbours == True)[0]) - set(neighbours))
-        while v in neighbours:
-            neighbours.remove(v)
+            # Gather the edges leaving every frontier node of every source
+            source_rows, nodes = np.nonzero(frontier)
+            degrees = indptr[nodes + 1] - indptr[nodes]
+            offsets = np.arange(degrees.sum()) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+            edges = np.repeat(indptr[nodes], degrees) + offsets
+            present = weights[edges] > 0
+            frontier = np.zeros_like(visited)
+            frontier[np.repeat(source_rows, degrees)[present], indices[edges][present]] = True
+            frontier &= ~visited
+            visited |= frontier
+
+        if exact:
+            return frontier if n > 0 else np.zeros_like(visited)
+        visited[rows, sources] = False
+        return visited
+
+    def as_network(adjacency_matrix):
+        """
+        Wrap an adjacency matrix in a Network object, passing Network objects through unchanged.
+
+        Parameters
+        ----------
+        adjacency_matrix : numpy.ndarray or Network
+            The adjacency matrix of the network, or a Network object.
+
+        Returns
+        -------
+        Network
+            The given network, or a dense Network object around the adjacency matrix.
+        """
+        if isinstance(adjacency_matrix, Network):
+            return adjacency_matrix
+        return Network(len(adjacency_matrix), adjacency_matrix)
+
+    def neighbour_lists(adjacency_matrix):
+        """
+        Precompute the neighbours of every node in a graph together with the edge weights.
+
+        Parameters
+        ----------
+        adjacency_matrix : numpy.ndarray or Network
+            The adjacency matrix of the network, or a (dense or CSR-backed) Network object.
+
+        Returns
+        -------
+        list of list of tuple(int, float)
+            For every node, the list of (neighbour index, edge weight) pairs in increasing neighbour order.
+        """
+        graph = Network.as_network(adjacency_matrix)
+        rows, cols, weights = graph.edges()
+        present = weights > 0
+        neighbours = [[] for _ in range(graph.n_nodes)]
+        for row, col, weight in zip(rows[present].tolist(), cols[present].tolist(), weights[present].tolist()):
+            neighbours[row].append((col, weight))
         return neighbours
-    
+
+    def component_labels(adjacency_matrix):
+        """
+        Label the connected components of a graph.
+
+        Connections count in both directions, so two nodes with different labels have no path between
+        them. In an undirected network such as the tube, nodes with the same label always have a path.
+
+        Parameters
+        ----------
+        adjacency_matrix : numpy.ndarray or Network
+            The adjacency matrix of the network, or a (dense or CSR-backed) Network object.
+
+        Returns
+        -------
+        numpy.ndarray
+            For every node, the smallest node index of its component.
+        """
+        graph = Network.as_network(adjacency_matrix)
+        rows, cols, weights = graph.edges()
+        rows, cols = rows[weights > 0], cols[weights > 0]
+        labels = np.arange(graph.n_nodes)
+        while True:
+            # Spread the smallest label across every connection, then follow labels to their own labels
+            previous_labels = labels.copy()
+            np.minimum.at(labels, rows, labels[cols])
+            np.minimum.at(labels, cols, labels[rows])
+            while not np.array_equal(labels, labels[labels]):
+                labels = labels[labels]
+            if np.array_equal(labels, previous_labels):
+                return labels
+
+    def _search(start_node, neighbours, heuristic=None, targets=None, max_cost=None, blocked_nodes=(),
+                blocked_heads=()):
+        """
+        Search the shortest paths from a start node with a heap: Dijkstra's algorithm, or A* if a heuristic
+        is given. Every shortest path search of this class is a call to this one.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+        heuristic : sequence of float, optional
+            A lower bound on the cost from every node to the destination, np.inf for nodes that cannot
+            reach it. Default is None, which searches by cost alone.
+        targets : iterable of int, optional
+            The search stops as soon as all these nodes are settled. Default is None.
+        max_cost : float, optional
+            The search stops once every node within this cost is settled. Default is None.
+        blocked_nodes : iterable of int, optional
+            The nodes the paths must not visit.
+        blocked_heads : set of int, optional
+            The nodes the paths must not go to directly from the start node.
+
+        Returns
+        -------
+        tuple of (list of float, list of int)
+            The cost of the best path found to every node, and the previous node on that path (-1 for the
+            start node and nodes that were not reached). Nodes that were not reached cost np.inf, or -np.inf
+            if they are blocked or their heuristic is np.inf. Only the costs of settled nodes are final.
+        """
+        start_node = int(start_node)
+        if heuristic is None:
+            heuristic = [0] * len(neighbours)
+            cost = [np.inf] * len(neighbours)
+        else:
+            heuristic = np.asarray(heuristic, dtype=float)
+            # Nodes that cannot reach the destination get a cost no path can beat, so they are never queued
+            cost = np.where(heuristic == np.inf, -np.inf, np.inf).tolist()
+            heuristic = heuristic.tolist()
+        for node in blocked_nodes:
+            cost[node] = -np.inf
+        previous_node = [-1] * len(neighbours)
+        is_target = [False] * len(neighbours)
+        for target in () if targets is None else targets:
+            is_target[int(target)] = True
+        remaining = sum(is_target)
+        stop_cost = np.inf if max_cost is None else max_cost
+        cost[start_node] = 0
+        queue = [(heuristic[start_node], 0, start_node)]
+        while queue:
+            _, node_cost, node = heapq.heappop(queue)
+            # Skip outdated queue entries; a node is expanded again only if a cheaper path to it is found,
+            # which can only happen if the heuristic is not consistent
+            if node_cost > cost[node]:
+                continue
+            if node_cost > stop_cost:
+                break
+            if is_target[node]:
+                is_target[node] = False
+                remaining -= 1
+                if not remaining:
+                    break
+            node_neighbours = neighbours[node]
+            if blocked_heads and node == start_node:
+                node_neighbours = [(neighbour, weight) for neighbour, weight in node_neighbours
+                                   if neighbour not in blocked_heads]
+            for neighbour, weight in node_neighbours:
+                proposed_cost = node_cost + weight
+                if proposed_cost < cost[neighbour]:
+                    cost[neighbour] = proposed_cost
+                    previous_node[neighbour] = node
+                    heapq.heappush(queue, (proposed_cost + heuristic[neighbour], proposed_cost, neighbour))
+        return cost, previous_node
+
+    def shortest_path(start_node, dest_node, neighbours, components=None):
+        """
+        Compute the shortest path between a start and destination node with a heap-based Dijkstra search.
+
+        The search works on precomputed neighbour lists (see `Network.neighbour_lists`) and stops as soon
+        as the destination node is settled. Given the component labels of the network, a destination in
+        another component is rejected without searching.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+        components : numpy.ndarray, optional
+            The component labels of the network (see `Network.components`).
+
+        Returns
+        -------
+        Tuple[List[int], float] or None
+            A tuple containing the path as a list of node indices and the cost of the path.
+
+            If no path exists, this function returns None and prints "No possible paths."
+        """
+        start_node = int(start_node)
+        dest_node = int(dest_node)
+        if components is not None and components[start_node] != components[dest_node]:
+            print("No possible paths.")
+            return None
+        return Network.astar(start_node, dest_node, neighbours, None)
+
+    def astar(start_node, dest_node, neighbours, heuristic):
+        """
+        Compute the shortest path between a start and destination node with an A* search.
+
+        The search is guided by a lower bound on the remaining cost from every node to the destination,
+        so it settles fewer nodes than `Network.shortest_path` when the bound is tight. The path found
+        is a shortest path as long as the bound never overestimates the remaining cost.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+        heuristic : sequence of float or None
+            A lower bound on the cost from every node to the destination node, for example
+            `StationDirectory.travel_time_bounds`, or None for a Dijkstra search.
+
+        Returns
+        -------
+        Tuple[List[int], float] or None
+            A tuple containing the path as a list of node indices and the cost of the path.
+
+            If no path exists, this function returns None and prints "No possible paths."
+        """
+        start_node = int(start_node)
+        dest_node = int(dest_node)
+        cost, previous_node = Network._search(start_node, neighbours, heuristic, targets=[dest_node])
+        if not 0 <= cost[dest_node] < np.inf:
+            print("No possible paths.")
+            return None
+        return Network.path_from_tree(start_node, dest_node, previous_node), cost[dest_node]
+
+    def shortest_path_tree(start_node, neighbours, max_cost=None):
+        """
+        Compute the shortest paths from a start node to every other node in one heap-based Dijkstra search.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+        max_cost : float, optional
+            If given, the search stops once every node within this cost is settled, and farther nodes
+            count as unreachable. Default is None, which searches the whole network.
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The cost of the shortest path to every node (np.inf if it cannot be reached), and the previous
+            node on that path (-1 for the start node and unreachable nodes). Paths can be rebuilt with
+            `Network.path_from_tree`.
+        """
+        cost, previous_node = Network._search(start_node, neighbours, max_cost=max_cost)
+        cost, previous_node = np.array(cost, dtype=float), np.array(previous_node, dtype=np.int64)
+        if max_cost is not None:
+            # Nodes beyond the budget were not settled, so their tentative costs are dropped
+            beyond = cost > max_cost
+            cost[beyond] = np.inf
+            previous_node[beyond] = -1
+        return cost, previous_node
+
+    def path_from_tree(start_node, dest_node, previous_nodes):
+        """
+        Rebuild the path to a destination node from the previous nodes of a shortest path tree.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node of the tree.
+        dest_node : int
+            The index of the destination node.
+        previous_nodes : numpy.ndarray
+            The previous node of every node, as returned by `Network.shortest_path_tree`.
+
+        Returns
+        -------
+        list of int or None
+            The path as a list of node indices, or None if the destination cannot be reached.
+        """
+        path_list = [int(dest_node)]
+        while path_list[-1] != start_node:
+            previous_node = int(previous_nodes[path_list[-1]])
+            if previous_node < 0:
+                return None
+            path_list.append(previous_node)
+        path_list.reverse()
+        return path_list
+
     def dijkstra(start_node, dest_node, adjacency_matrix):
         """
         Compute the shortest path with the lowest cost between a start and destination node using Dijkstra’s algorithm.
@@ -82,8 +628,8 @@ class Network:
             The index of the start node.
         dest_node : int
             The index of the destination node.
-        adjacency_matrix : numpy.ndarray
-            The adjacency matrix of the network.
+        adjacency_matrix : numpy.ndarray or Network
+            The adjacency matrix of the network, or a (dense or CSR-backed) Network object.
 
         Returns
         -------
@@ -91,49 +637,218 @@ class Network:
             A tuple containing the path as a list of node indices and the cost, which is the sum of edge weights along
             the shortest path, of the path.
             
-            If no path exists, this function returns (None, 0) and prints "No possible paths."
-        """
-        tenative_cost = list(np.full((1,len(adjacency_matrix[0])), np.inf).flatten())
-        tenative_cost[start_node] = 0
-        previous_node = [None] * len((adjacency_matrix[0]))
-        current_node = start_node
-        visited_nodes = []
-        unvisited_nodes = list(np.arange(0, len(adjacency_matrix[0])))
-        
-        tenative_cost[start_node] = 0
-        for node in range(len(previous_node)):
-            previous_node[node] = start_node
-        
-        dest_not_reached = True
-        while dest_not_reached:
-            nodes = Network.distant_neighbours(1, current_node, adjacency_matrix)
-            for node in nodes:
-                proposed_cost =  adjacency_matrix[current_node][node] + tenative_cost[current_node]
-                if proposed_cost < tenative_cost[node]:
-                    tenative_cost[node] = proposed_cost
-                    previous_node[node] = current_node
-        
-            visited_nodes.append(current_node)
-            unvisited_nodes.remove(current_node)
-
-            if dest_node in visited_nodes:
-                dest_not_reached = False
-            elif min([tenative_cost[i] for i in unvisited_nodes]) == np.inf:
-                print("No possible paths.")
-                return None
-            else:
-                current_node = unvisited_nodes[([tenative_cost[i] for i in unvisited_nodes]).index(min(([tenative_cost[i] for i in unvisited_nodes])))]
-        path_list = []
-        current_node = dest_node
-        path_not_reconstructed = True
-        while path_not_reconstructed:
-            path_list.append(current_node)
-            if previous_node[current_node] == start_node:
-                path_list.append(start_node)
-                path_list.reverse() 
-                path_not_reconstructed = False
-            else:
-                current_node = previous_node[current_node]
-        
-        return path_list,tenative_cost[dest_node]
- 
+            If no path exists, this function returns None and prints "No possible paths."
+        """
+        if isinstance(adjacency_matrix, Network):
+            return Network.shortest_path(start_node, dest_node, adjacency_matrix.neighbours, adjacency_matrix.components)
+        return Network.shortest_path(start_node, dest_node, Network.neighbour_lists(adjacency_matrix))
+
+    def all_pairs(self):
+        """
+        Compute the shortest travel time between every pair of nodes with a vectorised Floyd–Warshall search.
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The n_nodes x n_nodes matrix of shortest costs (np.inf where there is no path), and the matrix
+            of next hops, where entry [i, j] is the node after i on a shortest path from i to j (-1 where
+            there is no path). Paths can be rebuilt with `Network.path_from_next_hops`.
+        """
+        rows, cols, weights = self.edges()
+        present = weights > 0
+        rows, cols, weights = rows[present], cols[present], weights[present]
+        distances = np.full((self.n_nodes, self.n_nodes), np.inf)
+        np.minimum.at(distances, (rows, cols), weights)
+        next_hops = np.full((self.n_nodes, self.n_nodes), -1, dtype=np.int32)
+        next_hops[rows, cols] = cols
+        nodes = np.arange(self.n_nodes)
+        distances[nodes, nodes] = 0
+        next_hops[nodes, nodes] = nodes
+
+        for k in range(self.n_nodes):
+            # Cost of going from every i to every j through k
+            via_k = distances[:, k, np.newaxis] + distances[np.newaxis, k, :]
+            shorter = via_k < distances
+            distances[shorter] = via_k[shorter]
+            next_hops[shorter] = np.broadcast_to(next_hops[:, k, np.newaxis], next_hops.shape)[shorter]
+        return distances, next_hops
+
+    def target_costs(start_node, targets, neighbours):
+        """
+        Compute the cost of the shortest paths from a start node to a set of target nodes in one
+        Dijkstra search, which stops as soon as every target is settled.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        targets : list of int
+            The indices of the target nodes.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+
+        Returns
+        -------
+        numpy.ndarray
+            The cost of the shortest path to every target, in the order of `targets` (np.inf if it
+            cannot be reached).
+        """
+        targets = [int(target) for target in targets]
+        cost, _ = Network._search(start_node, neighbours, targets=targets)
+        return np.array([cost[target] for target in targets], dtype=float)
+
+    def distance_matrix(self, sources, targets, workers=1):
+        """
+        Compute the shortest travel time from every source node to every target node.
+
+        Every source is searched once and its search stops when all the targets are settled (see
+        `Network.target_costs`). With several workers the sources are spread over a pool of processes
+        that share the network (see `parallel.target_cost_rows`).
+
+        Parameters
+        ----------
+        sources : list of int
+            The indices of the source nodes.
+        targets : list of int
+            The indices of the target nodes.
+        workers : int, optional
+            The number of processes. Default is 1, which searches in this process; 0 or None uses one
+            process per CPU.
+
+        Returns
+        -------
+        numpy.ndarray
+            The len(sources) x len(targets) matrix of shortest costs (np.inf where there is no path).
+        """
+        if workers == 1:
+            rows = [Network.target_costs(source, targets, self.neighbours) for source in sources]
+            return np.array(rows, dtype=float).reshape(len(sources), len(targets))
+        # Imported here because the parallel module builds on this one
+        from .parallel import target_cost_rows
+        return target_cost_rows(self, sources, targets, workers)
+
+    def spur_path(spur_node, dest_node, neighbours, heuristic, blocked_nodes=(), blocked_heads=()):
+        """
+        Compute the shortest path from a node to a destination that avoids some nodes and leaves the
+        node by none of some connections, with an A* search.
+
+        Parameters
+        ----------
+        spur_node : int
+            The index of the node the path starts from.
+        dest_node : int
+            The index of the destination node.
+        neighbours : list of list of tuple(int, float)
+            The neighbour lists of the network.
+        heuristic : numpy.ndarray
+            A consistent lower bound on the cost from every node to the destination, np.inf for nodes
+            that cannot reach it, such as the costs of the shortest paths on the whole network.
+        blocked_nodes : set of int, optional
+            The nodes the path must not visit.
+        blocked_heads : set of int, optional
+            The nodes the path must not go to directly from `spur_node`.
+
+        Returns
+        -------
+        Tuple[List[int], float] or None
+            A tuple containing the path as a list of node indices and the cost of the path, or None if
+            there is no such path.
+        """
+        cost, previous_node = Network._search(spur_node, neighbours, heuristic, [dest_node], None, blocked_nodes,
+                                              blocked_heads)
+        if not 0 <= cost[dest_node] < np.inf:
+            return None
+        return Network.path_from_tree(spur_node, dest_node, previous_node), cost[dest_node]
+
+    def k_shortest_paths(self, start_node, dest_node, k=5):
+        """
+        Compute the k shortest paths without repeated nodes between a start and destination node with
+        Yen's algorithm.
+
+        The shortest path tree towards the destination is searched once and gives the exact cost from
+        every node to the destination. Every later path leaves an earlier one at some node (the spur
+        node); these costs guide the spur searches and skip spur nodes whose best possible detour cannot
+        beat the paths already found.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+        k : int, optional
+            The number of paths. Default is 5.
+
+        Returns
+        -------
+        list of tuple(list of int, float)
+            Up to k paths as lists of node indices with their costs, from the shortest. Fewer are returned
+            if the network has fewer paths.
+
+            If no path exists, this function returns an empty list and prints "No possible paths."
+        """
+        start_node = int(start_node)
+        dest_node = int(dest_node)
+        neighbours = self.neighbours
+        to_dest, next_nodes = Network.shortest_path_tree(dest_node, self.reverse_neighbours)
+        if to_dest[start_node] == np.inf:
+            print("No possible paths.")
+            return []
+
+        # The shortest path follows the tree towards the destination
+        path_list = [start_node]
+        while path_list[-1] != dest_node:
+            path_list.append(int(next_nodes[path_list[-1]]))
+        paths = [(path_list, float(to_dest[start_node]))]
+        candidates = []
+        seen = {tuple(path_list)}
+        while len(paths) < k:
+            last_path = paths[-1][0]
+            needed = k - len(paths)
+            root_cost = 0
+            for i, spur_node in enumerate(last_path[:-1]):
+                root = last_path[:i + 1]
+                if i > 0:
+                    root_cost += next(weight for neighbour, weight in neighbours[root[-2]] if neighbour == spur_node)
+                blocked_heads = {path[i + 1] for path, _ in paths if path[:i + 1] == root}
+                blocked_nodes = set(root[:-1])
+                # The cheapest detour from the spur node, if the rest of its path were free
+                detour = min((weight + to_dest[neighbour] for neighbour, weight in neighbours[spur_node]
+                              if neighbour not in blocked_heads and neighbour not in blocked_nodes), default=np.inf)
+                if detour == np.inf or (len(candidates) >= needed and
+                                        root_cost + detour >= heapq.nsmallest(needed, candidates)[-1][0]):
+                    continue
+                spur = Network.spur_path(spur_node, dest_node, neighbours, to_dest, blocked_nodes, blocked_heads)
+                if spur is not None and tuple(root[:-1] + spur[0]) not in seen:
+                    seen.add(tuple(root[:-1] + spur[0]))
+                    heapq.heappush(candidates, (root_cost + spur[1], root[:-1] + spur[0]))
+            if not candidates:
+                break
+            cost, path_list = heapq.heappop(candidates)
+            paths.append((path_list, float(cost)))
+        return paths
+
+    def path_from_next_hops(start_node, dest_node, next_hops):
+        """
+        Rebuild a shortest path from the next-hop matrix computed by `Network.all_pairs`, without any search.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+        next_hops : numpy.ndarray
+            The next-hop matrix, possibly memory-mapped.
+
+        Returns
+        -------
+        list of int or None
+            The path as a list of node indices, or None if there is no path.
+        """
+        if next_hops[start_node, dest_node] < 0:
+            return None
+        path_list = [int(start_node)]
+        while path_list[-1] != dest_node:
+            path_list.append(int(next_hops[path_list[-1], dest_node]))
+        return path_list
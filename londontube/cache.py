@@ -0,0 +1,487 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from datetime import date, timedelta
+import numpy as np
+
+# Line topology and station data are refreshed once a week by default
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# The folders of the cache directory holding results computed from the lines, one subfolder per version
+ARTIFACT_FOLDERS = ("all-pairs", "landmarks", "hierarchies")
+
+CacheEntry = namedtuple("CacheEntry", ["arrays", "etag", "fresh"])
+
+
+def atomic_write(path, write):
+    """
+    This function writes a file through a temporary file that replaces it at the end, so that readers
+    never see a partially written file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file. Missing directories are created.
+    write : callable
+        A function that writes the content to the open binary file it is given.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        write(file)
+    os.replace(temporary_path, path)
+
+
+def default_cache_directory():
+    """
+    This function returns the default cache directory, following the XDG base directory specification.
+
+    Returns
+    -------
+    str
+        `$XDG_CACHE_HOME/londontube`, or `~/.cache/londontube` if XDG_CACHE_HOME is not set.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "londontube")
+
+
+class TopologyCache:
+    """
+    A local cache of data that rarely changes, such as the line connections and the station table.
+
+    Every entry is a set of NumPy arrays stored in one compressed `.npz` file, together with the ETag
+    the web service sent with it. An entry is fresh for `ttl` seconds after it was fetched or last
+    revalidated; a stale entry is revalidated with the web service using its ETag.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The cache directory. Default is `default_cache_directory()`.
+    ttl : float, optional
+        The number of seconds an entry is used without revalidation. Default is one week.
+    offline : bool, optional
+        If True, cached entries are always used and the web service is never contacted. Default is False.
+    enabled : bool, optional
+        If False, nothing is read from or written to disk. Default is True.
+    """
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, offline=False, enabled=True):
+        self.directory = directory or default_cache_directory()
+        self.ttl = ttl
+        self.offline = offline
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name):
+        """The path of the file holding the entry `name`."""
+        return os.path.join(self.directory, f"{name}.npz")
+
+    def lookup(self, name):
+        """
+        Look up an entry of the cache.
+
+        A fresh entry (or any entry in offline mode) counts as a cache hit.
+
+        Parameters
+        ----------
+        name : str
+            The name of the entry, for example "line-3".
+
+        Returns
+        -------
+        CacheEntry or None
+            The cached arrays, ETag and freshness of the entry, or None if it is not cached.
+
+        Raises
+        ------
+        ConnectionError
+            If the entry is not cached and offline mode is on.
+        """
+        if not self.enabled or not os.path.exists(self.path(name)):
+            if self.offline:
+                raise ConnectionError(f"{name} is not in the cache and offline mode is on.")
+            return None
+        with np.load(self.path(name)) as data:
+            arrays = {key: data[key] for key in data.files if key != "etag"}
+            etag = str(data["etag"]) if "etag" in data.files else None
+        fresh = self.offline or time.time() - os.path.getmtime(self.path(name)) < self.ttl
+        if fresh:
+            self.hits += 1
+        return CacheEntry(arrays, etag, fresh)
+
+    def validators(self, entry):
+        """
+        The headers to send so that the web service can confirm a stale entry is still valid.
+
+        Parameters
+        ----------
+        entry : CacheEntry or None
+            The entry returned by `lookup`.
+
+        Returns
+        -------
+        dict or None
+            An If-None-Match header with the ETag of the entry, or None if there is nothing to validate.
+        """
+        if entry is None or entry.etag is None:
+            return None
+        return {"If-None-Match": entry.etag}
+
+    def revalidated(self, name):
+        """
+        Mark an entry as fresh again after the web service confirmed it has not changed (HTTP 304).
+        This counts as a cache hit.
+        """
+        self.hits += 1
+        if self.enabled:
+            os.utime(self.path(name))
+
+    def store(self, name, etag=None, **arrays):
+        """
+        Store freshly fetched arrays in the cache. This counts as a cache miss.
+
+        Parameters
+        ----------
+        name : str
+            The name of the entry.
+        etag : str, optional
+            The ETag the web service sent with the data.
+        **arrays : numpy.ndarray
+            The arrays to store.
+        """
+        self.misses += 1
+        if not self.enabled:
+            return
+        if isinstance(etag, str):
+            arrays["etag"] = np.array(etag)
+        atomic_write(self.path(name), lambda file: np.savez_compressed(file, **arrays))
+
+    def stats(self):
+        """
+        The number of cache hits and misses so far.
+
+        Returns
+        -------
+        dict
+            A dictionary with the keys "hits" and "misses".
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """
+        Remove every entry from the cache directory: the `.npz` files of the topology and of the
+        prefetched disruptions, and the folders of results computed from them (see `ARTIFACT_FOLDERS`).
+        """
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                path = os.path.join(self.directory, filename)
+                if filename.endswith(".npz"):
+                    os.remove(path)
+                elif filename in ARTIFACT_FOLDERS and os.path.isdir(path):
+                    shutil.rmtree(path)
+
+
+def disruption_fingerprint(disruptions):
+    """
+    This function computes a fingerprint of the disruptions of a date.
+
+    Delays are multiplied into the network, so the order of the disruptions does not matter and two
+    dates with the same disruptions in any order have the same fingerprint.
+
+    Parameters
+    ----------
+    disruptions : list
+        The disruptions of a date, as returned by `query.query_disruptions`.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-256 digest of the disruptions.
+    """
+    canonical = sorted(json.dumps([line, [int(station) for station in stations], float(delay)])
+                       for line, stations, delay in disruptions)
+    return hashlib.sha256("\n".join(canonical).encode()).hexdigest()
+
+
+class NetworkCache:
+    """
+    A least-recently-used cache of built networks, or of objects built from them such as landmark
+    indexes and contraction hierarchies, keyed by the fingerprint of their disruptions.
+
+    The cached objects are shared by every caller and must not be modified.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum number of networks kept in memory. Default is 32.
+    """
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._networks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._networks)
+
+    def get(self, key):
+        """
+        Look up a network. A network that is found counts as a hit, otherwise as a miss.
+
+        Parameters
+        ----------
+        key : str
+            The disruption fingerprint of the network.
+
+        Returns
+        -------
+        Network or None
+            The cached network, or None if it is not cached.
+        """
+        with self._lock:
+            network = self._networks.get(key)
+            if network is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._networks.move_to_end(key)
+            return network
+
+    def put(self, key, network):
+        """
+        Add a network to the cache, evicting the least recently used networks beyond `max_size`.
+
+        Parameters
+        ----------
+        key : str
+            The disruption fingerprint of the network.
+        network : Network
+            The built network.
+        """
+        with self._lock:
+            self._networks[key] = network
+            self._networks.move_to_end(key)
+            while len(self._networks) > self.max_size:
+                self._networks.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """
+        Remove a network from the cache, or every network if no key is given.
+
+        Parameters
+        ----------
+        key : str, optional
+            The disruption fingerprint of the network to remove.
+        """
+        with self._lock:
+            if key is None:
+                self._networks.clear()
+            else:
+                self._networks.pop(key, None)
+
+    def stats(self):
+        """
+        The usage of the cache so far.
+
+        Returns
+        -------
+        dict
+            A dictionary with the keys "hits", "misses", "evictions" and "size".
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._networks)}
+
+
+class AllPairsStore:
+    """
+    A directory of precomputed travel-time and next-hop matrices, one pair of `.npy` files per date.
+
+    The matrices are opened memory-mapped, so looking up a route only reads the rows it needs.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory of the matrices. Default is the "all-pairs" folder of `default_cache_directory()`.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(default_cache_directory(), "all-pairs")
+
+    def paths(self, date):
+        """The paths of the distance and next-hop files of a date."""
+        return (os.path.join(self.directory, f"{date}-distances.npy"),
+                os.path.join(self.directory, f"{date}-next-hops.npy"))
+
+    def save(self, date, distances, next_hops):
+        """
+        Store the matrices of a date.
+
+        Parameters
+        ----------
+        date : str
+            A date in the format 'YYYY-MM-DD'.
+        distances, next_hops : numpy.ndarray
+            The matrices returned by `Network.all_pairs`.
+        """
+        for path, matrix in zip(self.paths(date), (distances, next_hops)):
+            atomic_write(path, lambda file: np.save(file, matrix))
+
+    def load(self, date):
+        """
+        Open the matrices of a date.
+
+        Parameters
+        ----------
+        date : str
+            A date in the format 'YYYY-MM-DD'.
+
+        Returns
+        -------
+        tuple of (numpy.memmap, numpy.memmap) or None
+            The read-only memory-mapped distance and next-hop matrices, or None if they are not stored.
+        """
+        paths = self.paths(date)
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        return tuple(np.load(path, mmap_mode="r") for path in paths)
+
+
+class DisruptionCalendar:
+    """
+    The disruptions of a range of dates, stored column by column: one row per delayed connection or
+    station, with the index of its date, the index of its disruption among those of the date, its line
+    (-1 for all lines), its stations (-1 as the second station of a delayed station, and as both for a
+    disruption without stations) and its delay. The stations of a delayed group share one disruption
+    index, so every date is returned exactly as it was fetched.
+
+    Parameters
+    ----------
+    first_date : str
+        The first date of the calendar in the format 'YYYY-MM-DD'.
+    fetched : numpy.ndarray
+        For every date from `first_date` on, whether its disruptions are stored.
+    date_indices, events, lines, stations1, stations2, delays : numpy.ndarray
+        The columns of the disruptions, sorted by date index and disruption index.
+    """
+    def __init__(self, first_date, fetched, date_indices, events, lines, stations1, stations2, delays):
+        self.first_date = date.fromisoformat(first_date)
+        self.fetched = np.asarray(fetched, dtype=bool)
+        self.date_indices = np.asarray(date_indices, dtype=np.int16)
+        self.events = np.asarray(events, dtype=np.int16)
+        self.lines = np.asarray(lines, dtype=np.int8)
+        self.stations1 = np.asarray(stations1, dtype=np.int16)
+        self.stations2 = np.asarray(stations2, dtype=np.int16)
+        self.delays = np.asarray(delays, dtype=float)
+
+    def __len__(self):
+        return int(self.fetched.sum())
+
+    def dates(self):
+        """The dates whose disruptions are stored, in the format 'YYYY-MM-DD'."""
+        return [str(self.first_date + timedelta(days=int(i))) for i in np.flatnonzero(self.fetched)]
+
+    def from_disruptions(first_date, all_disruptions):
+        """
+        Build a calendar from the disruptions of consecutive dates.
+
+        Parameters
+        ----------
+        first_date : str
+            The first date in the format 'YYYY-MM-DD'.
+        all_disruptions : list
+            The disruptions of every date from `first_date` on, as returned by `query.query_disruptions`,
+            or None for dates that are not known.
+
+        Returns
+        -------
+        DisruptionCalendar
+            The calendar of the disruptions.
+        """
+        rows = []
+        for i, disruptions in enumerate(all_disruptions):
+            for event, (line, stations, delay) in enumerate(disruptions or []):
+                line = -1 if line is None else line
+                if len(stations) == 2:
+                    rows.append((i, event, line, stations[0], stations[1], delay))
+                else:
+                    # The stations of a delayed group keep the index of their disruption
+                    rows += [(i, event, line, station, -1, delay) for station in stations or [-1]]
+        columns = np.array(rows, dtype=float).reshape(-1, 6).T
+        fetched = [disruptions is not None for disruptions in all_disruptions]
+        return DisruptionCalendar(first_date, fetched, *columns)
+
+    def get(self, date_str):
+        """
+        Return the disruptions of a date.
+
+        Parameters
+        ----------
+        date_str : str
+            A date in the format 'YYYY-MM-DD'.
+
+        Returns
+        -------
+        list or None
+            The disruptions in the format of `query.query_disruptions`, or None if the date is not stored.
+        """
+        i = (date.fromisoformat(date_str) - self.first_date).days
+        if not 0 <= i < len(self.fetched) or not self.fetched[i]:
+            return None
+        start, end = np.searchsorted(self.date_indices, [i, i + 1])
+        disruptions = []
+        for event, line, station1, station2, delay in zip(self.events[start:end].tolist(),
+                                                          self.lines[start:end].tolist(),
+                                                          self.stations1[start:end].tolist(),
+                                                          self.stations2[start:end].tolist(),
+                                                          self.delays[start:end].tolist()):
+            if event < len(disruptions):
+                # Another station of the delayed group before it
+                disruptions[-1][1].append(station1)
+                continue
+            stations = [] if station1 == -1 else [station1] if station2 == -1 else [station1, station2]
+            disruptions.append([None if line == -1 else line, stations, delay])
+        return disruptions
+
+    def save(self, path):
+        """
+        Store the calendar in a compressed `.npz` file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        """
+        atomic_write(path, lambda file: np.savez_compressed(
+            file, first_date=np.array(str(self.first_date)), fetched=self.fetched, date_indices=self.date_indices,
+            events=self.events, lines=self.lines, stations1=self.stations1, stations2=self.stations2, delays=self.delays))
+
+    def load(path):
+        """
+        Load a calendar stored with `DisruptionCalendar.save`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        DisruptionCalendar or None
+            The stored calendar, or None if the file does not exist or was stored without the disruption
+            indices, which split delayed groups into one disruption per station.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if "events" not in data:
+                return None
+            return DisruptionCalendar(str(data["first_date"]), data["fetched"], data["date_indices"], data["events"],
+                                      data["lines"], data["stations1"], data["stations2"], data["delays"])
@@ -0,0 +1,185 @@
+from collections import namedtuple
+import hashlib
+import numpy as np
+from .Network import Network
+from .layered import LayeredNetwork
+
+# Line index used for disruptions that affect every line
+ALL_LINES = -1
+
+CompiledDisruptions = namedtuple("CompiledDisruptions", [
+    "edge_lines", "edge_from", "edge_to", "edge_delays", "edge_orders",
+    "node_lines", "node_stations", "node_delays", "node_orders",
+])
+
+
+def compile_disruptions(disruptions):
+    """
+    This function converts the disruptions of a date into index arrays.
+
+    Parameters
+    ----------
+    disruptions : list
+        A list of service disruptions, each represented as [line, [station1, station2], delay] or
+        [line, [station], delay], where a line of None means all lines.
+
+    Returns
+    -------
+    CompiledDisruptions
+        The line (ALL_LINES for all lines), stations, delay and position in `disruptions` of every
+        delayed connection (`edge_*` arrays) and of every delayed station (`node_*` arrays).
+    """
+    edges = []
+    nodes = []
+    for order, (line, stations, delay) in enumerate(disruptions):
+        line = ALL_LINES if line is None else line
+        if len(stations) == 2:
+            # A delay to the direct connection between two stations
+            edges.append((line, stations[0], stations[1], delay, order))
+        else:
+            # A delay to all journeys through the stations
+            nodes += [(line, station, delay, order) for station in stations]
+    edges = np.array(edges, dtype=float).reshape(-1, 5)
+    nodes = np.array(nodes, dtype=float).reshape(-1, 4)
+    return CompiledDisruptions(edges[:, 0].astype(np.int64), edges[:, 1].astype(np.int64),
+                               edges[:, 2].astype(np.int64), edges[:, 3], edges[:, 4].astype(np.int64),
+                               nodes[:, 0].astype(np.int64), nodes[:, 1].astype(np.int64), nodes[:, 2],
+                               nodes[:, 3].astype(np.int64))
+
+
+def _matching_positions(sorted_keys, query_keys):
+    """
+    Find every position of every query key in sorted keys, which may repeat.
+
+    Returns the positions, and for every position the index of the query key it matches.
+    """
+    starts = np.searchsorted(sorted_keys, query_keys, side="left")
+    lengths = np.searchsorted(sorted_keys, query_keys, side="right") - starts
+    owners = np.repeat(np.arange(len(query_keys)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owners] + offsets, owners
+
+
+def _sorted_index(keys, edges):
+    """Sort keys, and the edges they belong to alongside."""
+    order = np.argsort(keys, kind="stable")
+    return keys[order], edges[order]
+
+
+class BaselineNetwork:
+    """
+    The undisrupted connections of every line, kept side by side so that the disruptions of any date
+    can be applied to all of them in one pass.
+
+    The `version` attribute is a short hash of every connection, which changes whenever the lines do,
+    so that results computed from the lines can be stored under it.
+
+    Parameters
+    ----------
+    line_networks : list of Network
+        The undisrupted network of every line, indexed by line ID.
+    """
+    def __init__(self, line_networks):
+        self.n_nodes = line_networks[0].n_nodes
+        self.n_lines = len(line_networks)
+        edges = [network.edges() for network in line_networks]
+        self.lines = np.concatenate([np.full(len(rows), line) for line, (rows, cols, weights) in enumerate(edges)])
+        self.rows = np.concatenate([rows for rows, cols, weights in edges]).astype(np.int64)
+        self.cols = np.concatenate([cols for rows, cols, weights in edges]).astype(np.int64)
+        self.weights = np.concatenate([weights for rows, cols, weights in edges]).astype(float)
+        digest = hashlib.sha256(np.array([self.n_nodes, self.n_lines], dtype=np.int64).tobytes())
+        for array in (self.lines.astype(np.int64), self.rows, self.cols, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.version = digest.hexdigest()[:16]
+
+        # Sorted lookups from a station, a line connection and a connection on any line to the edges
+        n, n_edges = self.n_nodes, len(self.rows)
+        self._station_keys, self._station_edges = _sorted_index(np.concatenate([self.rows, self.cols]),
+                                                                     np.tile(np.arange(n_edges), 2))
+        self._line_keys, self._line_edges = _sorted_index((self.lines * n + self.rows) * n + self.cols,
+                                                               np.arange(n_edges))
+        self._keys, self._key_edges = _sorted_index(self.rows * n + self.cols, np.arange(n_edges))
+
+    def delayed_weights(self, compiled):
+        """
+        Compute the weight of every line connection on a date.
+
+        The delays are multiplied into the weights in the order of the disruptions, so the result is
+        exactly the same, to the last bit, as applying the disruptions one at a time with
+        `query.apply_disruptions`.
+
+        Parameters
+        ----------
+        compiled : CompiledDisruptions
+            The disruptions of the date, as returned by `compile_disruptions`.
+
+        Returns
+        -------
+        numpy.ndarray
+            One weight per connection, in the order of `self.lines`, `self.rows` and `self.cols`.
+        """
+        n = self.n_nodes
+
+        # Delayed stations delay every connection to and from them, on one line or on every line
+        positions, owners = _matching_positions(self._station_keys, compiled.node_stations)
+        node_edges = self._station_edges[positions]
+        node_lines = compiled.node_lines[owners]
+        on_line = (node_lines == ALL_LINES) | (node_lines == self.lines[node_edges])
+        delayed_edges = [node_edges[on_line]]
+        delays = [compiled.node_delays[owners][on_line]]
+        orders = [compiled.node_orders[owners][on_line]]
+
+        # Delayed connections, on one line or on every line
+        one_line = compiled.edge_lines != ALL_LINES
+        for sorted_keys, key_edges, keys, selected in [
+                (self._line_keys, self._line_edges,
+                 (compiled.edge_lines * n + compiled.edge_from) * n + compiled.edge_to, one_line),
+                (self._keys, self._key_edges, compiled.edge_from * n + compiled.edge_to, ~one_line)]:
+            positions, owners = _matching_positions(sorted_keys, keys[selected])
+            delayed_edges.append(key_edges[positions])
+            delays.append(compiled.edge_delays[selected][owners])
+            orders.append(compiled.edge_orders[selected][owners])
+
+        # np.multiply.at multiplies repeated edges one delay at a time, in the order given
+        order = np.argsort(np.concatenate(orders), kind="stable")
+        weights = self.weights.copy()
+        np.multiply.at(weights, np.concatenate(delayed_edges)[order], np.concatenate(delays)[order])
+        return weights
+
+    def apply(self, compiled):
+        """
+        Apply the disruptions of a date and merge the lines into one network.
+
+        The result is the same as applying every disruption to every line one at a time and merging
+        the lines with `Network.merge`.
+
+        Parameters
+        ----------
+        compiled : CompiledDisruptions
+            The disruptions of the date, as returned by `compile_disruptions`.
+
+        Returns
+        -------
+        Network
+            A CSR-backed network of the whole tube on the date.
+        """
+        weights = self.delayed_weights(compiled)
+        return Network.from_edges(self.n_nodes, self.rows, self.cols, weights)
+
+    def apply_layered(self, compiled):
+        """
+        Apply the disruptions of a date without merging the lines.
+
+        Parameters
+        ----------
+        compiled : CompiledDisruptions
+            The disruptions of the date, as returned by `compile_disruptions`.
+
+        Returns
+        -------
+        LayeredNetwork
+            The connections of every line on the date. Its merged `network` is the same as the one
+            returned by `apply`.
+        """
+        weights = self.delayed_weights(compiled)
+        return LayeredNetwork.from_line_edges(self.n_nodes, self.n_lines, self.lines, self.rows, self.cols, weights)
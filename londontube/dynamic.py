@@ -0,0 +1,122 @@
+import heapq
+import numpy as np
+from .Network import Network
+
+
+def _weights_of(query_keys, keys, weights):
+    """Look up the weight of every query key in sorted keys; np.inf for keys that are not there."""
+    found = np.full(len(query_keys), np.inf)
+    if len(keys) == 0:
+        return found
+    positions = np.minimum(np.searchsorted(keys, query_keys), len(keys) - 1)
+    matched = keys[positions] == query_keys
+    found[matched] = weights[positions[matched]]
+    return found
+
+
+class DynamicShortestPathTrees:
+    """
+    The shortest path trees of a few start nodes on a baseline network, which are repaired for other
+    versions of the network instead of being searched again.
+
+    Disruptions only change the weights of a few connections, so only the nodes below a slowed
+    connection of a tree, and the nodes a faster connection leads to, are searched again.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        The baseline network, for example the undisrupted tube network.
+    start_nodes : list of int
+        The indices of the start nodes.
+    """
+    def __init__(self, network, start_nodes):
+        network = Network.as_network(network)
+        self.n_nodes = network.n_nodes
+        self.start_nodes = [int(start_node) for start_node in start_nodes]
+        trees = [Network.shortest_path_tree(start_node, network.neighbours) for start_node in self.start_nodes]
+        self.costs = np.array([costs for costs, _ in trees]).reshape(-1, self.n_nodes)
+        self.previous_nodes = np.array([previous_nodes for _, previous_nodes in trees], dtype=np.int64).reshape(-1, self.n_nodes)
+        rows, cols, weights = network.edges()
+        present = weights > 0
+        keys = rows[present] * self.n_nodes + cols[present]
+        order = np.argsort(keys)
+        self._keys = keys[order]
+        self._weights = weights[present][order]
+        self._children = []
+        for previous_nodes in self.previous_nodes.tolist():
+            children = [[] for _ in range(self.n_nodes)]
+            for node, previous_node in enumerate(previous_nodes):
+                if previous_node >= 0:
+                    children[previous_node].append(node)
+            self._children.append(children)
+
+    def repair(self, network):
+        """
+        Compute the shortest path trees of the start nodes on another version of the baseline network.
+
+        Parameters
+        ----------
+        network : Network or numpy.ndarray
+            The network with changed connection weights, for example the network of a disruption day,
+            with the same number of nodes as the baseline.
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The costs and previous nodes of every start node, one row per start node, as
+            `Network.shortest_path_tree` would return them on `network`.
+        """
+        network = Network.as_network(network)
+        n = self.n_nodes
+        rows, cols, weights = network.edges()
+        present = weights > 0
+        rows, cols, weights = rows[present], cols[present], weights[present]
+        keys = rows * n + cols
+        order = np.argsort(keys)
+        # Connections that became slower (or were closed), and connections that became faster (or new)
+        slower = _weights_of(self._keys, keys[order], weights[order]) > self._weights
+        slower_tails, slower_heads = np.divmod(self._keys[slower], n)
+        faster = weights < _weights_of(keys, self._keys, self._weights)
+        indptr, indices, csr_weights = (array.tolist() for array in network.csr)
+
+        all_costs = np.empty((len(self.start_nodes), n))
+        all_previous_nodes = np.empty((len(self.start_nodes), n), dtype=np.int64)
+        for i in range(len(self.start_nodes)):
+            # Slower connections of the tree cut off the subtrees below them
+            cut_off = np.zeros(n, dtype=bool)
+            stack = slower_heads[self.previous_nodes[i, slower_heads] == slower_tails].tolist()
+            while stack:
+                node = stack.pop()
+                if not cut_off[node]:
+                    cut_off[node] = True
+                    stack += self._children[i][node]
+            costs = np.where(cut_off, np.inf, self.costs[i]).tolist()
+            previous_nodes = np.where(cut_off, -1, self.previous_nodes[i]).tolist()
+
+            # The cut-off nodes are reached again from the rest of the tree, and faster connections may
+            # shorten the paths to any node
+            seeds = (cut_off[cols] | faster) & ~cut_off[rows]
+            queue = []
+            for tail, head, weight in zip(rows[seeds].tolist(), cols[seeds].tolist(), weights[seeds].tolist()):
+                proposed_cost = costs[tail] + weight
+                if proposed_cost < costs[head]:
+                    costs[head] = proposed_cost
+                    previous_nodes[head] = tail
+                    queue.append((proposed_cost, head))
+            heapq.heapify(queue)
+
+            # Continue the Dijkstra search from the seeds only
+            while queue:
+                node_cost, node = heapq.heappop(queue)
+                if node_cost > costs[node]:
+                    continue
+                for j in range(indptr[node], indptr[node + 1]):
+                    proposed_cost = node_cost + csr_weights[j]
+                    neighbour = indices[j]
+                    if csr_weights[j] > 0 and proposed_cost < costs[neighbour]:
+                        costs[neighbour] = proposed_cost
+                        previous_nodes[neighbour] = node
+                        heapq.heappush(queue, (proposed_cost, neighbour))
+            all_costs[i] = costs
+            all_previous_nodes[i] = previous_nodes
+        return all_costs, all_previous_nodes
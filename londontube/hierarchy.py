@@ -0,0 +1,261 @@
+import heapq
+import os
+import numpy as np
+from .Network import Network
+from .cache import atomic_write
+
+
+class ContractionHierarchy:
+    """
+    A contraction hierarchy of a network: every node has a rank, and shortcut connections stand in for
+    the shortest paths through lower-ranked nodes. A journey is then found by two small searches that
+    only move to higher-ranked nodes, one from the start and one (backwards) from the destination.
+
+    The hierarchy is built with `build_hierarchy`. It can be stored with `save`, and it can be pickled,
+    for example to send it to worker processes.
+
+    Parameters
+    ----------
+    n_nodes : int
+        The number of nodes of the network.
+    rank : numpy.ndarray
+        The position of every node in the contraction order.
+    tails, heads, weights : numpy.ndarray
+        The start node, end node and weight of every connection of the hierarchy, shortcuts included.
+    middles : numpy.ndarray
+        For a shortcut, the node it was added for, so that it stands for the path tail -> middle -> head;
+        -1 for a connection of the network.
+    """
+    def __init__(self, n_nodes, rank, tails, heads, weights, middles):
+        self.n_nodes = n_nodes
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.tails = np.asarray(tails, dtype=np.int64)
+        self.heads = np.asarray(heads, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=float)
+        self.middles = np.asarray(middles, dtype=np.int64)
+        # Connections to higher-ranked nodes, by start node for the forward search and by end node for
+        # the backward search
+        self._upward = [[] for _ in range(n_nodes)]
+        self._downward = [[] for _ in range(n_nodes)]
+        self._middle = {}
+        rank = self.rank.tolist()
+        for tail, head, weight, middle in zip(self.tails.tolist(), self.heads.tolist(),
+                                              self.weights.tolist(), self.middles.tolist()):
+            if rank[head] > rank[tail]:
+                self._upward[tail].append((head, weight))
+            else:
+                self._downward[head].append((tail, weight))
+            self._middle[(tail, head)] = middle
+
+    def __reduce__(self):
+        return ContractionHierarchy, (self.n_nodes, self.rank, self.tails, self.heads, self.weights, self.middles)
+
+    def shortest_path(self, start_node, dest_node):
+        """
+        Compute the shortest path between a start and destination node.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+
+        Returns
+        -------
+        Tuple[List[int], float] or None
+            A tuple containing the path as a list of node indices, with every shortcut unpacked, and the
+            cost of the path.
+
+            If no path exists, this function returns None and prints "No possible paths."
+        """
+        start_node = int(start_node)
+        dest_node = int(dest_node)
+        graphs = (self._upward, self._downward)
+        costs = ({start_node: 0}, {dest_node: 0})
+        previous_nodes = ({start_node: None}, {dest_node: None})
+        queues = ([(0, start_node)], [(0, dest_node)])
+        best = 0 if start_node == dest_node else np.inf
+        while queues[0] or queues[1]:
+            # Advance the search whose next node is closer
+            direction = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            queue, cost, previous_node = queues[direction], costs[direction], previous_nodes[direction]
+            node_cost, node = heapq.heappop(queue)
+            if node_cost >= best:
+                # Nothing this search reaches from now on can lead to a shorter path
+                queue.clear()
+                continue
+            if node_cost > cost[node]:
+                continue
+            best = min(best, node_cost + costs[1 - direction].get(node, np.inf))
+            for neighbour, weight in graphs[direction][node]:
+                proposed_cost = node_cost + weight
+                if proposed_cost < cost.get(neighbour, np.inf):
+                    cost[neighbour] = proposed_cost
+                    previous_node[neighbour] = node
+                    heapq.heappush(queue, (proposed_cost, neighbour))
+        if best == np.inf:
+            print("No possible paths.")
+            return None
+
+        meeting_node = min((node for node in costs[0] if node in costs[1]),
+                           key=lambda node: costs[0][node] + costs[1][node])
+        forward = [meeting_node]
+        while forward[-1] != start_node:
+            forward.append(previous_nodes[0][forward[-1]])
+        forward.reverse()
+        backward = [meeting_node]
+        while backward[-1] != dest_node:
+            backward.append(previous_nodes[1][backward[-1]])
+        path_list = [start_node]
+        for tail, head in zip(forward[:-1] + backward[:-1], forward[1:] + backward[1:]):
+            self._unpack(tail, head, path_list)
+        return path_list, costs[0][meeting_node] + costs[1][meeting_node]
+
+    def _unpack(self, tail, head, path_list):
+        """Append the nodes after `tail` on the path a connection stands for to `path_list`."""
+        stack = [(tail, head)]
+        while stack:
+            tail, head = stack.pop()
+            middle = self._middle[(tail, head)]
+            if middle < 0:
+                path_list.append(head)
+            else:
+                stack.append((middle, head))
+                stack.append((tail, middle))
+
+    def save(self, path):
+        """
+        Store the hierarchy in a `.npz` file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        """
+        atomic_write(path, lambda file: np.savez(file, n_nodes=self.n_nodes, rank=self.rank, tails=self.tails,
+                                                 heads=self.heads, weights=self.weights, middles=self.middles))
+
+    def load(path):
+        """
+        Load a hierarchy stored with `ContractionHierarchy.save`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        ContractionHierarchy or None
+            The stored hierarchy, or None if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return ContractionHierarchy(int(data["n_nodes"]), data["rank"], data["tails"], data["heads"],
+                                        data["weights"], data["middles"])
+
+
+def build_hierarchy(network, witness_limit=100):
+    """
+    This function builds the contraction hierarchy of a network.
+
+    Nodes are contracted in order of importance, least important first, where the importance of a node
+    is the number of shortcuts its contraction adds minus the number of connections it removes, plus
+    the number of its neighbours already contracted. A shortcut u -> w is added for a node v only if no
+    other path from u to w is as short as u -> v -> w. Connections may be one-way.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        The network, or its adjacency matrix.
+    witness_limit : int, optional
+        The maximum number of nodes settled when looking for another path. A smaller limit builds the
+        hierarchy faster but may add unnecessary shortcuts. Default is 100.
+
+    Returns
+    -------
+    ContractionHierarchy
+        The contraction hierarchy of the network.
+    """
+    network = Network.as_network(network)
+    n_nodes = network.n_nodes
+    # The connections between nodes that are not contracted yet, and the node every shortcut skips
+    out_edges = [{} for _ in range(n_nodes)]
+    in_edges = [{} for _ in range(n_nodes)]
+    middles = {}
+    rows, cols, weights = network.edges()
+    for tail, head, weight in zip(rows.tolist(), cols.tolist(), weights.tolist()):
+        if weight > 0 and tail != head and weight < out_edges[tail].get(head, np.inf):
+            out_edges[tail][head] = in_edges[head][tail] = weight
+            middles[(tail, head)] = -1
+
+    def witness_costs(source, excluded, limit, targets):
+        """The cost of the paths from `source` to `targets` that avoid `excluded`, as far as they are found."""
+        cost = {source: 0}
+        queue = [(0, source)]
+        remaining = set(targets)
+        settled = 0
+        while queue and remaining and settled < witness_limit:
+            node_cost, node = heapq.heappop(queue)
+            if node_cost > limit:
+                break
+            if node_cost > cost[node]:
+                continue
+            settled += 1
+            remaining.discard(node)
+            for neighbour, weight in out_edges[node].items():
+                proposed_cost = node_cost + weight
+                if neighbour != excluded and proposed_cost < cost.get(neighbour, np.inf):
+                    cost[neighbour] = proposed_cost
+                    heapq.heappush(queue, (proposed_cost, neighbour))
+        return cost
+
+    def shortcuts(node):
+        """The shortcuts (tail, head, weight) needed to contract a node."""
+        needed = []
+        for tail, in_weight in in_edges[node].items():
+            targets = {head: in_weight + out_weight for head, out_weight in out_edges[node].items() if head != tail}
+            if not targets:
+                continue
+            cost = witness_costs(tail, node, max(targets.values()), targets)
+            needed += [(tail, head, weight) for head, weight in targets.items() if cost.get(head, np.inf) > weight]
+        return needed
+
+    contracted_neighbours = [0] * n_nodes
+
+    def importance(node):
+        return (len(shortcuts(node)) - len(in_edges[node]) - len(out_edges[node])
+                + contracted_neighbours[node])
+
+    queue = [(importance(node), node) for node in range(n_nodes)]
+    heapq.heapify(queue)
+    rank = np.zeros(n_nodes, dtype=np.int64)
+    edges = []
+    for order in range(n_nodes):
+        # The importance of a node changes as its neighbours are contracted, so it is updated lazily
+        while True:
+            _, node = heapq.heappop(queue)
+            priority = importance(node)
+            if not queue or priority <= queue[0][0]:
+                break
+            heapq.heappush(queue, (priority, node))
+        rank[node] = order
+        for tail, head, weight in shortcuts(node):
+            if weight < out_edges[tail].get(head, np.inf):
+                out_edges[tail][head] = in_edges[head][tail] = weight
+                middles[(tail, head)] = node
+        # The connections of the node are final now, and leave the graph of the remaining nodes
+        for tail, weight in in_edges[node].items():
+            edges.append((tail, node, weight, middles[(tail, node)]))
+            del out_edges[tail][node]
+            contracted_neighbours[tail] += 1
+        for head, weight in out_edges[node].items():
+            edges.append((node, head, weight, middles[(node, head)]))
+            del in_edges[head][node]
+            contracted_neighbours[head] += 1
+        in_edges[node] = {}
+        out_edges[node] = {}
+    edges = np.array(edges, dtype=float).reshape(-1, 4)
+    return ContractionHierarchy(n_nodes, rank, edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3])
@@ -1,10 +1,17 @@
 import argparse
+import csv
+import json
+import sys
+import numpy as np
 from . import query
 from .Network import Network
+from .parallel import route_pairs
+from .raptor import pareto_journeys
+from .stations import station_directory
 import matplotlib.pyplot as plt
-from datetime import date
+from datetime import date, timedelta
 
-def plan_journey(start, dest, date):
+def plan_journey(start, dest, date, astar=False, landmarks=False, hierarchy=False):
     """
     Calculate the path and duration of a journey given the start point, destination, and date.
 
@@ -16,6 +23,16 @@ def plan_journey(start, dest, date):
         The ID or name of the destination station.
     date : str
         The date of the journey in 'YYYY-MM-DD' format.
+    astar : bool, optional
+        If True, guide the search with the straight-line distance to the destination (A*). The
+        journey found is the same, but fewer stations are searched. Default is False.
+    landmarks : bool, optional
+        If True, guide the search with the landmark index of the date (see
+        `query.real_time_landmarks`), combined with the straight-line distance if `astar` is also
+        True. Default is False.
+    hierarchy : bool, optional
+        If True, answer with the contraction hierarchy of the date (see `query.real_time_hierarchy`),
+        which is fastest when many journeys are planned on the same date. Default is False.
 
     Returns
     -------
@@ -23,21 +40,174 @@ def plan_journey(start, dest, date):
         A tuple where the first element is a list that includes the IDs of passing stations in order,
         and the second element is the duration of the journey in minutes.
     """
-    # If start or dest is a str, then convert it to station ID
-    if type(start) == str:
-        start_int = query.query_station_num(start)
+    # Convert station names to station IDs
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    dest_int = stations.station_id(dest)
+    # The london tube network of given date, with the disruptions fetched once for the network and the indexes
+    disruptions = query.query_disruptions(date) if landmarks or hierarchy else None
+    if (landmarks or hierarchy) and disruptions is None:
+        raise ValueError(f"Error: Unable to fetch disruption information for {date}.")
+    tube_network = query.real_time_network(date, disruptions=disruptions)
+    # Stations in different parts of the network have no journey between them
+    components = tube_network.components
+    if components[start_int] != components[dest_int]:
+        print("No possible paths.")
+        return None, 0
+    # Apply dij (or A*, or the contraction hierarchy) to obtain the path and time
+    if hierarchy:
+        result = query.real_time_hierarchy(date, disruptions).shortest_path(start_int, dest_int)
+    elif astar or landmarks:
+        bounds = np.zeros(tube_network.n_nodes)
+        if astar:
+            bounds = stations.travel_time_bounds(dest_int, stations.max_speed(tube_network), tube_network.n_nodes)
+        if landmarks:
+            bounds = np.maximum(bounds, query.real_time_landmarks(date, disruptions=disruptions).bounds(dest_int))
+        result = Network.astar(start_int, dest_int, tube_network.neighbours, bounds)
     else:
-        start_int = start
-    if type(dest) == str:
-        dest_int = query.query_station_num(dest)
-    else:
-        dest_int = dest
-    # The london tube network of given date
-    tube_network = query.real_time_network(date)
-    # Apply dij to obtain the path and time
-    journey, duration = Network.dijkstra(start_int, dest_int, tube_network.adjacency_matrix)
+        result = Network.shortest_path(start_int, dest_int, tube_network.neighbours)
+    if result is None:
+        return None, 0
+    journey, duration = result
     return journey, duration
 
+def plan_journey_lines(start, dest, date, interchange_penalty=0):
+    """
+    Plan a journey on the lines of a date, reporting the line of every leg.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    date : str
+        The date of the journey in 'YYYY-MM-DD' format.
+    interchange_penalty : float, optional
+        The minutes added for every change of line when comparing journeys. Default is 0, which finds
+        the fastest journey.
+
+    Returns
+    -------
+    tuple of (list of int, list of int, float)
+        The IDs of passing stations in order, the line ID of every leg, and the duration of the journey
+        in minutes, without the penalties. The stations and lines are None if the journey is impossible.
+    """
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    dest_int = stations.station_id(dest)
+    result = query.real_time_layered_network(date).shortest_path(start_int, dest_int, interchange_penalty)
+    if result is None:
+        return None, None, 0
+    return result
+
+def plan_journey_options(start, dest, date, max_changes=None):
+    """
+    Plan the journeys that trade changes of line for travel time: the fastest journey without a change,
+    then with one change if that is faster, and so on, in one round-based search (see
+    `raptor.pareto_journeys`).
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    max_changes : int, optional
+        The largest number of changes to consider. Default is None, which considers any number.
+
+    Returns
+    -------
+    list of tuple(list of int, list of int, float, int)
+        The IDs of passing stations in order, the line ID of every leg, the duration in minutes and the
+        number of changes of every journey, by increasing number of changes. The list is empty if the
+        journey is impossible.
+    """
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    dest_int = stations.station_id(dest)
+    return pareto_journeys(query.real_time_layered_network(date), start_int, dest_int, max_changes)
+
+
+def options_planner(start, dest, setoff_date, max_changes=None):
+    """
+    Print the journeys that trade changes of line for travel time.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    setoff_date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    max_changes : int, optional
+        The largest number of changes to consider. Default is None, which considers any number.
+    """
+    print("Date:", setoff_date)
+    journeys = plan_journey_options(start, dest, setoff_date, max_changes)
+    if not journeys:
+        print("This journey is impossible due to disruptions on the given date")
+        return
+    stations = station_directory()
+    for journey, lines, duration, changes in journeys:
+        boardings = [stations.name(journey[i]) + f" (line {lines[i]})"
+                     for i in range(len(lines)) if i == 0 or lines[i] != lines[i - 1]]
+        print(f"{changes} changes, {duration:.0f} minutes: " + " > ".join(boardings + [stations.name(journey[-1])]))
+
+def plan_journey_alternatives(start, dest, date, k=5):
+    """
+    Plan the k fastest journeys that visit no station twice (see `Network.k_shortest_paths`).
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    k : int, optional
+        The number of journeys. Default is 5.
+
+    Returns
+    -------
+    list of tuple(list of int, float)
+        The IDs of passing stations in order and the duration in minutes of every journey, from the
+        fastest. The list is empty if the journey is impossible.
+    """
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    dest_int = stations.station_id(dest)
+    return query.real_time_network(date).k_shortest_paths(start_int, dest_int, k)
+
+
+def alternatives_planner(start, dest, setoff_date, k=5):
+    """
+    Print the k fastest journeys between two stations.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    setoff_date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    k : int, optional
+        The number of journeys. Default is 5.
+    """
+    print("Date:", setoff_date)
+    journeys = plan_journey_alternatives(start, dest, setoff_date, k)
+    if not journeys:
+        print("This journey is impossible due to disruptions on the given date")
+        return
+    stations = station_directory()
+    for i, (journey, duration) in enumerate(journeys, 1):
+        print(f"{i}. {duration:.0f} minutes: " + " > ".join(stations.name(station) for station in journey))
+
 def plot_journey(journey, save=False) -> None:
     """
     Plot a figure to visualize the journey path.
@@ -50,35 +220,22 @@ def plot_journey(journey, save=False) -> None:
         If True, the figure will be saved. Default is False.
     """
     # Obtain all stations' information.
-    stations_info = query.query_station_information("all")
-
-    # Lists for lats and lons of the stations in London tube network
-    network_lats = []
-    network_lons = []
-    for i in range(296):
-        network_lats.append(stations_info[i][2])
-        network_lons.append(stations_info[i][3])
-    
+    stations = station_directory()
+
     # Plot all the stations 
     fig, ax = plt.subplots(figsize=(7, 5))
-    ax.scatter(network_lons, network_lats, s=1, c="blue", marker="x")
+    ax.scatter(stations.longitudes, stations.latitudes, s=1, c="blue", marker="x")
     ax.set_xlabel("Longitude")
     ax.set_ylabel("Latitude")
     
     # Title of the plot
-    start_info = query.query_station_information(journey[0])
-    dest_info = query.query_station_information(journey[-1])
-    start_name = start_info[0][0]
-    dest_name = dest_info[0][0]
+    start_name = stations.name(journey[0])
+    dest_name = stations.name(journey[-1])
     ax.set_title(f"Journey from {start_name} to {dest_name}")
 
     # Draw over the network with the journey
-    journey_lats = []
-    journey_lons = []
-    for i in range(len(journey)):
-        station_num = journey[i]
-        journey_lats.append(stations_info[station_num][2])
-        journey_lons.append(stations_info[station_num][3])
+    journey_lats = stations.latitudes[journey]
+    journey_lons = stations.longitudes[journey]
     ax.plot(journey_lons, journey_lats, "ro-", markersize=2)
     
     # Save the figure if necessary
@@ -92,7 +249,7 @@ def plot_journey(journey, save=False) -> None:
     return
 
 
-def journey_planner(plot, start, dest, setoff_date):
+def journey_planner(plot, start, dest, setoff_date, astar=False, landmarks=False, interchange=None):
     """
     This function takes arguments from parser(--plot(optional) start dest setoff_date(optional, defalt is today)), 
     and visulize the journey information.
@@ -107,35 +264,385 @@ def journey_planner(plot, start, dest, setoff_date):
         The ID or name of the destination station.
     setoff_date : str
         The date of the journey in 'YYYY-MM-DD' format.
+    astar : bool, optional
+        If True, plan the journey with an A* search. Default is False.
+    landmarks : bool, optional
+        If True, plan the journey with an A* search guided by landmarks. Default is False.
+    interchange : float, optional
+        If given, plan the journey on the lines with this many minutes added for every change of line,
+        and print the line of every leg. Default is None.
     """
 
     print("Date:", setoff_date)
-    journey, duration = plan_journey(start, dest, setoff_date)
+    lines = None
+    if interchange is not None:
+        journey, lines, duration = plan_journey_lines(start, dest, setoff_date, interchange)
+    else:
+        journey, duration = plan_journey(start, dest, setoff_date, astar, landmarks)
     if journey == None:
         print("This journey is impossible due to disruptions on the given date")
         exit()  
-    print(f"Journey will take {duration:.0f} minutes.")
+    if lines is not None:
+        changes = sum(line != next_line for line, next_line in zip(lines, lines[1:]))
+        print(f"Journey will take {duration:.0f} minutes with {changes} changes.")
+    else:
+        print(f"Journey will take {duration:.0f} minutes.")
+    stations = station_directory()
     for i in range(len(journey)):
-        station_info = query.query_station_information(journey[i])
+        station_name = stations.name(journey[i])
         if i == 0:
-            print("Start:", station_info[0][0])
+            print("Start:", station_name)
         elif i == len(journey)-1:
-            print("End:", station_info[0][0])
+            print("End:", station_name)
         else:
-            print(station_info[0][0])
+            print(station_name)
+        if lines is not None and i < len(lines) and (i == 0 or lines[i] != lines[i - 1]):
+            print(f"  {'Take' if i == 0 else 'Change to'} line {lines[i]}")
 
     # Plot
     if plot:
         plot_journey(journey, plot)
 
+def reachable_stations(start, date, minutes=None):
+    """
+    Find the stations that can be reached from a start station, and how long it takes, in one search.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    minutes : float, optional
+        The time budget. If given, only stations within this many minutes are searched. Default is
+        None, which searches the whole network.
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, numpy.ndarray)
+        The duration in minutes of the journey to every station (np.inf if it cannot be reached within
+        the budget), and the previous station on that journey (-1 for the start station and unreached
+        stations). Journeys can be rebuilt with `Network.path_from_tree`.
+    """
+    start_int = station_directory().station_id(start)
+    tube_network = query.real_time_network(date)
+    return Network.shortest_path_tree(start_int, tube_network.neighbours, minutes)
+
+
+def plot_isochrone(start, durations, minutes, save=False) -> None:
+    """
+    Plot a figure of the stations that can be reached from a start station within a time budget.
+
+    Parameters
+    ----------
+    start : int
+        The ID of the start station.
+    durations : numpy.ndarray
+        The duration of the journey to every station, as returned by `reachable_stations`.
+    minutes : float
+        The time budget.
+    save : bool, optional
+        If True, the figure will be saved. Default is False.
+    """
+    stations = station_directory()
+    durations = np.asarray(durations)[:len(stations.latitudes)]
+    reached = durations <= minutes
+
+    # All stations in the background, and the reached stations coloured by duration
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.scatter(stations.longitudes, stations.latitudes, s=1, c="grey", marker="x")
+    points = ax.scatter(stations.longitudes[reached], stations.latitudes[reached], s=12,
+                        c=durations[reached], cmap="viridis_r")
+    fig.colorbar(points, ax=ax, label="Minutes")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    start_name = stations.name(start)
+    ax.set_title(f"Stations within {minutes:g} minutes of {start_name}")
+
+    if save:
+        plot_filename = f"isochrone_{start_name.replace(' ', '_')}_{minutes:g}_minutes.png"
+        plt.savefig(plot_filename)
+        print(f"Plot saved to {plot_filename}")
+    plt.show()
+
+
+def isochrone_planner(plot, start, minutes, setoff_date):
+    """
+    This function lists the stations that can be reached from a start station within a time budget,
+    and optionally plots them.
+
+    Parameters
+    ----------
+    plot : bool
+        If it is true then plot the reached stations and save as png file.
+    start : int or str
+        The ID or name of the start station.
+    minutes : float
+        The time budget in minutes.
+    setoff_date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    """
+    print("Date:", setoff_date)
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    durations, _ = reachable_stations(start_int, setoff_date, minutes)
+    reached = np.flatnonzero(durations <= minutes)
+    print(f"{len(reached)} stations within {minutes:g} minutes of {stations.name(start_int)}:")
+    for station in reached[np.argsort(durations[reached], kind="stable")]:
+        print(f"{durations[station]:4.0f}  {stations.name(station)}")
+    if plot:
+        plot_isochrone(start_int, durations, minutes, plot)
+
+
+def plan_journeys(pairs, date, workers=1):
+    """
+    Plan many journeys on the same date, building the network of the date only once.
+
+    Every start station is searched once, and journeys from the same start station reuse its
+    shortest path tree, and journeys between stations in different parts of the network are skipped
+    without searching. With one worker, results are produced as the pairs are read, so `pairs` can
+    be a stream. With more workers, all pairs are read first and the searches are spread over a pool
+    of processes that share the network through shared memory.
+
+    Parameters
+    ----------
+    pairs : iterable of tuple(int or str, int or str)
+        The IDs or names of the start and destination station of every journey.
+    date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    workers : int, optional
+        The number of processes used for the searches. Default is 1, which searches in this process;
+        0 or None uses one process per CPU.
+
+    Yields
+    ------
+    tuple of (int, int, list of int, float)
+        The start station ID, the destination station ID, the IDs of passing stations in order and the
+        duration of the journey in minutes. The path is None and the duration is np.inf if the journey
+        is impossible.
+    """
+    stations = station_directory()
+    tube_network = query.real_time_network(date)
+    if workers != 1:
+        pairs = [(stations.station_id(start), stations.station_id(dest)) for start, dest in pairs]
+        for (start_int, dest_int), (journey, duration) in zip(pairs, route_pairs(tube_network, pairs, workers)):
+            yield start_int, dest_int, journey, duration
+        return
+    components = tube_network.components
+    trees = {}
+    for start, dest in pairs:
+        start_int = stations.station_id(start)
+        dest_int = stations.station_id(dest)
+        if components[start_int] != components[dest_int]:
+            yield start_int, dest_int, None, np.inf
+            continue
+        if start_int not in trees:
+            trees[start_int] = Network.shortest_path_tree(start_int, tube_network.neighbours)
+        costs, previous_nodes = trees[start_int]
+        journey = Network.path_from_tree(start_int, dest_int, previous_nodes)
+        yield start_int, dest_int, journey, float(costs[dest_int])
+
+
+def plan_journey_range(start, dest, date_from, date_to, max_workers=16):
+    """
+    Plan the same journey on every date of a range.
+
+    The line connections are fetched once and the disruptions of all the dates at the same time. Dates
+    with the same disruptions share one network and one search.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    date_from, date_to : str
+        The first and last date of the range in 'YYYY-MM-DD' format.
+    max_workers : int, optional
+        The maximum number of disruption requests sent at the same time. Default is 16.
+
+    Returns
+    -------
+    list of tuple(str, str, list of int, float)
+        The journey as a time series: every run of consecutive dates with the same journey is given by
+        its first and last date, the IDs of passing stations in order and the duration in minutes. The
+        path is None and the duration is np.inf on dates when the journey is impossible.
+
+    Raises
+    ------
+    ValueError
+        If a date is in the wrong format or the range is empty.
+    """
+    try:
+        first_date, last_date = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    except ValueError:
+        raise ValueError("Date provided is in the wrong format. Correct format would be 'YYYY-MM-DD'")
+    if last_date < first_date:
+        raise ValueError("The last date of the range must not be before the first date.")
+    stations = station_directory()
+    start_int = stations.station_id(start)
+    dest_int = stations.station_id(dest)
+    dates = [str(first_date + timedelta(days=i)) for i in range((last_date - first_date).days + 1)]
+    fingerprints, networks = query.real_time_networks(dates, max_workers)
+    journeys = {}
+    for fingerprint, network in networks.items():
+        costs, previous_nodes = Network.shortest_path_tree(start_int, network.neighbours)
+        journeys[fingerprint] = (Network.path_from_tree(start_int, dest_int, previous_nodes), float(costs[dest_int]))
+    runs = []
+    for day, fingerprint in zip(dates, fingerprints):
+        journey, duration = journeys[fingerprint]
+        if runs and runs[-1][2:] == [journey, duration]:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day, journey, duration])
+    return [tuple(run) for run in runs]
+
+
+def range_planner(start, dest, date_from, date_to):
+    """
+    This function plans a journey on every date of a range and writes the time series to standard output
+    as CSV, one row per run of dates with the same journey.
+
+    Parameters
+    ----------
+    start : int or str
+        The ID or name of the start station.
+    dest : int or str
+        The ID or name of the destination station.
+    date_from, date_to : str
+        The first and last date of the range in 'YYYY-MM-DD' format.
+    """
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(["from", "to", "duration", "route"])
+    for first_day, last_day, journey, duration in plan_journey_range(start, dest, date_from, date_to):
+        if journey is None:
+            writer.writerow([first_day, last_day, "", ""])
+        else:
+            writer.writerow([first_day, last_day, f"{duration:g}", " ".join(map(str, journey))])
+
+
+def read_pairs(file):
+    """
+    Read the start and destination stations of journeys from a CSV file with two columns.
+
+    A first row of "start,dest" is skipped as a header.
+
+    Parameters
+    ----------
+    file : file object
+        An open CSV file, for example sys.stdin.
+
+    Yields
+    ------
+    tuple of (str, str)
+        The start and destination station of every journey.
+    """
+    for i, row in enumerate(csv.reader(file)):
+        if not row or (i == 0 and [field.strip().lower() for field in row] == ["start", "dest"]):
+            continue
+        if len(row) != 2:
+            raise ValueError(f"Line {i + 1} should have a start and a destination station: {','.join(row)}")
+        yield row[0].strip(), row[1].strip()
+
+
+def write_journeys(results, output, output_format="csv"):
+    """
+    Write planned journeys to a file as they are produced.
+
+    Parameters
+    ----------
+    results : iterable of tuple
+        The journeys, as produced by `plan_journeys`.
+    output : file object
+        An open file, for example sys.stdout.
+    output_format : str, optional
+        Either "csv", with the passing station IDs separated by spaces, or "jsonl" for one JSON object
+        per line. Default is "csv".
+    """
+    if output_format == "csv":
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["start", "dest", "duration", "route"])
+        for start, dest, journey, duration in results:
+            if journey is None:
+                writer.writerow([start, dest, "", ""])
+            else:
+                writer.writerow([start, dest, f"{duration:g}", " ".join(map(str, journey))])
+    elif output_format == "jsonl":
+        for start, dest, journey, duration in results:
+            output.write(json.dumps({"start": start, "dest": dest,
+                                     "duration": None if journey is None else duration,
+                                     "route": journey}) + "\n")
+    else:
+        raise ValueError("The output format must be 'csv' or 'jsonl'.")
+
+
+def batch_planner(batch_file, setoff_date, output_format="csv", workers=1):
+    """
+    This function plans every journey listed in a CSV file and streams the results to standard output.
+
+    Parameters
+    ----------
+    batch_file : str
+        The path of a CSV file of start and destination stations, or "-" for standard input.
+    setoff_date : str
+        The date of the journeys in 'YYYY-MM-DD' format.
+    output_format : str, optional
+        Either "csv" or "jsonl". Default is "csv".
+    workers : int, optional
+        The number of processes used for the searches. Default is 1.
+    """
+    if batch_file == "-":
+        write_journeys(plan_journeys(read_pairs(sys.stdin), setoff_date, workers), sys.stdout, output_format)
+    else:
+        with open(batch_file, newline="") as file:
+            write_journeys(plan_journeys(read_pairs(file), setoff_date, workers), sys.stdout, output_format)
+
+
 def process():
     parser = argparse.ArgumentParser(description="Journey Planner Tool")
     parser.add_argument("--plot", action="store_true", help="Generate and save a plot of the journey")
-    parser.add_argument("start", type=str, help="Start station index or name")
-    parser.add_argument("dest", type=str, help="Destination station index or name")
+    parser.add_argument("--astar", action="store_true", help="Guide the search with the straight-line distance to the destination")
+    parser.add_argument("--landmarks", action="store_true", help="Guide the search with precomputed costs to and from landmark stations")
+    parser.add_argument("--interchange", type=float, metavar="MINUTES", help="Plan on the lines, adding MINUTES for every change of line, and show the line of every leg")
+    parser.add_argument("--options", action="store_true", help="List the fastest journey for every number of changes of line")
+    parser.add_argument("--alternatives", type=int, metavar="K", help="List the K fastest journeys")
+    parser.add_argument("--offline", action="store_true", help="Use cached line and station data without contacting the web service")
+    parser.add_argument("--batch", metavar="FILE", help="Plan every start,dest pair in a CSV file ('-' for standard input)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Output format of --batch (default csv)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used by --batch (default 1, 0 for one per CPU)")
+    parser.add_argument("--range", nargs=2, metavar=("FROM", "TO"), help="Plan the journey on every date from FROM to TO (YYYY-MM-DD)")
+    parser.add_argument("--isochrone", type=float, metavar="MINUTES", help="List the stations reachable from start within MINUTES (the date can follow start)")
+    parser.add_argument("--date", help="Setoff date in YYYY-MM-DD format, for modes without positional arguments")
+    parser.add_argument("start", nargs='?', type=str, help="Start station index or name")
+    parser.add_argument("dest", nargs='?', type=str, help="Destination station index or name")
     parser.add_argument("setoff_date", nargs='?', default=str(date.today()), type=str, help="Setoff date in YYYY-MM-DD format (optional)")
     args = parser.parse_args()
-    journey_planner(args.plot, args.start, args.dest, args.setoff_date)
+    if args.offline:
+        query.configure_cache(offline=True)
+    setoff_date = args.date or args.setoff_date
+    if args.workers < 0:
+        parser.error("--workers must be 0 or more")
+    if args.batch:
+        if args.start is not None:
+            parser.error("start and dest cannot be given with --batch")
+        batch_planner(args.batch, setoff_date, args.format, args.workers)
+    elif args.isochrone is not None:
+        if args.start is None:
+            parser.error("the following arguments are required: start")
+        # The date may be given as the second positional argument
+        isochrone_planner(args.plot, args.start, args.isochrone, args.date or args.dest or args.setoff_date)
+    elif args.dest is None:
+        parser.error("the following arguments are required: start, dest")
+    elif args.range:
+        range_planner(args.start, args.dest, *args.range)
+    elif args.alternatives is not None:
+        if args.alternatives < 1:
+            parser.error("--alternatives must be 1 or more")
+        alternatives_planner(args.start, args.dest, setoff_date, args.alternatives)
+    elif args.options:
+        options_planner(args.start, args.dest, setoff_date)
+    else:
+        journey_planner(args.plot, args.start, args.dest, setoff_date, args.astar, args.landmarks, args.interchange)
 
 if __name__ == "__main__":
     process()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import numpy as np
+from .Network import Network
+from .cache import atomic_write
+
+
+def _is_exact(distances, source, rows, cols, weights):
+    """
+    Check whether the distances from a source are still the shortest path costs for a set of edges.
+
+    With positive weights the costs are the only solution of cost[source] = 0 and
+    cost[v] = min(cost[u] + weight(u, v)) over the edges (u, v) into every other node v.
+    """
+    best = np.full(len(distances), np.inf)
+    np.minimum.at(best, cols, distances[rows] + weights)
+    best[source] = 0
+    return bool(np.array_equal(best, distances))
+
+
+class LandmarkIndex:
+    """
+    The shortest path costs from and to a few landmark stations, used to bound the cost of any journey
+    by the triangle inequality (ALT: A*, landmarks and triangle inequality).
+
+    Parameters
+    ----------
+    landmarks : numpy.ndarray
+        The indices of the k landmark nodes.
+    from_landmarks : numpy.ndarray
+        A (k, n_nodes) array of the cost from every landmark to every node (np.inf if unreachable).
+    to_landmarks : numpy.ndarray
+        A (k, n_nodes) array of the cost from every node to every landmark (np.inf if unreachable).
+    """
+    def __init__(self, landmarks, from_landmarks, to_landmarks):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.from_landmarks = np.asarray(from_landmarks, dtype=float)
+        self.to_landmarks = np.asarray(to_landmarks, dtype=float)
+
+    def bounds(self, dest_node):
+        """
+        Return a lower bound on the cost from every node to a destination, for A* searches.
+
+        For a landmark L, d(v, dest) >= d(v, L) - d(dest, L) and d(v, dest) >= d(L, dest) - d(L, v);
+        the bound is the largest of these over all landmarks.
+
+        Parameters
+        ----------
+        dest_node : int
+            The index of the destination node.
+
+        Returns
+        -------
+        numpy.ndarray
+            The bound for every node. It is np.inf for nodes that cannot reach the destination according
+            to the landmarks, and never overestimates the cost on the network the index was built for.
+        """
+        with np.errstate(invalid="ignore"):
+            to_bounds = self.to_landmarks - self.to_landmarks[:, [dest_node]]
+            from_bounds = self.from_landmarks[:, [dest_node]] - self.from_landmarks
+        # inf - inf means both nodes are cut off from the landmark, which tells nothing
+        bounds = np.fmax(np.nan_to_num(to_bounds, nan=0.0, posinf=np.inf, neginf=0.0),
+                         np.nan_to_num(from_bounds, nan=0.0, posinf=np.inf, neginf=0.0))
+        return np.maximum(bounds.max(axis=0, initial=0), 0)
+
+    def refresh(self, network):
+        """
+        Return the index of the same landmarks on another version of the network, such as the network
+        of a disruption day.
+
+        Only the landmarks whose costs changed are searched again. Delays only make connections slower,
+        so the index of the undisrupted network is still a valid (looser) bound before it is refreshed.
+
+        Parameters
+        ----------
+        network : Network or numpy.ndarray
+            The network to refresh the index for, with the same number of nodes.
+
+        Returns
+        -------
+        LandmarkIndex
+            The refreshed index.
+        """
+        network = Network.as_network(network)
+        rows, cols, weights = network.edges()
+        from_landmarks = self.from_landmarks.copy()
+        to_landmarks = self.to_landmarks.copy()
+        for i, landmark in enumerate(self.landmarks):
+            if not _is_exact(from_landmarks[i], landmark, rows, cols, weights):
+                from_landmarks[i] = Network.shortest_path_tree(landmark, network.neighbours)[0]
+            if not _is_exact(to_landmarks[i], landmark, cols, rows, weights):
+                to_landmarks[i] = Network.shortest_path_tree(landmark, network.reverse_neighbours)[0]
+        return LandmarkIndex(self.landmarks.copy(), from_landmarks, to_landmarks)
+
+    def save(self, path):
+        """
+        Store the index in a `.npz` file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        """
+        atomic_write(path, lambda file: np.savez(file, landmarks=self.landmarks, from_landmarks=self.from_landmarks,
+                                                 to_landmarks=self.to_landmarks))
+
+    def load(path):
+        """
+        Load an index stored with `LandmarkIndex.save`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        LandmarkIndex or None
+            The stored index, or None if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return LandmarkIndex(data["landmarks"], data["from_landmarks"], data["to_landmarks"])
+
+
+def build_landmarks(network, k=8):
+    """
+    This function selects k landmarks of a network and computes the costs from and to each of them.
+
+    The landmarks are chosen by farthest-point selection: each new landmark is the connected node whose
+    cost from the closest landmark chosen so far is the largest, which spreads them around the edge of
+    the network where their bounds are tightest.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        The network, or its adjacency matrix.
+    k : int, optional
+        The number of landmarks. Default is 8.
+
+    Returns
+    -------
+    LandmarkIndex
+        The landmark index of the network.
+    """
+    network = Network.as_network(network)
+    rows, cols, _ = network.edges()
+    candidates = np.zeros(network.n_nodes, dtype=bool)
+    candidates[rows] = candidates[cols] = True
+    k = min(k, int(candidates.sum()))
+    landmarks, from_landmarks, to_landmarks = [], [], []
+    if k == 0:
+        empty = np.empty((0, network.n_nodes))
+        return LandmarkIndex([], empty, empty)
+    # Start from the node farthest from the first connected node, rather than from the node itself
+    nearest = Network.shortest_path_tree(int(np.argmax(candidates)), network.neighbours)[0]
+    for _ in range(k):
+        # Nodes that no landmark reaches yet are the farthest of all
+        landmark = int(np.argmax(np.where(candidates, nearest, -1)))
+        landmarks.append(landmark)
+        from_landmarks.append(Network.shortest_path_tree(landmark, network.neighbours)[0])
+        to_landmarks.append(Network.shortest_path_tree(landmark, network.reverse_neighbours)[0])
+        nearest = from_landmarks[-1] if len(landmarks) == 1 else np.minimum(nearest, from_landmarks[-1])
+        candidates[landmark] = False
+    return LandmarkIndex(landmarks, np.array(from_landmarks), np.array(to_landmarks))
@@ -0,0 +1,231 @@
+import heapq
+import numpy as np
+from .Network import Network
+
+
+class LayeredNetwork:
+    """
+    The connections of every line kept side by side, so that routes can tell which line every leg
+    uses and count the changes between lines.
+
+    The network keeps one list of edges for the whole network and a compact (lines x edges) array of
+    weights: entry [line, edge] is the travel time of the edge on the line, or 0 if the line does not
+    run along it.
+
+    Parameters
+    ----------
+    n_nodes : int
+        The number of nodes in the network.
+    rows, cols : numpy.ndarray of int
+        The start and end node of every edge, each edge listed once.
+    weights : numpy.ndarray
+        The (lines x edges) array of travel times.
+    """
+    def __init__(self, n_nodes, rows, cols, weights):
+        self.n_nodes = n_nodes
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=float).reshape(-1, len(self.rows))
+        self.n_lines = len(self.weights)
+        self._keys = self.rows * n_nodes + self.cols
+        self._network = None
+        self._line_neighbours = None
+        self._line_tables = None
+
+    def from_line_edges(n_nodes, n_lines, lines, rows, cols, weights):
+        """
+        Build a layered network from the edges of every line.
+
+        Edges with a weight of 0 are treated as absent, and where the same edge is listed more than once
+        on a line the lowest weight is kept.
+
+        Parameters
+        ----------
+        n_nodes : int
+            The number of nodes in the network.
+        n_lines : int
+            The number of lines.
+        lines, rows, cols : numpy.ndarray of int
+            The line, start node and end node of every edge.
+        weights : numpy.ndarray of float
+            The weight of every edge.
+
+        Returns
+        -------
+        LayeredNetwork
+            A new LayeredNetwork object.
+        """
+        lines = np.asarray(lines, dtype=np.int64)
+        keys = np.asarray(rows, dtype=np.int64) * n_nodes + np.asarray(cols, dtype=np.int64)
+        weights = np.asarray(weights, dtype=float)
+        present = weights > 0
+        unique_keys, inverse = np.unique(keys[present], return_inverse=True)
+        layered = np.full((n_lines, len(unique_keys)), np.inf)
+        np.minimum.at(layered, (lines[present], inverse), weights[present])
+        layered[layered == np.inf] = 0
+        rows, cols = np.divmod(unique_keys, n_nodes)
+        return LayeredNetwork(n_nodes, rows, cols, layered)
+
+    @property
+    def network(self):
+        """
+        The lines merged into one CSR-backed network, keeping the fastest line of every connection,
+        computed on first use. Queries that do not need to know the lines should use it.
+        """
+        if self._network is None:
+            self._network = Network.from_edges(self.n_nodes, np.tile(self.rows, self.n_lines),
+                                               np.tile(self.cols, self.n_lines), self.weights.ravel())
+        return self._network
+
+    @property
+    def line_neighbours(self):
+        """
+        The neighbour, line and weight of every connection out of every node, computed on first use.
+        """
+        if self._line_neighbours is None:
+            lines, edges = np.nonzero(self.weights)
+            order = np.argsort(self.rows[edges], kind="stable")
+            lines, edges = lines[order], edges[order]
+            self._line_neighbours = [[] for _ in range(self.n_nodes)]
+            for row, col, line, weight in zip(self.rows[edges].tolist(), self.cols[edges].tolist(),
+                                              lines.tolist(), self.weights[lines, edges].tolist()):
+                self._line_neighbours[row].append((col, line, weight))
+        return self._line_neighbours
+
+    @property
+    def line_tables(self):
+        """
+        The stations of every line, and the shortest travel times and next hops between them along the
+        line (see `Network.all_pairs`), indexed by position in the stations, computed on first use.
+        """
+        if self._line_tables is None:
+            self._line_tables = []
+            for weights in self.weights:
+                present = weights > 0
+                n_edges = int(present.sum())
+                stations, positions = np.unique(np.r_[self.rows[present], self.cols[present]], return_inverse=True)
+                line_network = Network.from_edges(len(stations), positions[:n_edges], positions[n_edges:], weights[present])
+                self._line_tables.append((stations, *line_network.all_pairs()))
+        return self._line_tables
+
+    def lines_of(self, path):
+        """
+        Find the line of every leg of a path with the fewest changes, using only lines that run each leg
+        in its fastest time.
+
+        Parameters
+        ----------
+        path : list of int
+            The indices of the nodes along the path, for example a path found on `network`.
+
+        Returns
+        -------
+        list of int
+            The line of every leg, one fewer than the nodes of the path.
+
+        Raises
+        ------
+        ValueError
+            If two consecutive nodes of the path are not connected.
+        """
+        path = np.asarray(path, dtype=np.int64)
+        leg_keys = path[:-1] * self.n_nodes + path[1:]
+        positions = np.minimum(np.searchsorted(self._keys, leg_keys), max(len(self._keys) - 1, 0))
+        if len(leg_keys) and (len(self._keys) == 0 or np.any(self._keys[positions] != leg_keys)):
+            raise ValueError("Error: The path uses a connection that is not in the network.")
+        leg_weights = np.where(self.weights[:, positions] > 0, self.weights[:, positions], np.inf)
+        fastest = leg_weights == leg_weights.min(axis=0)
+
+        # The fewest changes needed to ride every leg so far, ending on each line
+        changes = np.where(fastest[:, 0], 0, np.inf) if len(leg_keys) else np.zeros(self.n_lines)
+        previous_lines = np.zeros(fastest.shape, dtype=np.int64)
+        for leg in range(1, len(leg_keys)):
+            best_line = int(np.argmin(changes))
+            stay = changes <= changes[best_line] + 1
+            previous_lines[:, leg] = np.where(stay, np.arange(self.n_lines), best_line)
+            changes = np.where(fastest[:, leg], np.where(stay, changes, changes[best_line] + 1), np.inf)
+        lines = [int(np.argmin(changes))] if len(leg_keys) else []
+        for leg in range(len(leg_keys) - 1, 0, -1):
+            lines.append(int(previous_lines[lines[-1], leg]))
+        lines.reverse()
+        return lines
+
+    def shortest_path(self, start_node, dest_node, interchange_penalty=0):
+        """
+        Compute the fastest path between a start and destination node, and the line of every leg, when
+        every change of line costs an extra penalty.
+
+        The search runs over pairs of a node and the line it is reached on. Without a penalty, the path is
+        found on the merged `network` instead, and `lines_of` picks its lines.
+
+        Parameters
+        ----------
+        start_node : int
+            The index of the start node.
+        dest_node : int
+            The index of the destination node.
+        interchange_penalty : float, optional
+            The cost added for every change of line. Default is 0.
+
+        Returns
+        -------
+        Tuple[List[int], List[int], float] or None
+            A tuple containing the path as a list of node indices, the line of every leg, and the travel
+            time of the path, without the penalties.
+
+            If no path exists, this function returns None and prints "No possible paths."
+        """
+        start_node = int(start_node)
+        dest_node = int(dest_node)
+        network = self.network
+        if not interchange_penalty:
+            result = Network.shortest_path(start_node, dest_node, network.neighbours, network.components)
+            if result is None:
+                return None
+            path, duration = result
+            return path, self.lines_of(path), duration
+        if network.components[start_node] != network.components[dest_node]:
+            print("No possible paths.")
+            return None
+
+        # The state of a node reached on a line is node * (n_lines + 1) + line; line n_lines is the start
+        width = self.n_lines + 1
+        line_neighbours = self.line_neighbours
+        cost = [np.inf] * (self.n_nodes * width)
+        duration = [0] * (self.n_nodes * width)
+        previous_state = [None] * (self.n_nodes * width)
+        settled = [False] * (self.n_nodes * width)
+        start_state = start_node * width + self.n_lines
+        cost[start_state] = 0
+        queue = [(0, start_state)]
+        while queue:
+            state_cost, state = heapq.heappop(queue)
+            if settled[state]:
+                continue
+            settled[state] = True
+            node, line = divmod(state, width)
+            if node == dest_node:
+                break
+            for neighbour, neighbour_line, weight in line_neighbours[node]:
+                proposed_cost = state_cost + weight
+                if neighbour_line != line and line != self.n_lines:
+                    proposed_cost += interchange_penalty
+                neighbour_state = neighbour * width + neighbour_line
+                if proposed_cost < cost[neighbour_state]:
+                    cost[neighbour_state] = proposed_cost
+                    duration[neighbour_state] = duration[state] + weight
+                    previous_state[neighbour_state] = state
+                    heapq.heappush(queue, (proposed_cost, neighbour_state))
+        else:
+            print("No possible paths.")
+            return None
+
+        path, lines = [dest_node], []
+        travel_time = duration[state]
+        while state != start_state:
+            lines.append(state % width)
+            state = previous_state[state]
+            path.append(state // width)
+        path.reverse()
+        lines.reverse()
+        return path, lines, travel_time
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .Network import Network
+
+
+class SharedNetwork:
+    """
+    The CSR arrays of a network copied into shared memory, so that worker processes can read the
+    network without it being pickled for every task.
+
+    Use it as a context manager; the shared memory is released when the block exits.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        A dense or CSR-backed network, or an adjacency matrix.
+    """
+    def __init__(self, network):
+        network = Network.as_network(network)
+        self.n_nodes = network.n_nodes
+        self.layout = []
+        self._blocks = []
+        try:
+            for array in network.csr:
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+                self.layout.append((block.name, array.shape, array.dtype.str))
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the shared memory. Workers must not use the network afterwards."""
+        blocks, self._blocks = self._blocks, []
+        for block in blocks:
+            try:
+                block.close()
+            finally:
+                block.unlink()
+
+
+# The network (and targets) of a worker process, set up once by `_attach_network`
+_worker_neighbours = None
+_worker_targets = None
+
+
+def _attach_network(n_nodes, layout, targets=None):
+    """Pool initializer: build the neighbour lists of this worker from the shared CSR arrays."""
+    global _worker_neighbours, _worker_targets
+    _worker_targets = targets
+    blocks = []
+    try:
+        for name, _, _ in layout:
+            blocks.append(shared_memory.SharedMemory(name=name))
+        indptr, indices, weights = [np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+                                    for block, (_, shape, dtype) in zip(blocks, layout)]
+        _worker_neighbours = Network.neighbour_lists(Network(n_nodes, indptr=indptr, indices=indices, weights=weights))
+    finally:
+        # The neighbour lists are copies, so the worker closes its mappings at once and none is still
+        # open when the parent unlinks the shared memory
+        indptr = indices = weights = None
+        for block in blocks:
+            block.close()
+
+
+def _route_group(task):
+    """Run one single-source search and rebuild the paths to every destination of the group."""
+    start_node, dest_nodes = task
+    costs, previous_nodes = Network.shortest_path_tree(start_node, _worker_neighbours)
+    return [(Network.path_from_tree(start_node, dest_node, previous_nodes), float(costs[dest_node]))
+            for dest_node in dest_nodes]
+
+
+def route_pairs(network, pairs, workers=None):
+    """
+    This function finds the shortest paths between many pairs of nodes using a pool of processes.
+
+    The pairs are grouped by start node and every group is routed with one single-source search,
+    so each start node is searched only once. Pairs in different components of the network are
+    answered without searching, and the pool is not started if no pair is left. The network is placed
+    in shared memory once for the whole pool.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        A dense or CSR-backed network, or an adjacency matrix.
+    pairs : iterable of tuple(int, int)
+        The start and destination node of every path.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    Returns
+    -------
+    list of tuple(list of int, float)
+        The path and cost of every pair, in the order of `pairs`. The path is None and the cost is
+        np.inf if the destination cannot be reached.
+    """
+    workers = workers or os.cpu_count() or 1
+    network = Network.as_network(network)
+    components = network.components
+    groups = {}
+    n_pairs = 0
+    for start_node, dest_node in pairs:
+        if components[start_node] == components[dest_node]:
+            groups.setdefault(int(start_node), []).append((n_pairs, int(dest_node)))
+        n_pairs += 1
+    results = [(None, np.inf)] * n_pairs
+    if not groups:
+        return results
+    tasks = [(start_node, [dest_node for _, dest_node in group]) for start_node, group in groups.items()]
+    # A few chunks per worker balance the load without sending every group on its own
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with SharedNetwork(network) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_attach_network,
+                                initargs=(shared.n_nodes, shared.layout)) as pool:
+        for group, routes in zip(groups.values(), pool.map(_route_group, tasks, chunksize=chunksize)):
+            for (i, _), route in zip(group, routes):
+                results[i] = route
+    return results
+
+
+def _target_cost_row(start_node):
+    """Run one multi-target search to the targets of the pool."""
+    return Network.target_costs(start_node, _worker_targets, _worker_neighbours)
+
+
+def target_cost_rows(network, sources, targets, workers=None):
+    """
+    This function computes the shortest costs from many source nodes to many target nodes using a pool
+    of processes, one multi-target search per source.
+
+    Parameters
+    ----------
+    network : Network or numpy.ndarray
+        A dense or CSR-backed network, or an adjacency matrix.
+    sources : list of int
+        The indices of the source nodes.
+    targets : list of int
+        The indices of the target nodes.
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    Returns
+    -------
+    numpy.ndarray
+        The len(sources) x len(targets) matrix of shortest costs (np.inf where there is no path).
+    """
+    workers = workers or os.cpu_count() or 1
+    sources = [int(source) for source in sources]
+    targets = [int(target) for target in targets]
+    costs = np.full((len(sources), len(targets)), np.inf)
+    if not sources or not targets:
+        return costs
+    chunksize = max(1, len(sources) // (4 * workers))
+    with SharedNetwork(network) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_attach_network,
+                                initargs=(shared.n_nodes, shared.layout, targets)) as pool:
+        for i, row in enumerate(pool.map(_target_cost_row, sources, chunksize=chunksize)):
+            costs[i] = row
+    return costs
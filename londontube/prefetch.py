@@ -0,0 +1,18 @@
+import argparse
+from . import query
+
+
+def process():
+    parser = argparse.ArgumentParser(description="Download the disruptions of every date for offline journey planning")
+    parser.add_argument("--from", dest="date_from", default="2023-01-01", help="First date in YYYY-MM-DD format (default 2023-01-01)")
+    parser.add_argument("--to", dest="date_to", default="2024-12-31", help="Last date in YYYY-MM-DD format (default 2024-12-31)")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum number of requests sent at the same time (default 8)")
+    parser.add_argument("--refresh", action="store_true", help="Download dates that are already stored again")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    calendar = query.prefetch_disruptions(args.date_from, args.date_to, args.workers, args.refresh)
+    print(f"Disruptions of {len(calendar)} dates stored in {query.cache.directory}")
+
+if __name__ == "__main__":
+    process()
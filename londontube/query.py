@@ -1,12 +1,200 @@
 import requests
-from datetime import date
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import csv
+import os
 from io import StringIO
 import numpy as np
 from .Network import Network
+from .cache import TopologyCache, NetworkCache, AllPairsStore, DisruptionCalendar, disruption_fingerprint
+from .disruptions import BaselineNetwork, compile_disruptions
+from .dynamic import DynamicShortestPathTrees
+from .hierarchy import ContractionHierarchy, build_hierarchy
+from .landmarks import LandmarkIndex, build_landmarks
 
+# Base URL of the London tube web service
+SERVICE_URL = "https://rse-with-python.arc.ucl.ac.uk/londontube-service"
 
 
+class ServiceClient:
+    """
+    A client for the London tube web service that keeps a pool of open connections.
+
+    Parameters
+    ----------
+    base_url : str, optional
+        The base URL of the web service. Default is `SERVICE_URL`.
+    timeout : float or tuple of (float, float), optional
+        The connect and read timeouts of every request in seconds. Default is (3.05, 10).
+    retries : int, optional
+        The number of times a failed connection or a 502/503/504 response is retried. Default is 3.
+    backoff_factor : float, optional
+        The exponential backoff between retries, in seconds. Default is 0.3.
+    pool_size : int, optional
+        The maximum number of connections kept open. Default is 16.
+    """
+    def __init__(self, base_url=SERVICE_URL, timeout=(3.05, 10), retries=3, backoff_factor=0.3, pool_size=16):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(502, 503, 504),
+                      allowed_methods=("GET",), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path, headers=None):
+        """
+        Make a GET request to the web service.
+
+        Parameters
+        ----------
+        path : str
+            The path and query string of the request, relative to the base URL.
+        headers : dict, optional
+            Extra headers to send with the request.
+
+        Returns
+        -------
+        requests.Response
+            The response of the web service.
+
+        Raises
+        ------
+        ConnectionError
+            If the web service cannot be reached or does not respond in time.
+        """
+        try:
+            return self.session.get(f"{self.base_url}/{path}", timeout=self.timeout, headers=headers)
+        except requests.Timeout:
+            raise ConnectionError("The web service did not respond in time.")
+        except requests.ConnectionError as error:
+            # Read timeouts that exhaust the retries are reported as connection errors
+            if error.args and isinstance(getattr(error.args[0], "reason", None), ReadTimeoutError):
+                raise ConnectionError("The web service did not respond in time.")
+            raise ConnectionError("No internet connection. Please check your network.")
+
+
+# The client shared by all the queries of this module
+client = ServiceClient()
+
+
+def configure_client(**kwargs):
+    """
+    This function replaces the client shared by all the queries of this module.
+
+    Parameters
+    ----------
+    **kwargs
+        The arguments of `ServiceClient`, for example `base_url` to point at a local copy of the service.
+
+    Returns
+    -------
+    ServiceClient
+        The new shared client.
+    """
+    global client
+    client = ServiceClient(**kwargs)
+    return client
+
+
+# The on-disk cache of line connections and station information
+cache = TopologyCache()
+
+
+def configure_cache(**kwargs):
+    """
+    This function replaces the on-disk cache used for line connections and station information.
+
+    Parameters
+    ----------
+    **kwargs
+        The arguments of `TopologyCache`, for example `offline=True` to never contact the web service.
+
+    Returns
+    -------
+    TopologyCache
+        The new cache.
+    """
+    global cache
+    cache = TopologyCache(**kwargs)
+    return cache
+
+
+# The built networks of recent dates, shared by dates with the same disruptions
+network_cache = NetworkCache()
+
+
+def configure_network_cache(max_size=32):
+    """
+    This function replaces the in-memory cache of built networks.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum number of networks kept in memory. Default is 32.
+
+    Returns
+    -------
+    NetworkCache
+        The new cache.
+    """
+    global network_cache
+    network_cache = NetworkCache(max_size)
+    return network_cache
+
+
+# The landmark indexes and contraction hierarchies of recent dates, shared by dates with the same disruptions
+landmark_cache = NetworkCache(max_size=8)
+hierarchy_cache = NetworkCache(max_size=8)
+
+
+def _date_disruptions(date, disruptions=None):
+    """The disruptions of a date, fetched unless they are given."""
+    if disruptions is None:
+        disruptions = query_disruptions(date)
+        if disruptions is None:
+            raise ValueError(f"Error: Unable to fetch disruption information for {date}.")
+    return disruptions
+
+
+def _artifact_directory(folder):
+    """The folder of the cache directory for results computed from the current lines."""
+    return os.path.join(cache.directory, folder, baseline_network().version)
+
+
+def _modified_time(path):
+    """The modification time of a file in nanoseconds, or None if it does not exist."""
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+# The prefetched disruptions in the cache directory, with the path and modification time they were loaded from
+_calendar = (None, None, None)
+
+
+def disruption_calendar():
+    """
+    This function returns the disruptions prefetched with `prefetch_disruptions`, loading them on first use.
+
+    Returns
+    -------
+    DisruptionCalendar or None
+        The calendar stored as "disruptions.npz" in the cache directory, or None if nothing has been
+        prefetched or the cache is disabled. The file is loaded again when it changes or is removed,
+        for example by `TopologyCache.clear`.
+    """
+    global _calendar
+    if not cache.enabled:
+        return None
+    path = os.path.join(cache.directory, "disruptions.npz")
+    modified = _modified_time(path)
+    if _calendar[:2] != (path, modified):
+        _calendar = (path, modified, DisruptionCalendar.load(path))
+    return _calendar[2]
+
 
 def query_line_connections(line_identifier):
     """This function takes the line identifier, quering the web service for information 
@@ -34,39 +222,60 @@ def query_line_connections(line_identifier):
     if not 0 <= line_identifier <= 11:
         raise ValueError("Line ID must be in the range 0 to 11")
     
-    # Check internet connection
-    try:
-        requests.get("https://www.google.com", timeout=5)
-    except requests.ConnectionError:
-        raise ConnectionError("No internet connection. Please check your network.")
+    # Line connections rarely change, so use the local copy while it is fresh
+    cache_name = f"line-{line_identifier}"
+    entry = cache.lookup(cache_name)
+    if entry is not None and entry.fresh:
+        return line_network_from_arrays(entry.arrays)
 
     # Make a request to the web service to get line connections
-    url = f"https://rse-with-python.arc.ucl.ac.uk/londontube-service/line/query?line_identifier={line_identifier}"
-    response = requests.get(url)
+    response = client.get(f"line/query?line_identifier={line_identifier}", headers=cache.validators(entry))
 
-    # Init a adjacency matrix with 296x296 (296 stations in London tube network)
-    adjacency = np.zeros((296,296))
-
-    if response.status_code == 200:
+    if response.status_code == 304 and entry is not None:
+        # The local copy is still valid
+        cache.revalidated(cache_name)
+        return line_network_from_arrays(entry.arrays)
+    elif response.status_code == 200:
         # Parse CSV data from the response
         csv_data = StringIO(response.text)
         reader = csv.reader(csv_data)
 
-        # Process each row in the CSV data  
+        # Collect the connections in both directions (296 stations in London tube network)
+        rows, cols, times = [], [], []
         for row in reader:
-            station1_index, station2_index, travel_time = map(int, row)           
-            # Fill the matrix by using station index
-            adjacency[station1_index, station2_index] = travel_time
-            adjacency[station2_index, station1_index] = travel_time
-        
-        # Create a Network object for the line
-        line_network = Network(len(adjacency), adjacency)
+            station1_index, station2_index, travel_time = map(int, row)
+            rows += [station1_index, station2_index]
+            cols += [station2_index, station1_index]
+            times += [travel_time, travel_time]
+
+        # Create a CSR-backed Network object for the line
+        line_network = Network.from_edges(296, rows, cols, times)
+        indptr, indices, weights = line_network.csr
+        cache.store(cache_name, response.headers.get("ETag"), indptr=indptr.astype(np.int32),
+                    indices=indices.astype(np.int16), weights=weights.astype(np.float32))
         return line_network
     else:
         # No informaiton for given line 
         raise ValueError(f"Error: Unable to fetch line connections for {line_identifier}.")
 
 
+def line_network_from_arrays(arrays):
+    """
+    This function rebuilds the network of a line from the arrays kept in the cache.
+
+    Parameters
+    ----------
+    arrays : dict of numpy.ndarray
+        The "indptr", "indices" and "weights" arrays of the line network in CSR form.
+
+    Returns
+    -------
+    Network
+        A CSR-backed network object of the line.
+    """
+    return Network(296, indptr=arrays["indptr"], indices=arrays["indices"], weights=arrays["weights"])
+
+
 def query_station_information(ids):
     """
     This function takes the station ID and queries the web service for station information.
@@ -90,27 +299,54 @@ def query_station_information(ids):
         # 296 stations in total. Index from 0 to 195
         if not 0 <= ids <= 295:
             raise ValueError("Line ID must be in the range 0 to 295")
-    
-    # Check internet connction
-    try:
-        requests.get("https://www.google.com", timeout=5)
-    except requests.ConnectionError:
-        raise ConnectionError("No internet connection. Please check your network.")
-    
+
+    # The table of all stations rarely changes, so use the local copy while it is fresh
+    entry = cache.lookup("stations") if ids == "all" else None
+    if entry is not None and entry.fresh:
+        return station_data_from_arrays(entry.arrays)
+
     # Make a request to the web service to get station information
-    url = f"https://rse-with-python.arc.ucl.ac.uk/londontube-service/stations/query?id={ids}"
-    response = requests.get(url)
+    response = client.get(f"stations/query?id={ids}", headers=cache.validators(entry))
 
-    if response.status_code == 200:
+    if response.status_code == 304 and entry is not None:
+        # The local copy is still valid
+        cache.revalidated("stations")
+        return station_data_from_arrays(entry.arrays)
+    elif response.status_code == 200:
         # Parse the CSV response
         csv_data = response.text.strip()
         station_info_matrix = parse_station_data(csv_data)
 
+        if ids == "all" and station_info_matrix:
+            names, station_ids, lats, lons = zip(*station_info_matrix)
+            cache.store("stations", response.headers.get("ETag"), names=np.array(names),
+                        ids=np.array(station_ids, dtype=np.int16), latitudes=np.array(lats),
+                        longitudes=np.array(lons))
         return station_info_matrix
     else:
         # No informaiton for given station
         raise ValueError(f"Error: Unable to fetch station information for {ids}.")
 
+
+def station_data_from_arrays(arrays):
+    """
+    This function rebuilds the station information list from the arrays kept in the cache.
+
+    Parameters
+    ----------
+    arrays : dict of numpy.ndarray
+        The "names", "ids", "latitudes" and "longitudes" arrays of the stations.
+
+    Returns
+    -------
+    list
+        A list of station information, formatted as [[name, ID, latitude, longitude]...].
+    """
+    return [[str(name), int(station_id), float(lat), float(lon)]
+            for name, station_id, lat, lon in zip(arrays["names"], arrays["ids"],
+                                                   arrays["latitudes"], arrays["longitudes"])]
+
+
 def query_station_num(station_name):
     """
     This function takes the name of a station and returns its station ID.
@@ -129,15 +365,8 @@ def query_station_num(station_name):
     if not isinstance(station_name, str):
         raise TypeError("The station name must be an string.")
     
-    # Check internet connection
-    try:
-        requests.get("https://www.google.com", timeout=5)
-    except requests.ConnectionError:
-        raise ConnectionError("No internet connection. Please check your network.")
-    
     # Make a request to the web service to get station information
-    url = f"https://rse-with-python.arc.ucl.ac.uk/londontube-service/stations/query?id={station_name}"
-    response = requests.get(url)
+    response = client.get(f"stations/query?id={station_name}")
 
     if response.status_code == 200:
         # Parse the CSV response
@@ -194,6 +423,8 @@ def query_disruptions(date_str=None):
     """
     This function takes a date and queries the web service for service disruptions.
 
+    Dates stored by `prefetch_disruptions` are answered without contacting the web service.
+
     Parameters
     ----------
     date_str : str, optional
@@ -220,15 +451,18 @@ def query_disruptions(date_str=None):
 
         if not valid_start_date <= provided_date <= valid_end_date:
             raise ValueError("Provided date outside the valid range. Valid range is from 2023-1-1 to 2024-12-31")
-    # Check internet connection
-    try:
-        requests.get("https://www.google.com", timeout=5)
-    except requests.ConnectionError:
-        raise ConnectionError("No internet connection. Please check your network.")
+    # Prefetched disruptions are answered without contacting the web service
+    calendar = disruption_calendar()
+    disruptions = None if calendar is None else calendar.get(date_str)
+    if disruptions is not None:
+        return disruptions
+    return _fetch_disruptions(date_str)
+
 
+def _fetch_disruptions(date_str):
+    """Fetch the disruptions of a date from the web service, or print an error and return None."""
     # Make a request to the web service to get disruption information
-    url = f"https://rse-with-python.arc.ucl.ac.uk/londontube-service/disruptions/query?date={date_str}"
-    response = requests.get(url)
+    response = client.get(f"disruptions/query?date={date_str}")
 
     if response.status_code == 200:
         disruptions_data = response.json()
@@ -267,47 +501,393 @@ def parse_disruptions_data(disruptions_data):
 
     return disruptions_ls
 
-def real_time_network(date):
+def apply_disruptions(line_network, line_identifier, disruptions):
+    """
+    This function applies the disruptions of a date to the network of one line, in place, one
+    disruption at a time. `real_time_network` applies them to all lines at once with
+    `BaselineNetwork.apply`, which gives the same result.
+
+    Parameters
+    ----------
+    line_network : Network
+        The network of the line, as returned by `query_line_connections`.
+    line_identifier : int
+        The ID of the line.
+    disruptions : list
+        The disruptions of the date, as returned by `query_disruptions`.
+
+    Returns
+    -------
+    Network
+        The same line network with the delays applied.
+    """
+    for j in range(len(disruptions)):
+        # For single line
+        # Disruption format [[line_idx [station1 station2] delay] x n].
+        if disruptions[j][0] == line_identifier or disruptions[j][0] is None:
+            # Disruption between two stations
+            if len(disruptions[j][1]) == 2:
+                station1 = disruptions[j][1][0]
+                station2 = disruptions[j][1][1]
+                delay = disruptions[j][2]
+                # A delay to the direct connection between two stations
+                line_network.scale_edge(station1, station2, delay)
+            # Disruption for 1 station
+            else:
+                # A delay to all journeys through the station
+                delay = disruptions[j][2]
+                for station in disruptions[j][1]:
+                    line_network.scale_node(station, delay)
+    return line_network
+
+
+_baseline = None
+
+
+def baseline_network(max_workers=12, refresh=False):
+    """
+    This function returns the undisrupted connections of all 12 lines, fetching them on first use.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        The maximum number of lines fetched at the same time. Default is 12, i.e. all of them.
+    refresh : bool, optional
+        If True, fetch the lines again instead of reusing the ones kept in memory. Default is False.
+        Networks built from the previous lines are removed from `network_cache`, and results stored in
+        the cache directory are not used any more if the lines changed (see `BaselineNetwork.version`).
+
+    Returns
+    -------
+    BaselineNetwork
+        The undisrupted connections of every line.
+    """
+    global _baseline
+    if _baseline is None or refresh:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            line_futures = [executor.submit(query_line_connections, i) for i in range(12)]
+            try:
+                line_networks = [future.result() for future in line_futures]
+            except BaseException:
+                # Do not start any request that is still queued
+                for future in line_futures:
+                    future.cancel()
+                raise
+        _baseline = BaselineNetwork(line_networks)
+        # Networks built from other lines must not be served any more
+        network_cache.invalidate()
+        landmark_cache.invalidate()
+        hierarchy_cache.invalidate()
+    return _baseline
+
+
+def real_time_network(date, max_workers=12, disruptions=None):
     """
     This function takes a date and returns the real-time London tube network on that day.
 
+    The disruptions are fetched while the undisrupted lines are loaded (see `baseline_network`), then
+    compiled into index arrays and applied to all the lines in one pass. Built networks are kept in
+    `network_cache`, so dates with the same disruptions share one Network object, which must not be
+    modified.
+
     Parameters
     ----------
     date : str
         A date in the format 'YYYY-MM-DD'. For example, "2023-12-15".
+    max_workers : int, optional
+        The maximum number of lines fetched at the same time. Default is 12, i.e. all of them.
+    disruptions : list, optional
+        The disruptions of the date, if they were already fetched with `query_disruptions`. Default is
+        None, which fetches them.
 
     Returns
     -------
     Network
         A Network object representing the London tube network on the specified date.
+
+    Raises
+    ------
+    ValueError
+        If the disruptions or the connections of a line could not be fetched.
+    ConnectionError
+        If there is no internet connection.
     """
-    disruptions = query_disruptions(date)
-    # Init network
-    adjacency = np.zeros((296,296))
-    real_time_network = Network(296, adjacency)
-    for i in range(12):
-        # Network of a particular line
-        line_network = query_line_connections(i)
-        for j in range(len(disruptions)):
-            # For single line
-            # Disruption format [[line_idx [station1 station2] delay] x n].
-            if disruptions[j][0] == i or disruptions[j][0] is None:
-                # Disruption between two stations
-                if len(disruptions[j][1]) == 2:
-                    station1 = disruptions[j][1][0]
-                    station2 = disruptions[j][1][1]
-                    delay = disruptions[j][2]
-                    # A delay to the direct connection between two stations
-                    line_network.adjacency_matrix[station1,station2] *= delay
-                # Disruption for 1 station
-                else:
-                    station = disruptions[j][1]
-                    # A delay to all journeys through the station
-                    delay = disruptions[j][2]
-                    line_network.adjacency_matrix[station, :] *= delay
-                    line_network.adjacency_matrix[:, station] *= delay
-        # Add real time line networks together
-        real_time_network += line_network        
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        baseline_future = executor.submit(baseline_network, max_workers)
+        disruptions = _date_disruptions(date, disruptions)
+        fingerprint = disruption_fingerprint(disruptions)
+        # Networks are only cached once the lines are in memory, so on a hit `baseline_network` returns
+        # them at once and leaving the executor does not wait for any request
+        real_time_network = network_cache.get(fingerprint)
+        if real_time_network is None:
+            real_time_network = baseline_future.result().apply(compile_disruptions(disruptions))
+            network_cache.put(fingerprint, real_time_network)
     return real_time_network
 
 
+def real_time_networks(dates, max_workers=16):
+    """
+    This function returns the real-time London tube network of many dates.
+
+    The line connections are fetched once and the disruptions of all the dates are fetched at the same
+    time. Dates with the same disruptions share one network, which is built only once.
+
+    Parameters
+    ----------
+    dates : list of str
+        Dates in the format 'YYYY-MM-DD'.
+    max_workers : int, optional
+        The maximum number of requests sent at the same time. Default is 16.
+
+    Returns
+    -------
+    tuple of (list of str, dict)
+        The disruption fingerprint of every date (see `disruption_fingerprint`), and the network of
+        every distinct fingerprint.
+
+    Raises
+    ------
+    ValueError
+        If the disruptions of a date or the connections of a line could not be fetched.
+    ConnectionError
+        If there is no internet connection.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        baseline_future = executor.submit(baseline_network, min(max_workers, 12))
+        all_disruptions = list(executor.map(query_disruptions, dates))
+        baseline = baseline_future.result()
+    fingerprints = []
+    networks = {}
+    for date_str, disruptions in zip(dates, all_disruptions):
+        if disruptions is None:
+            raise ValueError(f"Error: Unable to fetch disruption information for {date_str}.")
+        fingerprint = disruption_fingerprint(disruptions)
+        fingerprints.append(fingerprint)
+        if fingerprint not in networks:
+            network = network_cache.get(fingerprint)
+            if network is None:
+                network = baseline.apply(compile_disruptions(disruptions))
+                network_cache.put(fingerprint, network)
+            networks[fingerprint] = network
+    return fingerprints, networks
+
+
+def real_time_layered_network(date):
+    """
+    This function takes a date and returns the real-time London tube network on that day with the
+    connections of every line kept apart, so that journeys can report their lines and changes.
+
+    Parameters
+    ----------
+    date : str
+        A date in the format 'YYYY-MM-DD'. For example, "2023-12-15".
+
+    Returns
+    -------
+    LayeredNetwork
+        The connections of every line on the specified date.
+
+    Raises
+    ------
+    ValueError
+        If the disruptions or the connections of a line could not be fetched.
+    ConnectionError
+        If there is no internet connection.
+    """
+    disruptions = query_disruptions(date)
+    if disruptions is None:
+        raise ValueError(f"Error: Unable to fetch disruption information for {date}.")
+    return baseline_network().apply_layered(compile_disruptions(disruptions))
+
+
+def real_time_all_pairs(date):
+    """
+    This function returns the shortest travel time and next hop between every pair of stations on a date.
+
+    The matrices are computed once per date with `Network.all_pairs` and kept as memory-mapped `.npy`
+    files in the "all-pairs" folder of the cache directory, under the `version` of the lines they were
+    computed from, so a route is then rebuilt with `Network.path_from_next_hops` in O(path length).
+
+    Parameters
+    ----------
+    date : str
+        A date in the format 'YYYY-MM-DD'. For example, "2023-12-15".
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, numpy.ndarray)
+        The 296x296 matrices of travel times in minutes and of next hops.
+    """
+    store = AllPairsStore(_artifact_directory("all-pairs"))
+    matrices = store.load(date) if cache.enabled else None
+    if matrices is None:
+        matrices = real_time_network(date).all_pairs()
+        if cache.enabled:
+            store.save(date, *matrices)
+            matrices = store.load(date)
+    return matrices
+
+
+# The landmark index of the undisrupted network, with the baseline and number of landmarks it was built for
+_baseline_landmarks = (None, 0, None)
+
+
+def real_time_landmarks(date, k=8, disruptions=None):
+    """
+    This function returns the landmark index of the London tube network on a date, for A* searches.
+
+    The landmarks are chosen once on the undisrupted network; the index of a date only searches again
+    from the landmarks whose costs are changed by the disruptions. Dates with the same disruptions share
+    one index: it is kept as a `.npz` file named by the fingerprint of the disruptions (see
+    `disruption_fingerprint`) in the "landmarks" folder of the cache directory, under the `version` of
+    the lines, and the indexes in use are kept in `landmark_cache`, so later journeys neither load nor
+    refresh it again.
+
+    Parameters
+    ----------
+    date : str
+        A date in the format 'YYYY-MM-DD'. For example, "2023-12-15".
+    k : int, optional
+        The number of landmarks. Default is 8.
+    disruptions : list, optional
+        The disruptions of the date, if they were already fetched with `query_disruptions`. Default is
+        None, which fetches them.
+
+    Returns
+    -------
+    LandmarkIndex
+        The landmark index of the network on the date.
+    """
+    global _baseline_landmarks
+    disruptions = _date_disruptions(date, disruptions)
+    key = f"{disruption_fingerprint(disruptions)}-{k}"
+    index = landmark_cache.get(key)
+    if index is not None:
+        return index
+    path = os.path.join(_artifact_directory("landmarks"), f"{key}.npz")
+    index = LandmarkIndex.load(path) if cache.enabled else None
+    if index is None:
+        baseline = baseline_network()
+        if _baseline_landmarks[:2] != (baseline, k):
+            undisrupted = baseline.apply(compile_disruptions([]))
+            _baseline_landmarks = (baseline, k, build_landmarks(undisrupted, k))
+        index = _baseline_landmarks[2].refresh(real_time_network(date, disruptions=disruptions))
+        if cache.enabled:
+            index.save(path)
+    landmark_cache.put(key, index)
+    return index
+
+
+def real_time_hierarchy(date, disruptions=None):
+    """
+    This function returns the contraction hierarchy of the London tube network on a date.
+
+    The hierarchy is built once with `build_hierarchy` for all the dates with the same disruptions. It is
+    kept as a `.npz` file named by the fingerprint of the disruptions (see `disruption_fingerprint`) in
+    the "hierarchies" folder of the cache directory, under the `version` of the lines, so other
+    processes can load it instead of building it, and the hierarchies in use are kept in
+    `hierarchy_cache`, so later journeys neither load nor build it again.
+
+    Parameters
+    ----------
+    date : str
+        A date in the format 'YYYY-MM-DD'. For example, "2023-12-15".
+    disruptions : list, optional
+        The disruptions of the date, if they were already fetched with `query_disruptions`. Default is
+        None, which fetches them.
+
+    Returns
+    -------
+    ContractionHierarchy
+        The contraction hierarchy of the network on the date.
+    """
+    disruptions = _date_disruptions(date, disruptions)
+    key = disruption_fingerprint(disruptions)
+    hierarchy = hierarchy_cache.get(key)
+    if hierarchy is not None:
+        return hierarchy
+    path = os.path.join(_artifact_directory("hierarchies"), f"{key}.npz")
+    hierarchy = ContractionHierarchy.load(path) if cache.enabled else None
+    if hierarchy is None:
+        hierarchy = build_hierarchy(real_time_network(date, disruptions=disruptions))
+        if cache.enabled:
+            hierarchy.save(path)
+    hierarchy_cache.put(key, hierarchy)
+    return hierarchy
+
+
+def real_time_trees(start_nodes, dates):
+    """
+    This function computes the shortest path trees of a fixed set of start stations on many dates.
+
+    The tree of every start station is searched once on the undisrupted network, and then repaired for
+    the disruptions of every date (see `DynamicShortestPathTrees`) rather than searched again.
+
+    Parameters
+    ----------
+    start_nodes : list of int
+        The IDs of the start stations.
+    dates : iterable of str
+        Dates in the format 'YYYY-MM-DD'.
+
+    Yields
+    ------
+    tuple of (str, int, numpy.ndarray, numpy.ndarray)
+        The date, the start station ID, and the travel time to and previous station of every station on
+        the date, as returned by `Network.shortest_path_tree`.
+    """
+    undisrupted = baseline_network().apply(compile_disruptions([]))
+    trees = DynamicShortestPathTrees(undisrupted, start_nodes)
+    for date in dates:
+        all_costs, all_previous_nodes = trees.repair(real_time_network(date))
+        for start_node, costs, previous_nodes in zip(trees.start_nodes, all_costs, all_previous_nodes):
+            yield date, start_node, costs, previous_nodes
+
+
+def prefetch_disruptions(date_from="2023-01-01", date_to="2024-12-31", max_workers=8, refresh=False):
+    """
+    This function downloads the disruptions of a range of dates and stores them in the cache directory,
+    so that `query_disruptions` answers them without contacting the web service.
+
+    Parameters
+    ----------
+    date_from, date_to : str, optional
+        The first and last date in the format 'YYYY-MM-DD'. Default is the whole range of the web
+        service, from 2023-01-01 to 2024-12-31.
+    max_workers : int, optional
+        The maximum number of requests sent at the same time. Default is 8.
+    refresh : bool, optional
+        If True, download the dates that are already stored again. Default is False.
+
+    Returns
+    -------
+    DisruptionCalendar
+        The calendar of every date fetched so far. Dates whose disruptions could not be fetched are
+        not stored, and nothing is written if the cache is disabled.
+
+    Raises
+    ------
+    ValueError
+        If a date is in the wrong format or outside the range of the web service.
+    ConnectionError
+        If there is no internet connection.
+    """
+    global _calendar
+    first_date, last_date = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    if first_date < date(2023, 1, 1) or last_date > date(2024, 12, 31):
+        raise ValueError("Provided date outside the valid range. Valid range is from 2023-1-1 to 2024-12-31")
+    # The calendar always covers the whole range of the web service, so earlier prefetches are kept
+    dates = [str(date(2023, 1, 1) + timedelta(days=i)) for i in range(731)]
+    stored = disruption_calendar()
+    all_disruptions = [None if stored is None else stored.get(date_str) for date_str in dates]
+    wanted = [i for i, date_str in enumerate(dates)
+              if str(first_date) <= date_str <= str(last_date) and (refresh or all_disruptions[i] is None)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, disruptions in zip(wanted, executor.map(_fetch_disruptions, [dates[i] for i in wanted])):
+            all_disruptions[i] = disruptions
+    calendar = DisruptionCalendar.from_disruptions(dates[0], all_disruptions)
+    if cache.enabled:
+        path = os.path.join(cache.directory, "disruptions.npz")
+        calendar.save(path)
+        _calendar = (path, _modified_time(path), calendar)
+    return calendar
@@ -0,0 +1,145 @@
+from collections import namedtuple
+import numpy as np
+from .Network import Network
+
+RoundLabels = namedtuple("RoundLabels", ["costs", "arrival_lines", "boarding_nodes"])
+
+
+def line_rounds(network, start_node, max_changes=None):
+    """
+    Compute the shortest travel time from a start node to every node with at most 0, 1, 2... changes of
+    line, in rounds (a RAPTOR-style search over lines instead of a timetable).
+
+    Round k boards every line at the nodes whose time improved in round k - 1 on another line, and
+    rides it with the travel times between its stations (see `LayeredNetwork.line_tables`), so one
+    round costs one array minimum per line.
+
+    Parameters
+    ----------
+    network : LayeredNetwork
+        The connections of every line.
+    start_node : int
+        The index of the start node.
+    max_changes : int, optional
+        The largest number of changes to search. Default is None, which searches until no time improves.
+
+    Returns
+    -------
+    RoundLabels
+        `costs[k, node]`, the shortest time with at most k changes; `arrival_lines[k, node]`, the line
+        that improved it in round k, or -1 if it did not improve; and `boarding_nodes[k, node]`, the
+        node where that line was boarded, or -1.
+    """
+    n = network.n_nodes
+    line_tables = network.line_tables
+    costs = np.full(n, np.inf)
+    costs[start_node] = 0
+    marked = np.zeros(n, dtype=bool)
+    marked[start_node] = True
+    arrival_lines = np.full(n, -1)
+    all_costs, all_arrival_lines, all_boarding_nodes = [], [], []
+    while marked.any() and (max_changes is None or len(all_costs) <= max_changes):
+        best_costs = np.full(n, np.inf)
+        previous_arrival_lines = arrival_lines
+        arrival_lines = np.full(n, -1)
+        boarding_nodes = np.full(n, -1)
+        for line, (stations, distances, _) in enumerate(line_tables):
+            # Board the line at its marked stations and ride it to every other station. Stations reached
+            # on the line itself were already ridden past, so boarding there again cannot be faster
+            boardings = np.flatnonzero(marked[stations] & (previous_arrival_lines[stations] != line))
+            if len(boardings) == 0:
+                continue
+            via = costs[stations[boardings], np.newaxis] + distances[boardings]
+            best_boardings = np.argmin(via, axis=0)
+            line_costs = via[best_boardings, np.arange(len(stations))]
+            better = line_costs < best_costs[stations]
+            best_costs[stations[better]] = line_costs[better]
+            arrival_lines[stations[better]] = line
+            boarding_nodes[stations[better]] = stations[boardings[best_boardings[better]]]
+        marked = best_costs < costs
+        costs = np.where(marked, best_costs, costs)
+        arrival_lines = np.where(marked, arrival_lines, -1)
+        all_costs.append(costs)
+        all_arrival_lines.append(arrival_lines)
+        all_boarding_nodes.append(np.where(marked, boarding_nodes, -1))
+    return RoundLabels(np.array(all_costs).reshape(-1, n), np.array(all_arrival_lines).reshape(-1, n),
+                       np.array(all_boarding_nodes).reshape(-1, n))
+
+
+def journey_from_rounds(network, labels, dest_node, changes):
+    """
+    Rebuild the journey to a destination node found within a number of changes.
+
+    Parameters
+    ----------
+    network : LayeredNetwork
+        The network the labels were computed on.
+    labels : RoundLabels
+        The labels returned by `line_rounds`.
+    dest_node : int
+        The index of the destination node.
+    changes : int
+        The round of the journey.
+
+    Returns
+    -------
+    tuple of (list of int, list of int) or None
+        The path as a list of node indices and the line of every leg, or None if the destination cannot
+        be reached within `changes` changes.
+    """
+    if changes >= len(labels.costs) or labels.costs[changes, dest_node] == np.inf:
+        return None
+    rides = []
+    node = int(dest_node)
+    for k in range(changes, -1, -1):
+        line = int(labels.arrival_lines[k, node])
+        if line < 0:
+            continue
+        # Follow the line from where it was boarded
+        boarding_node = int(labels.boarding_nodes[k, node])
+        stations, _, next_hops = network.line_tables[line]
+        positions = Network.path_from_next_hops(np.searchsorted(stations, boarding_node),
+                                                np.searchsorted(stations, node), next_hops)
+        rides.append((stations[positions].tolist(), line))
+        node = boarding_node
+    path, lines = [node], []
+    for ride, line in reversed(rides):
+        path += ride[1:]
+        lines += [line] * (len(ride) - 1)
+    return path, lines
+
+
+def pareto_journeys(network, start_node, dest_node, max_changes=None):
+    """
+    Find the journeys that cannot be made faster without more changes of line: the fastest journey
+    with 0 changes, then with 1 change if that is faster, and so on.
+
+    Parameters
+    ----------
+    network : LayeredNetwork
+        The connections of every line.
+    start_node : int
+        The index of the start node.
+    dest_node : int
+        The index of the destination node.
+    max_changes : int, optional
+        The largest number of changes to consider. Default is None, which considers any number.
+
+    Returns
+    -------
+    list of tuple(list of int, list of int, float, int)
+        The path, the line of every leg, the travel time and the number of changes of every journey,
+        by increasing number of changes (and decreasing travel time). The list is empty if the
+        destination cannot be reached.
+    """
+    start_node = int(start_node)
+    dest_node = int(dest_node)
+    if start_node == dest_node:
+        return [([start_node], [], 0.0, 0)]
+    labels = line_rounds(network, start_node, max_changes)
+    journeys = []
+    for changes in np.flatnonzero(labels.arrival_lines[:, dest_node] >= 0).tolist():
+        path, lines = journey_from_rounds(network, labels, dest_node, changes)
+        journeys.append((path, lines, float(labels.costs[changes, dest_node]),
+                         sum(line != next_line for line, next_line in zip(lines, lines[1:]))))
+    return journeys
@@ -0,0 +1,291 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+import numpy as np
+from . import query
+from .Network import Network
+
+# Mean radius of the Earth in kilometres
+EARTH_RADIUS = 6371.0088
+
+
+def normalise_name(name):
+    """
+    This function normalises a station name so that lookups ignore case, punctuation and spacing.
+
+    Parameters
+    ----------
+    name : str
+        The station name. For example, "King's Cross St. Pancras".
+
+    Returns
+    -------
+    str
+        The normalised name. For example, "kings cross st pancras".
+    """
+    name = name.casefold().replace("&", " and ")
+    name = re.sub(r"['’.]", "", name)
+    name = re.sub(r"[^\w]+", " ", name)
+    return name.strip()
+
+
+def trigrams(name):
+    """
+    This function splits a normalised name into its set of 3-character substrings.
+
+    Parameters
+    ----------
+    name : str
+        A normalised station name.
+
+    Returns
+    -------
+    set of str
+        The trigrams of the name, padded so that the start and end of every word count as well.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    This function computes the great-circle distance between points given by latitude and longitude.
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2 : float or numpy.ndarray
+        The coordinates of the points in degrees. Arrays are broadcast against each other.
+
+    Returns
+    -------
+    float or numpy.ndarray
+        The distance between the points in kilometres.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+class StationDirectory:
+    """
+    An in-memory directory of the stations in the London tube network.
+
+    The directory is built once from the full station table and then answers name and ID lookups
+    from dictionaries, without contacting the web service.
+
+    Parameters
+    ----------
+    station_info_matrix : list
+        Station information formatted as [[name, ID, latitude, longitude]...], as returned by
+        `query.query_station_information("all")`.
+    """
+    def __init__(self, station_info_matrix):
+        n_stations = max((info[1] for info in station_info_matrix), default=-1) + 1
+        self.by_id = {}
+        self.by_name = {}
+        self.latitudes = np.full(n_stations, np.nan)
+        self.longitudes = np.full(n_stations, np.nan)
+        self._trigram_index = defaultdict(set)
+        for name, station_id, lat, lon in station_info_matrix:
+            self.by_id[station_id] = name
+            self.by_name[normalise_name(name)] = station_id
+            self.latitudes[station_id] = lat
+            self.longitudes[station_id] = lon
+        self._sorted_names = sorted(self.by_name)
+        for normalised in self._sorted_names:
+            for trigram in trigrams(normalised):
+                self._trigram_index[trigram].add(normalised)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def name(self, station_id):
+        """
+        Return the name of a station.
+
+        Parameters
+        ----------
+        station_id : int
+            The ID of the station.
+
+        Returns
+        -------
+        str
+            The name of the station.
+
+        Raises
+        ------
+        ValueError
+            If there is no station with the given ID.
+        """
+        try:
+            return self.by_id[int(station_id)]
+        except KeyError:
+            raise ValueError(f"Error: Unable to fetch station information for {station_id}.")
+
+    def station_id(self, station):
+        """
+        Return the ID of a station given its name or ID.
+
+        Parameters
+        ----------
+        station : int or str
+            The ID or name of the station. Strings of digits are read as IDs, and names are matched
+            ignoring case, punctuation and spacing.
+
+        Returns
+        -------
+        int
+            The ID of the station.
+
+        Raises
+        ------
+        ValueError
+            If the station is unknown. The message suggests the closest station names.
+        """
+        if isinstance(station, str) and station.strip().isdigit():
+            station = int(station)
+        if not isinstance(station, str):
+            self.name(station)
+            return int(station)
+        station_id = self.by_name.get(normalise_name(station))
+        if station_id is None:
+            suggestions = [name for name, score in self.fuzzy(station, limit=3)]
+            message = f"Error: Unable to fetch station information for {station}."
+            if suggestions:
+                message += f" Did you mean: {', '.join(suggestions)}?"
+            raise ValueError(message)
+        return station_id
+
+    def max_speed(self, network):
+        """
+        Return the highest speed of any connection of a network, measured as a straight line.
+
+        Parameters
+        ----------
+        network : Network or numpy.ndarray
+            The network of the stations, or its adjacency matrix.
+
+        Returns
+        -------
+        float
+            The speed in kilometres per minute, or 0 if no connection joins two known stations.
+        """
+        rows, cols, weights = Network.as_network(network).edges()
+        known = (rows < len(self.latitudes)) & (cols < len(self.latitudes)) & (weights > 0)
+        rows, cols, weights = rows[known], cols[known], weights[known]
+        speeds = haversine(self.latitudes[rows], self.longitudes[rows],
+                           self.latitudes[cols], self.longitudes[cols]) / weights
+        speeds = speeds[~np.isnan(speeds)]
+        return float(speeds.max()) if len(speeds) else 0.0
+
+    def travel_time_bounds(self, dest, speed, n_nodes=None):
+        """
+        Return a lower bound on the travel time from every station to a destination, for A* searches.
+
+        No connection is faster than `speed` and no route is shorter than the straight line, so the
+        bounds never overestimate the travel time on the network `speed` was measured on, or on the
+        same network with delays.
+
+        Parameters
+        ----------
+        dest : int
+            The ID of the destination station.
+        speed : float
+            The highest speed of the network in kilometres per minute, as returned by `max_speed`.
+        n_nodes : int, optional
+            The number of nodes of the network. Default is the number of station IDs.
+
+        Returns
+        -------
+        numpy.ndarray
+            The bound in minutes for every node; 0 for nodes without known coordinates.
+        """
+        n_nodes = len(self.latitudes) if n_nodes is None else n_nodes
+        bounds = np.zeros(n_nodes)
+        if speed > 0 and dest < len(self.latitudes):
+            known = min(n_nodes, len(self.latitudes))
+            distances = haversine(self.latitudes[:known], self.longitudes[:known],
+                                  self.latitudes[dest], self.longitudes[dest])
+            bounds[:known] = np.nan_to_num(distances / speed)
+        return bounds
+
+    def complete(self, prefix, limit=10):
+        """
+        Return the stations whose name starts with a prefix, for autocompletion.
+
+        Parameters
+        ----------
+        prefix : str
+            The start of a station name.
+        limit : int, optional
+            The maximum number of names returned. Default is 10.
+
+        Returns
+        -------
+        list of str
+            The matching station names in alphabetical order.
+        """
+        prefix = normalise_name(prefix)
+        matches = []
+        for normalised in self._sorted_names[bisect_left(self._sorted_names, prefix):]:
+            if not normalised.startswith(prefix) or len(matches) == limit:
+                break
+            matches.append(self.by_id[self.by_name[normalised]])
+        return matches
+
+    def fuzzy(self, name, limit=5, cutoff=0.3):
+        """
+        Return the stations whose name is most similar to the given one, for misspelt names.
+
+        Similarity is the Jaccard index of the trigram sets of the two names.
+
+        Parameters
+        ----------
+        name : str
+            The (possibly misspelt) station name.
+        limit : int, optional
+            The maximum number of names returned. Default is 5.
+        cutoff : float, optional
+            The minimum similarity between 0 and 1 of a returned name. Default is 0.3.
+
+        Returns
+        -------
+        list of tuple(str, float)
+            The station names with their similarity, most similar first.
+        """
+        query_trigrams = trigrams(normalise_name(name))
+        shared = defaultdict(int)
+        for trigram in query_trigrams:
+            for normalised in self._trigram_index.get(trigram, ()):
+                shared[normalised] += 1
+        scores = []
+        for normalised, count in shared.items():
+            score = count / (len(query_trigrams) + len(trigrams(normalised)) - count)
+            if score >= cutoff:
+                scores.append((self.by_id[self.by_name[normalised]], score))
+        scores.sort(key=lambda match: (-match[1], match[0]))
+        return scores[:limit]
+
+
+_directory = None
+
+
+def station_directory(refresh=False):
+    """
+    This function returns the station directory, loading the station table on first use.
+
+    Parameters
+    ----------
+    refresh : bool, optional
+        If True, load the station table again. Default is False.
+
+    Returns
+    -------
+    StationDirectory
+        The directory shared by the whole package.
+    """
+    global _directory
+    if _directory is None or refresh:
+        _directory = StationDirectory(query.query_station_information("all"))
+    return _directory
@@ -13,6 +13,7 @@ setup(
     entry_points={
         'console_scripts': [
             'journey-planner = londontube.journey_planner:process',
+            'londontube-prefetch = londontube.prefetch:process',
         ],
     },
 )
\ No newline at end of file
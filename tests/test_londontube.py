@@ -3,15 +3,96 @@ import requests
 import numpy as np
 import yaml
 import csv
+import json
+import os
+import pickle
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import StringIO
+from multiprocessing import shared_memory
+from urllib.parse import urlparse, parse_qs
 from unittest.mock import patch
-from Network import Network
-from query import query_disruptions, query_line_connections, query_station_information, query_station_num, parse_station_data, parse_disruptions_data
+from londontube import query
+from londontube import journey_planner, parallel, prefetch, stations
+from londontube.cache import TopologyCache, NetworkCache, AllPairsStore, DisruptionCalendar, disruption_fingerprint
+from londontube.stations import StationDirectory, haversine
+from londontube.disruptions import BaselineNetwork, compile_disruptions
+from londontube.Network import Network
+from londontube.dynamic import DynamicShortestPathTrees
+from londontube.hierarchy import ContractionHierarchy, build_hierarchy
+from londontube.landmarks import LandmarkIndex, build_landmarks
+from londontube.layered import LayeredNetwork
+from londontube.parallel import SharedNetwork, route_pairs
+from londontube.raptor import line_rounds, pareto_journeys
+from londontube.query import query_disruptions, query_line_connections, query_station_information, query_station_num, parse_station_data, parse_disruptions_data
 
 
 with open("tests/fixture.yaml", "r") as yamlfile:
     fixture = yaml.safe_load(yamlfile)
-    
+
+
+@pytest.fixture(autouse=True)
+def topology_cache(monkeypatch, tmp_path):
+    """Give every test its own cache directory, with caching switched off unless a test enables it."""
+    monkeypatch.setattr(query, "cache", TopologyCache(str(tmp_path / "cache"), enabled=False))
+    monkeypatch.setattr(query, "network_cache", NetworkCache())
+    monkeypatch.setattr(query, "_baseline", None)
+    return query.cache
+
+
+class StandInService(BaseHTTPRequestHandler):
+    """A local stand-in for the London tube web service, serving the contents of `routes`."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = {}
+    latency = 0.05
+    active = 0
+    peak = 0
+    received = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StandInService.lock:
+            StandInService.active += 1
+            StandInService.peak = max(StandInService.peak, StandInService.active)
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        key = (url.path, tuple(sorted((k, v[0]) for k, v in parse_qs(url.query).items())))
+        response = self.routes.get(key, (200, ""))
+        if isinstance(response, list):
+            # A list of responses is served in order, repeating the last one
+            response = response.pop(0) if len(response) > 1 else response[0]
+        status, body, headers = response if len(response) == 3 else (*response, {})
+        StandInService.received.append((self.path, self.headers.get("If-None-Match")))
+        with StandInService.lock:
+            StandInService.active -= 1
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body.encode())))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tube_service(monkeypatch):
+    """Point the query module at a local stand-in service and return its routes."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInService)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(query, "client", query.ServiceClient(base_url=url, retries=0))
+    StandInService.routes = {}
+    StandInService.peak = 0
+    StandInService.received = []
+    yield StandInService.routes
+    server.shutdown()
+    server.server_close()
+
 
 @pytest.mark.parametrize("data", [fixture[0]])
 def test_adding_networks(data):
@@ -55,7 +136,7 @@ def test_no_possible_paths(data):
 
 @pytest.mark.parametrize("data", [fixture[5]])
 def test_query_line_connections(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = properties["content"]
@@ -73,7 +154,7 @@ def test_query_line_connections(data):
 
 @pytest.mark.parametrize("data", [fixture[6]])
 def test_parse_station_data(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         csv_data = properties["content"].strip()
         result = parse_station_data(csv_data)
@@ -83,7 +164,7 @@ def test_parse_station_data(data):
 
 @pytest.mark.parametrize("data", [fixture[6]])
 def test_query_station_information(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = properties["content"]
@@ -93,7 +174,7 @@ def test_query_station_information(data):
 
 @pytest.mark.parametrize("data", [fixture[6]])
 def test_parse_station_data(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = properties["content"]
@@ -104,7 +185,7 @@ def test_parse_station_data(data):
 
 @pytest.mark.parametrize("data", [fixture[7]])
 def test_query_station_num(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = properties["content"]
@@ -115,7 +196,7 @@ def test_query_station_num(data):
 
 @pytest.mark.parametrize("data", [fixture[8]])
 def test_query_disruptions(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = properties["content"]
@@ -126,7 +207,7 @@ def test_query_disruptions(data):
 
 @pytest.mark.parametrize("data", [fixture[8]])
 def test_parse_distruptions_data(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         result = parse_disruptions_data(properties["content"])
         expected = properties["expected"]
@@ -136,7 +217,7 @@ def test_parse_distruptions_data(data):
                                   (fixture[13]),(fixture[14]),(fixture[15]),(fixture[27]),
                                   (fixture[28]), (fixture[29])])
 def test_query_value_error(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 201
         with pytest.raises(ValueError, match=properties["errormsg"]):
@@ -144,7 +225,7 @@ def test_query_value_error(data):
 
 @pytest.mark.parametrize("data", [(fixture[16]),(fixture[17]),(fixture[18])])
 def test_query_type_error(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 201
         with pytest.raises(TypeError, match=properties["errormsg"]):
@@ -152,7 +233,7 @@ def test_query_type_error(data):
 
 @pytest.mark.parametrize("data", [(fixture[19]),(fixture[20]),(fixture[21]),(fixture[22])])
 def test_connection_error(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code.return_value = 200
         mock_get.side_effect = requests.ConnectionError
@@ -161,9 +242,771 @@ def test_connection_error(data):
 
 @pytest.mark.parametrize("data", [(fixture[23]),(fixture[24]),(fixture[25]),(fixture[26])])
 def test_requests(data):
-    with patch.object(requests, "get") as mock_get:
+    with patch.object(requests.Session, "get") as mock_get:
         properties = list(data.values())[0]
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = properties["content"]
         result = exec(properties["execute"])
-        mock_get.assert_called_with(properties["call"])
+        mock_get.assert_called_with(properties["call"], timeout=query.client.timeout, headers=None)
+
+@pytest.mark.parametrize("data", [fixture[3]])
+def test_shortest_path_neighbour_lists(data):
+    properties = list(data.values())[0]
+    neighbours = Network.neighbour_lists(*properties["Matrix1"])
+    assert neighbours[0] == [(1, 1.0), (2, 2.0)]
+    result = Network.shortest_path(0, 4, neighbours)
+    assert result == tuple(properties["expected"])
+    assert Network.shortest_path(4, 4, neighbours) == ([4], 0)
+
+@pytest.mark.parametrize("data", [fixture[0]])
+def test_adding_csr_networks(data):
+    properties = list(data.values())[0]
+    Network1 = Network(4, *properties["Matrix1"]).to_csr()
+    Network2 = Network(4, *properties["Matrix2"])
+    result = Network1 + Network2
+    assert result.storage == "csr"
+    assert np.array_equal(result.adjacency_matrix, np.array(*properties["expectedMatrix"]))
+    assert result.storage == "dense"
+
+@pytest.mark.parametrize("data", [fixture[2], fixture[3]])
+def test_csr_network_searches(data):
+    properties = list(data.values())[0]
+    dense = Network(len(*properties["Matrix1"]), np.array(*properties["Matrix1"], dtype=float))
+    sparse = dense.to_csr()
+    for v in range(dense.n_nodes):
+        assert sorted(Network.distant_neighbours(2, v, sparse)) == sorted(Network.distant_neighbours(2, v, dense.adjacency_matrix))
+        assert Network.dijkstra(0, v, sparse) == Network.dijkstra(0, v, dense.adjacency_matrix)
+
+@pytest.mark.parametrize("data", [fixture[3]])
+def test_csr_network_scaling(data):
+    properties = list(data.values())[0]
+    dense = Network(5, np.array(*properties["Matrix1"], dtype=float))
+    sparse = dense.to_csr()
+    for network in (dense, sparse):
+        network.scale_edge(1, 3, 4)
+        network.scale_node(2, 0)
+    assert sparse.storage == "csr"
+    assert np.array_equal(sparse.adjacency_matrix, dense.adjacency_matrix)
+    assert Network.dijkstra(0, 4, sparse) == ([0, 1, 3, 4], 6)
+
+@pytest.mark.parametrize("data", [fixture[0]])
+def test_merging_networks(data):
+    properties = list(data.values())[0]
+    Network1 = Network(4, np.array(*properties["Matrix1"]))
+    Network2 = Network(4, np.array(*properties["Matrix2"]))
+    Network3 = Network(4, np.array([[0, 5, 0, 2], [5, 0, 0, 0], [0, 0, 0, 0], [2, 0, 0, 0]]))
+    expected = Network1 + Network2 + Network3
+    assert np.array_equal(expected.adjacency_matrix, [[0, 1, 0, 2], [1, 0, 2, 1], [0, 2, 0, 0], [2, 1, 0, 0]])
+    for networks in [(Network1, Network2, Network3), (Network1.to_csr(), Network2, Network3.to_csr())]:
+        result = Network.merge(*networks)
+        assert np.array_equal(result.adjacency_matrix, expected.adjacency_matrix)
+    with pytest.raises(ValueError, match="At least one network is required"):
+        Network.merge()
+
+@pytest.mark.parametrize("data", [fixture[2]])
+def test_distant_neighbours_exact_and_batch(data):
+    properties = list(data.values())[0]
+    matrix = properties["Matrix1"][0]
+    assert Network.distant_neighbours(2, 4, matrix, exact=True) == [0, 3, 7, 8]
+    assert Network.distant_neighbours(2, 4, matrix) == [0, 1, 2, 3, 5, 6, 7, 8]
+    result = Network.distant_neighbours_batch(2, [4, 0, 8], Network(9, matrix).to_csr())
+    assert result.shape == (3, 9)
+    for row, v in zip(result, [4, 0, 8]):
+        assert np.flatnonzero(row).tolist() == Network.distant_neighbours(2, v, matrix)
+
+
+def test_real_time_network_concurrent_fetch(tube_service):
+    disruptions = [{"delay": 3, "line": 1, "stations": [2, 3]}, {"delay": 2, "stations": [5]},
+                   {"delay": 0, "line": 4, "stations": [9, 10]}]
+    tube_service[("/disruptions/query", (("date", "2023-12-15"),))] = (200, json.dumps(disruptions))
+    expected = np.zeros((296, 296))
+    for i in range(12):
+        csv_rows = f"{2 * i},{2 * i + 1},{i + 1}\n{2 * i + 1},{2 * i + 2},2\n"
+        tube_service[("/line/query", (("line_identifier", str(i)),))] = (200, csv_rows)
+        line = np.zeros((296, 296))
+        for row in csv.reader(StringIO(csv_rows)):
+            station1, station2, travel_time = map(int, row)
+            line[station1, station2] = line[station2, station1] = travel_time
+        if i == 1:
+            line[2, 3] *= 3
+        if i == 4:
+            line[9, 10] *= 0
+        line[5, :] *= 2
+        line[:, 5] *= 2
+        expected = np.where(expected == 0, line, np.where(line == 0, expected, np.minimum(expected, line)))
+
+    result = query.real_time_network("2023-12-15")
+    assert np.array_equal(result.adjacency_matrix, expected)
+    assert StandInService.peak > 1
+
+
+def test_real_time_network_propagates_errors(tube_service):
+    tube_service[("/disruptions/query", (("date", "2023-12-15"),))] = (200, "[]")
+    tube_service[("/line/query", (("line_identifier", "5"),))] = (500, "")
+    with pytest.raises(ValueError, match="Error: Unable to fetch line connections for 5."):
+        query.real_time_network("2023-12-15")
+
+
+def test_plan_journey_range(tube_service, monkeypatch, capsys):
+    monkeypatch.setattr(stations, "_directory", StationDirectory(STATIONS))
+    for i in range(12):
+        tube_service[("/line/query", (("line_identifier", str(i)),))] = (200, "0,1,2\n1,4,3\n4,3,4\n" if i == 0 else "")
+    for day in range(19, 23):
+        disruptions = [{"delay": 5, "stations": [1]}] if day == 21 else []
+        tube_service[("/disruptions/query", (("date", f"2023-12-{day}"),))] = (200, json.dumps(disruptions))
+    assert journey_planner.plan_journey_range("Waterloo", "Warren Street", "2023-12-19", "2023-12-22") == [
+        ("2023-12-19", "2023-12-20", [0, 1, 4, 3], 9.0), ("2023-12-21", "2023-12-21", [0, 1, 4, 3], 29.0),
+        ("2023-12-22", "2023-12-22", [0, 1, 4, 3], 9.0)]
+    assert sum(path.startswith("/line/query") for path, _ in StandInService.received) == 12
+    assert StandInService.peak > 1
+    # The second sweep reuses the lines and the networks of both disruption sets
+    monkeypatch.setattr("sys.argv", ["journey-planner", "0", "2", "--range", "2023-12-20", "2023-12-21"])
+    journey_planner.process()
+    assert capsys.readouterr().out.splitlines() == ["from,to,duration,route", "2023-12-20,2023-12-21,,"]
+    assert query.network_cache.stats()["hits"] == 2
+    with pytest.raises(ValueError, match="must not be before"):
+        journey_planner.plan_journey_range(0, 3, "2023-12-22", "2023-12-19")
+
+
+def test_prefetch_disruptions(tube_service, tmp_path, monkeypatch, capsys):
+    disruptions = fixture[8]["query_disruptions"]["content"]
+    tube_service[("/disruptions/query", (("date", "2023-12-19"),))] = (200, json.dumps(disruptions))
+    grouped = [{"stations": [3, 4, 5], "delay": 2}, {"line": 1, "delay": 3}, {"line": 2, "stations": [6], "delay": 1.5}]
+    tube_service[("/disruptions/query", (("date", "2023-12-20"),))] = (200, json.dumps(grouped))
+    tube_service[("/disruptions/query", (("date", "2023-12-21"),))] = (500, "")
+    query.configure_cache(directory=str(tmp_path))
+    monkeypatch.setattr("sys.argv", ["londontube-prefetch", "--from", "2023-12-19", "--to", "2023-12-21"])
+    prefetch.process()
+    assert capsys.readouterr().out.endswith(f"Disruptions of 2 dates stored in {tmp_path}\n")
+    assert query.disruption_calendar().dates() == ["2023-12-19", "2023-12-20"]
+    # Stored dates are answered without contacting the web service
+    StandInService.received.clear()
+    assert query.query_disruptions("2023-12-19") == fixture[8]["query_disruptions"]["expected"]
+    # Delayed groups come back as fetched, so stored and fetched dates share their networks
+    assert query.query_disruptions("2023-12-20") == parse_disruptions_data(grouped)
+    assert StandInService.received == []
+    for date_str in ["2023-12-19", "2023-12-20"]:
+        assert disruption_fingerprint(query.query_disruptions(date_str)) == disruption_fingerprint(
+            query._fetch_disruptions(date_str))
+    StandInService.received.clear()
+    assert query.query_disruptions("2023-12-21") is None
+    assert len(StandInService.received) == 1
+    # A later prefetch keeps the dates stored before
+    tube_service[("/disruptions/query", (("date", "2023-12-21"),))] = (200, "[]")
+    calendar = query.prefetch_disruptions("2023-12-21", "2023-12-21")
+    assert calendar.dates() == ["2023-12-19", "2023-12-20", "2023-12-21"]
+    assert DisruptionCalendar.load(str(tmp_path / "disruptions.npz")).get("2023-12-19") == calendar.get("2023-12-19")
+    # Clearing the cache also forgets the calendar in memory
+    query.cache.clear()
+    assert query.disruption_calendar() is None
+
+
+def test_disruption_calendar():
+    first_day = [[None, [3, 4, 5], 2], [None, [6], 2], [1, [], 3], [2, [7, 8, 9, 10], 1.5]]
+    calendar = DisruptionCalendar.from_disruptions("2023-01-01", [first_day, None, [[7, [1, 2], 1.5]]])
+    assert calendar.get("2023-01-01") == first_day
+    assert calendar.get("2023-01-02") is None and calendar.get("2023-01-04") is None
+    assert calendar.get("2023-01-03") == [[7, [1, 2], 1.5]]
+    assert len(calendar) == 2
+
+
+def test_service_client_retries(tube_service):
+    tube_service[("/line/query", (("line_identifier", "3"),))] = [(503, ""), (503, ""), (200, "1,2,3\n")]
+    client = query.ServiceClient(base_url=query.client.base_url, retries=2, backoff_factor=0)
+    response = client.get("line/query?line_identifier=3")
+    assert response.status_code == 200
+    assert response.text == "1,2,3\n"
+
+
+def test_service_client_timeout(tube_service):
+    client = query.ServiceClient(base_url=query.client.base_url, timeout=0.01, retries=0)
+    with pytest.raises(ConnectionError, match="The web service did not respond in time."):
+        client.get("line/query?line_identifier=3")
+
+
+def test_topology_cache(tube_service, tmp_path):
+    line = "1,2,3\n2,5,4\n"
+    tube_service[("/line/query", (("line_identifier", "3"),))] = [(200, line, {"ETag": '"v1"'}), (304, "")]
+    tube_service[("/stations/query", (("id", "all"),))] = (200, fixture[6]["query_station_information"]["content"])
+    cache = query.configure_cache(directory=str(tmp_path / "cache"))
+    expected = query.query_line_connections(3).adjacency_matrix
+    assert np.array_equal(query.query_line_connections(3).adjacency_matrix, expected)
+    assert query.query_station_information("all") == query.query_station_information("all")
+    assert cache.stats() == {"hits": 2, "misses": 2}
+    assert len(StandInService.received) == 2
+
+    # A stale entry is revalidated with its ETag
+    cache.ttl = 0
+    assert np.array_equal(query.query_line_connections(3).adjacency_matrix, expected)
+    assert StandInService.received[-1] == ("/line/query?line_identifier=3", '"v1"')
+    assert cache.stats() == {"hits": 3, "misses": 2}
+
+    # Offline mode only uses the cache
+    cache.offline = True
+    assert np.array_equal(query.query_line_connections(3).adjacency_matrix, expected)
+    assert len(StandInService.received) == 3
+    with pytest.raises(ConnectionError, match="line-4 is not in the cache and offline mode is on."):
+        query.query_line_connections(4)
+
+
+STATIONS = [["Warren Street", 3, 51.5247, -0.1384], ["Waterloo", 0, 51.5036, -0.1143],
+            ["Westminster", 1, 51.501, -0.1254], ["King's Cross St. Pancras", 2, 51.5308, -0.1238],
+            ["Green Park", 4, 51.5067, -0.1428]]
+
+
+def test_station_directory():
+    directory = StationDirectory(STATIONS)
+    assert len(directory) == 5
+    assert directory.station_id("warren  street") == 3
+    assert directory.station_id("Kings Cross St Pancras") == 2
+    assert directory.station_id("4") == directory.station_id(4) == 4
+    assert directory.name(2) == "King's Cross St. Pancras"
+    assert directory.latitudes[0] == 51.5036 and directory.longitudes[4] == -0.1428
+    assert directory.complete("w") == ["Warren Street", "Waterloo", "Westminster"]
+    assert directory.complete("wa", limit=1) == ["Warren Street"]
+    assert directory.fuzzy("Westminister")[0][0] == "Westminster"
+    with pytest.raises(ValueError, match="Did you mean: Waterloo"):
+        directory.station_id("Waterlo")
+    with pytest.raises(ValueError, match="Error: Unable to fetch station information for 7."):
+        directory.name(7)
+
+
+def test_journey_planner_uses_station_directory(monkeypatch, capsys):
+    matrix = np.zeros((5, 5))
+    for a, b, t in [(0, 1, 2), (1, 4, 3), (4, 3, 4)]:
+        matrix[a, b] = matrix[b, a] = t
+    monkeypatch.setattr(stations, "_directory", StationDirectory(STATIONS))
+    monkeypatch.setattr(query, "real_time_network", lambda date, **kwargs: Network(5, matrix))
+    with patch.object(requests.Session, "get") as mock_get:
+        journey_planner.journey_planner(False, "waterloo", "Warren Street", "2023-12-19")
+        assert not mock_get.called
+    assert capsys.readouterr().out.splitlines() == ["Date: 2023-12-19", "Journey will take 9 minutes.",
+                                                    "Start: Waterloo", "Westminster", "Green Park",
+                                                    "End: Warren Street"]
+
+
+def test_network_cache(tube_service):
+    for date, disruptions in [("2023-12-15", [[1, [2], 3], [None, [4, 5], 2]]),
+                              ("2023-12-16", [[None, [4, 5], 2], [1, [2], 3]]),
+                              ("2023-12-17", [])]:
+        content = [{"line": line, "stations": stations, "delay": delay} for line, stations, delay in disruptions]
+        tube_service[("/disruptions/query", (("date", date),))] = (200, json.dumps(content))
+    for i in range(12):
+        tube_service[("/line/query", (("line_identifier", str(i)),))] = (200, f"{i},{i + 1},2\n")
+    network_cache = query.configure_network_cache(max_size=1)
+
+    network = query.real_time_network("2023-12-15")
+    assert query.real_time_network("2023-12-16") is network
+    assert network_cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+    assert query.real_time_network("2023-12-17") is not network
+    assert network_cache.stats()["evictions"] == 1
+
+    network_cache.invalidate(disruption_fingerprint([]))
+    assert len(network_cache) == 0
+
+    # Networks built from the previous lines are not served after the lines are fetched again
+    network = query.real_time_network("2023-12-17")
+    query.baseline_network(refresh=True)
+    assert len(network_cache) == 0
+    assert query.real_time_network("2023-12-17") is not network
+    assert disruption_fingerprint([[1, [2], 3], [None, [4, 5], 2]]) != disruption_fingerprint([[1, [2], 3]])
+
+
+def test_apply_disruptions_station_groups():
+    matrix = np.zeros((4, 4))
+    matrix[0, 1] = matrix[1, 0] = matrix[2, 3] = matrix[3, 2] = 2
+    # Every station of a group is delayed, and a group without stations delays nothing
+    network = query.apply_disruptions(Network(4, matrix.copy()), 1, [[None, [0, 1], 2], [1, [0, 3, 2], 3], [None, [], 5]])
+    expected = matrix.copy()
+    expected[0, 1] *= 2
+    expected[[0, 3, 2], :] *= 3
+    expected[:, [0, 3, 2]] *= 3
+    assert np.array_equal(network.adjacency_matrix, expected)
+
+
+def dense_real_time_network(line_matrices, disruptions):
+    """The real-time network as first built: every disruption applied to a dense copy of every line."""
+    merged = np.zeros_like(line_matrices[0])
+    for i, matrix in enumerate(line_matrices):
+        adjacency = matrix.copy()
+        for line, stations, delay in disruptions:
+            if line == i or line is None:
+                if len(stations) == 2:
+                    adjacency[stations[0], stations[1]] *= delay
+                else:
+                    adjacency[stations, :] *= delay
+                    adjacency[:, stations] *= delay
+        # Connections on several lines keep the fastest line
+        merged = np.where((merged == 0) | (adjacency == 0), np.maximum(merged, adjacency), np.minimum(merged, adjacency))
+    return merged
+
+
+def test_vectorised_disruptions_match_line_by_line():
+    rng = np.random.default_rng(0)
+    n_nodes = 30
+    line_matrices = []
+    for i in range(12):
+        stations = rng.choice(n_nodes, size=10, replace=False)
+        matrix = np.zeros((n_nodes, n_nodes))
+        matrix[stations[:-1], stations[1:]] = matrix[stations[1:], stations[:-1]] = rng.integers(1, 6, 9)
+        line_matrices.append(matrix)
+    disruptions = []
+    for j in range(300):
+        line = [None, *range(13)][rng.integers(0, 14)]
+        # Delayed connections, and delayed groups of 0, 1, 3 or 4 stations
+        stations = rng.choice(n_nodes, size=rng.integers(0, 5), replace=False).tolist()
+        disruptions.append([line, stations, int(rng.integers(0, 10))])
+    disruptions.append([None, [int(np.nonzero(line_matrices[0])[0][0]), int(np.nonzero(line_matrices[0])[1][0])], 3])
+
+    baseline = BaselineNetwork([Network(n_nodes, matrix).to_csr() for matrix in line_matrices])
+    # Fractional delays only match exactly if they are multiplied in the same order
+    fractional = [[line, stations, delay * rng.uniform(0.5, 1.5)] for line, stations, delay in disruptions]
+    for delays in [disruptions, fractional]:
+        expected = dense_real_time_network(line_matrices, delays)
+        line_by_line = Network.merge(*(query.apply_disruptions(Network(n_nodes, matrix.copy()), i, delays)
+                                       for i, matrix in enumerate(line_matrices)))
+        assert np.array_equal(line_by_line.adjacency_matrix, expected)
+        assert np.array_equal(baseline.apply(compile_disruptions(delays)).adjacency_matrix, expected)
+    assert np.array_equal(baseline.apply(compile_disruptions([])).adjacency_matrix,
+                          Network.merge(*(Network(n_nodes, matrix) for matrix in line_matrices)).adjacency_matrix)
+
+
+def test_layered_network(capsys):
+    rng = np.random.default_rng(3)
+    n_nodes = 30
+    line_networks = []
+    for i in range(5):
+        stations = rng.choice(n_nodes, size=10, replace=False)
+        times = rng.integers(1, 6, 9)
+        line_networks.append(Network.from_edges(n_nodes, np.r_[stations[:-1], stations[1:]],
+                                                np.r_[stations[1:], stations[:-1]], np.r_[times, times]))
+    baseline = BaselineNetwork(line_networks)
+    compiled = compile_disruptions([[1, [int(line_networks[1].edges()[0][0])], 4]])
+    layered = baseline.apply_layered(compiled)
+    assert layered.weights.shape == (5, len(layered.rows))
+    assert np.array_equal(layered.network.adjacency_matrix, baseline.apply(compiled).adjacency_matrix)
+    for start in range(n_nodes):
+        for dest in range(n_nodes):
+            expected = Network.dijkstra(start, dest, layered.network)
+            for penalty in [0, 2.5]:
+                result = layered.shortest_path(start, dest, penalty)
+                if expected is None:
+                    assert result is None
+                    continue
+                path, lines, duration = result
+                # Every leg is run by its line, and penalties only make the journey slower
+                assert path[0] == start and path[-1] == dest and len(lines) == len(path) - 1
+                assert duration == sum(layered.weights[line, np.flatnonzero((layered.rows == a) & (layered.cols == b))[0]]
+                                       for a, b, line in zip(path, path[1:], lines))
+                assert duration == expected[1] if penalty == 0 else duration >= expected[1]
+    capsys.readouterr()
+
+    # A direct line is preferred to a faster journey with a change once changes cost enough
+    layered = LayeredNetwork.from_line_edges(3, 3, [0, 1, 2], [0, 1, 0], [1, 2, 2], [1, 1, 3])
+    assert layered.shortest_path(0, 2) == ([0, 1, 2], [0, 1], 2)
+    assert layered.shortest_path(0, 2, interchange_penalty=2) == ([0, 2], [2], 3)
+    assert layered.shortest_path(2, 0, interchange_penalty=2) is None
+    assert layered.lines_of([0]) == []
+    with pytest.raises(ValueError):
+        layered.lines_of([0, 1, 0])
+    # Line 1 is as fast on its one leg, but staying on line 0 needs no change
+    layered = LayeredNetwork.from_line_edges(4, 2, [0, 0, 0, 1], [0, 1, 2, 1], [1, 2, 3, 2], [1, 1, 1, 1])
+    assert layered.lines_of([0, 1, 2, 3]) == [0, 0, 0]
+
+
+
+def test_pareto_journeys(capsys):
+    rng = np.random.default_rng(4)
+    n_nodes, n_lines = 25, 6
+    lines, rows, cols, weights = [], [], [], []
+    for line in range(n_lines):
+        stations = rng.choice(n_nodes, size=8, replace=False)
+        times = rng.integers(1, 9, 7)
+        lines += [line] * 14
+        rows += [*stations[:-1], *stations[1:]]
+        cols += [*stations[1:], *stations[:-1]]
+        weights += [*times, *times]
+    layered = LayeredNetwork.from_line_edges(n_nodes, n_lines, lines, rows, cols, weights)
+    labels = line_rounds(layered, 0)
+    assert np.all(labels.costs[1:] <= labels.costs[:-1])
+    for dest in range(1, n_nodes):
+        journeys = pareto_journeys(layered, 0, dest)
+        if not journeys:
+            assert layered.shortest_path(0, dest) is None
+            continue
+        for path, lines, duration, changes in journeys:
+            assert path[0] == 0 and path[-1] == dest and len(lines) == len(path) - 1
+            assert duration == sum(layered.weights[line, np.flatnonzero((layered.rows == a) & (layered.cols == b))[0]]
+                                   for a, b, line in zip(path, path[1:], lines))
+        assert all(a[3] < b[3] and a[2] > b[2] for a, b in zip(journeys, journeys[1:]))
+        assert journeys[-1][2] == Network.dijkstra(0, dest, layered.network)[1]
+        # Every interchange penalty picks one of the journeys
+        for penalty in [0.5, 2, 5, 100]:
+            path, lines, duration = layered.shortest_path(0, dest, penalty)
+            changes = sum(a != b for a, b in zip(lines, lines[1:]))
+            assert duration + penalty * changes == min(d + penalty * c for _, _, d, c in journeys)
+        assert pareto_journeys(layered, 0, dest, max_changes=0) == [journey for journey in journeys if journey[3] == 0]
+    assert pareto_journeys(layered, 3, 3) == [([3], [], 0.0, 0)]
+    capsys.readouterr()
+
+def test_journey_planner_interchange(monkeypatch, capsys):
+    layered = LayeredNetwork.from_line_edges(5, 2, [0, 0, 0, 0, 1, 1], [0, 1, 1, 4, 4, 3], [1, 0, 4, 1, 3, 4],
+                                             [2, 2, 3, 3, 4, 4])
+    monkeypatch.setattr(stations, "_directory", StationDirectory(STATIONS))
+    monkeypatch.setattr(query, "real_time_layered_network", lambda date: layered)
+    assert journey_planner.plan_journey_lines("Waterloo", "Warren Street", "2023-12-19", 5) == ([0, 1, 4, 3], [0, 0, 1], 9)
+    journey_planner.journey_planner(False, "Waterloo", "Warren Street", "2023-12-19", interchange=5)
+    assert capsys.readouterr().out.splitlines() == ["Date: 2023-12-19", "Journey will take 9 minutes with 1 changes.",
+                                                    "Start: Waterloo", "  Take line 0", "Westminster", "Green Park",
+                                                    "  Change to line 1", "End: Warren Street"]
+    journey_planner.options_planner("Waterloo", "Warren Street", "2023-12-19")
+    assert capsys.readouterr().out.splitlines() == [
+        "Date: 2023-12-19", "1 changes, 9 minutes: Waterloo (line 0) > Green Park (line 1) > Warren Street"]
+
+
+@pytest.mark.parametrize("data", [fixture[3], fixture[4]])
+def test_all_pairs(data, tmp_path):
+    properties = list(data.values())[0]
+    network = Network(len(*properties["Matrix1"]), np.array(*properties["Matrix1"], dtype=float))
+    distances, next_hops = network.all_pairs()
+    store = AllPairsStore(str(tmp_path))
+    store.save("2023-12-15", distances, next_hops)
+    distances, next_hops = store.load("2023-12-15")
+    assert isinstance(next_hops, np.memmap)
+    for start in range(network.n_nodes):
+        for dest in range(network.n_nodes):
+            result = Network.dijkstra(start, dest, network)
+            path = Network.path_from_next_hops(start, dest, next_hops)
+            if result is None:
+                assert path is None and distances[start, dest] == np.inf
+            else:
+                assert distances[start, dest] == result[1]
+                assert sum(network.adjacency_matrix[a, b] for a, b in zip(path, path[1:])) == result[1]
+    assert store.load("2023-12-16") is None
+
+
+@pytest.fixture
+def small_tube(monkeypatch):
+    """Plan journeys on a five-station network with the stations of STATIONS, without the web service."""
+    matrix = np.zeros((5, 5))
+    for a, b, t in [(0, 1, 2), (1, 4, 3), (4, 3, 4)]:
+        matrix[a, b] = matrix[b, a] = t
+    monkeypatch.setattr(stations, "_directory", StationDirectory(STATIONS))
+    monkeypatch.setattr(query, "real_time_network", lambda date, **kwargs: Network(5, matrix).to_csr())
+    return matrix
+
+
+def test_astar_matches_dijkstra(small_tube):
+    directory = stations.station_directory()
+    speed = directory.max_speed(small_tube)
+    # Green Park to Warren Street is 2.0 km in 4 minutes, the fastest connection
+    assert speed == pytest.approx(haversine(51.5067, -0.1428, 51.5247, -0.1384) / 4)
+    neighbours = Network.neighbour_lists(small_tube)
+    for dest in [0, 1, 3, 4]:
+        bounds = directory.travel_time_bounds(dest, speed)
+        # The network is undirected, so the tree of the destination holds the cost from every station
+        assert np.all(bounds <= Network.shortest_path_tree(dest, neighbours)[0])
+        for start in range(5):
+            assert Network.astar(start, dest, neighbours, bounds) == Network.shortest_path(start, dest, neighbours)
+    assert journey_planner.plan_journey("Waterloo", "Warren Street", "2023-12-19", astar=True) == ([0, 1, 4, 3], 9)
+    assert journey_planner.plan_journey(0, 2, "2023-12-19", astar=True) == (None, 0)
+
+
+def random_directed_network(n_nodes, n_edges, seed):
+    rng = np.random.default_rng(seed)
+    return Network.from_edges(n_nodes, rng.integers(0, n_nodes - 1, n_edges), rng.integers(0, n_nodes - 1, n_edges),
+                              rng.integers(1, 6, n_edges).astype(float))
+
+
+def test_landmark_bounds():
+    # Node 29 has no connections
+    network = random_directed_network(30, 60, seed=1)
+    index = build_landmarks(network, k=4)
+    assert len(set(index.landmarks.tolist())) == 4 and 29 not in index.landmarks
+    rows, cols, weights = network.edges()
+    reverse = Network.from_edges(30, cols, rows, weights)
+    for dest in range(30):
+        # The tree of the destination on the reversed network holds the cost from every node
+        reverse_costs = Network.shortest_path_tree(dest, reverse.neighbours)[0]
+        bounds = index.bounds(dest)
+        assert np.all(bounds <= reverse_costs)
+        for start in range(0, 30, 7):
+            expected = Network.shortest_path(start, dest, network.neighbours)
+            assert Network.astar(start, dest, network.neighbours, bounds) == expected
+
+
+def test_landmark_refresh(tmp_path, monkeypatch):
+    network = random_directed_network(30, 80, seed=2)
+    index = build_landmarks(network, k=4)
+    searches = []
+    shortest_path_tree = Network.shortest_path_tree
+    monkeypatch.setattr(Network, "shortest_path_tree", lambda *args: searches.append(args) or shortest_path_tree(*args))
+    assert np.array_equal(index.refresh(network).from_landmarks, index.from_landmarks) and searches == []
+    # Delays only make connections slower, so the old index still bounds the disrupted network
+    rows, cols, weights = network.edges()
+    delayed = Network.from_edges(30, rows, cols, np.where(rows == index.landmarks[0], weights * 3, weights))
+    refreshed = index.refresh(delayed)
+    assert 0 < len(searches) < 8
+    for i, landmark in enumerate(index.landmarks):
+        assert np.array_equal(refreshed.from_landmarks[i], shortest_path_tree(landmark, delayed.neighbours)[0])
+    for dest in range(30):
+        assert np.all(index.bounds(dest) <= refreshed.bounds(dest))
+    refreshed.save(str(tmp_path / "landmarks.npz"))
+    loaded = LandmarkIndex.load(str(tmp_path / "landmarks.npz"))
+    assert np.array_equal(loaded.to_landmarks, refreshed.to_landmarks)
+    assert LandmarkIndex.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_plan_journey_landmarks(small_tube, monkeypatch, tmp_path):
+    monkeypatch.setattr(query, "baseline_network", lambda: BaselineNetwork([Network(5, small_tube)]))
+    monkeypatch.setattr(query, "cache", TopologyCache(str(tmp_path)))
+    fetched = []
+    monkeypatch.setattr(query, "query_disruptions", lambda date: fetched.append(date) or [])
+    monkeypatch.setattr(query, "landmark_cache", NetworkCache())
+    for astar in [False, True]:
+        assert journey_planner.plan_journey("Waterloo", "Warren Street", "2023-12-19", astar, True) == ([0, 1, 4, 3], 9)
+    # The disruptions are fetched once per journey, and the index is refreshed once, then reused from memory
+    assert fetched == ["2023-12-19", "2023-12-19"]
+    assert query.landmark_cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+    version = query.baseline_network().version
+    assert (tmp_path / "landmarks" / version / f"{disruption_fingerprint([])}-8.npz").exists()
+    # Other dates with the same disruptions load the stored index
+    monkeypatch.setattr(query, "landmark_cache", NetworkCache())
+    monkeypatch.setattr(query, "build_landmarks", lambda network, k: pytest.fail("landmarks built again"))
+    assert journey_planner.plan_journey(3, 0, "2023-12-20", landmarks=True) == ([3, 4, 1, 0], 9)
+
+
+def test_stored_results_follow_line_version(small_tube, monkeypatch, tmp_path):
+    baselines = [BaselineNetwork([Network(5, small_tube)]), BaselineNetwork([Network(5, small_tube * 2)])]
+    monkeypatch.setattr(query, "baseline_network", lambda: baselines[0])
+    monkeypatch.setattr(query, "cache", TopologyCache(str(tmp_path)))
+    assert baselines[0].version == BaselineNetwork([Network(5, small_tube.copy())]).version
+    assert baselines[0].version != baselines[1].version
+    distances, _ = query.real_time_all_pairs("2023-12-19")
+    assert distances[0, 3] == 9
+    # Matrices stored for other lines are not used
+    baselines.pop(0)
+    monkeypatch.setattr(query, "real_time_network", lambda date, **kwargs: Network(5, small_tube * 2).to_csr())
+    distances, _ = query.real_time_all_pairs("2023-12-19")
+    assert distances[0, 3] == 18
+    assert len(os.listdir(tmp_path / "all-pairs")) == 2
+    query.cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_contraction_hierarchy(tmp_path, capsys):
+    # One-way connections, and node 29 has no connections
+    network = random_directed_network(30, 70, seed=3)
+    hierarchy = build_hierarchy(network)
+    assert sorted(hierarchy.rank.tolist()) == list(range(30))
+    rows, cols, weights = network.edges()
+    weight = dict(zip(zip(rows.tolist(), cols.tolist()), weights.tolist()))
+    hierarchy.save(str(tmp_path / "hierarchy.npz"))
+    for loaded in [hierarchy, ContractionHierarchy.load(str(tmp_path / "hierarchy.npz")), pickle.loads(pickle.dumps(hierarchy))]:
+        for start in range(30):
+            costs = Network.shortest_path_tree(start, network.neighbours)[0]
+            for dest in range(30):
+                result = loaded.shortest_path(start, dest)
+                if costs[dest] == np.inf:
+                    assert result is None
+                    continue
+                path, cost = result
+                # The shortcuts are unpacked into connections of the network
+                assert path[0] == start and path[-1] == dest and cost == costs[dest]
+                assert sum(weight[pair] for pair in zip(path, path[1:])) == cost
+    assert "No possible paths." in capsys.readouterr().out
+    assert ContractionHierarchy.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_plan_journey_hierarchy(small_tube, monkeypatch, tmp_path):
+    monkeypatch.setattr(query, "baseline_network", lambda: BaselineNetwork([Network(5, small_tube)]))
+    monkeypatch.setattr(query, "cache", TopologyCache(str(tmp_path)))
+    fetched = []
+    monkeypatch.setattr(query, "query_disruptions", lambda date: fetched.append(date) or [])
+    monkeypatch.setattr(query, "hierarchy_cache", NetworkCache())
+    assert journey_planner.plan_journey("Waterloo", "Warren Street", "2023-12-19", hierarchy=True) == ([0, 1, 4, 3], 9)
+    assert fetched == ["2023-12-19"]
+    assert [path.name for path in (tmp_path / "hierarchies" / query.baseline_network().version).iterdir()] == [
+        f"{disruption_fingerprint([])}.npz"]
+    # Later journeys use the hierarchy in memory, also on other dates with the same disruptions
+    load = ContractionHierarchy.load
+    monkeypatch.setattr(ContractionHierarchy, "load", lambda path: pytest.fail("hierarchy loaded again"))
+    assert journey_planner.plan_journey(3, 0, "2023-12-20", hierarchy=True) == ([3, 4, 1, 0], 9)
+    assert query.hierarchy_cache.stats()["hits"] == 1
+    assert journey_planner.plan_journey(0, 2, "2023-12-20", hierarchy=True) == (None, 0)
+    # Other processes load the stored hierarchy instead of building it
+    monkeypatch.setattr(ContractionHierarchy, "load", load)
+    monkeypatch.setattr(query, "hierarchy_cache", NetworkCache())
+    monkeypatch.setattr(query, "build_hierarchy", lambda network: pytest.fail("hierarchy built again"))
+    assert query.real_time_hierarchy("2023-12-21", []).shortest_path(0, 3) == ([0, 1, 4, 3], 9)
+
+
+def test_dynamic_tree_repair():
+    network = random_directed_network(30, 90, seed=4)
+    rows, cols, weights = network.edges()
+    rng = np.random.default_rng(4)
+    for factors in [np.ones(len(weights)), rng.choice([1, 1, 2, 3, 0], len(weights)), rng.choice([0.5, 1, 4], len(weights))]:
+        changed = Network.from_edges(30, rows, cols, weights * factors)
+        starts = list(range(0, 30, 3))
+        for start, costs, previous_nodes in zip(starts, *DynamicShortestPathTrees(network, starts).repair(changed)):
+            assert np.array_equal(costs, Network.shortest_path_tree(start, changed.neighbours)[0])
+            for dest in np.flatnonzero(costs < np.inf):
+                path = Network.path_from_tree(start, dest, previous_nodes)
+                assert sum(changed.adjacency_matrix[a, b] for a, b in zip(path, path[1:])) == costs[dest]
+
+
+def test_real_time_trees(small_tube, monkeypatch):
+    monkeypatch.setattr(query, "baseline_network", lambda: BaselineNetwork([Network(5, small_tube)]))
+    delayed = small_tube.copy()
+    delayed[1, 4] = delayed[4, 1] = 30
+    networks = {"2023-12-19": Network(5, small_tube), "2023-12-20": Network(5, delayed).to_csr()}
+    monkeypatch.setattr(query, "real_time_network", networks.get)
+    results = list(query.real_time_trees([0, 3], ["2023-12-19", "2023-12-20"]))
+    assert [(date, start) for date, start, _, _ in results] == [("2023-12-19", 0), ("2023-12-19", 3),
+                                                                ("2023-12-20", 0), ("2023-12-20", 3)]
+    assert results[0][2].tolist() == [0, 2, np.inf, 9, 5]
+    assert results[3][2].tolist() == [36, 34, np.inf, 0, 4]
+
+
+def test_haversine():
+    # One degree of latitude is about 111.2 km
+    assert haversine(51, 0, 52, 0) == pytest.approx(111.195, abs=1e-3)
+    assert np.allclose(haversine(np.array([51.5, 51.5]), 0, 51.5, 0), 0)
+
+
+def test_reachable_stations(small_tube):
+    durations, previous_nodes = journey_planner.reachable_stations("Waterloo", "2023-12-19")
+    assert durations.tolist() == [0, 2, np.inf, 9, 5]
+    durations, previous_nodes = journey_planner.reachable_stations("Waterloo", "2023-12-19", minutes=5)
+    assert durations.tolist() == [0, 2, np.inf, np.inf, 5]
+    assert previous_nodes.tolist() == [-1, 0, -1, -1, 1]
+
+
+def test_isochrone_mode(small_tube, monkeypatch, capsys, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(journey_planner.plt, "show", lambda: None)
+    monkeypatch.setattr("sys.argv", ["journey-planner", "--isochrone", "5", "--plot", "waterloo", "2023-12-19"])
+    journey_planner.process()
+    assert capsys.readouterr().out.splitlines() == [
+        "Date: 2023-12-19", "3 stations within 5 minutes of Waterloo:", "   0  Waterloo", "   2  Westminster",
+        "   5  Green Park", "Plot saved to isochrone_Waterloo_5_minutes.png"]
+    assert (tmp_path / "isochrone_Waterloo_5_minutes.png").exists()
+
+
+def test_plan_journeys(small_tube):
+    pairs = [("Waterloo", "Warren Street"), (3, "0"), ("Waterloo", "Green Park"), (0, 2)]
+    results = list(journey_planner.plan_journeys(pairs, "2023-12-19"))
+    assert results == [(0, 3, [0, 1, 4, 3], 9.0), (3, 0, [3, 4, 1, 0], 9.0), (0, 4, [0, 1, 4], 5.0),
+                       (0, 2, None, np.inf)]
+
+
+def test_plan_journeys_parallel(small_tube):
+    pairs = [("Waterloo", "Warren Street"), (3, "0"), ("Waterloo", "Green Park"), (0, 2)]
+    assert list(journey_planner.plan_journeys(pairs, "2023-12-19", workers=2)) == \
+        list(journey_planner.plan_journeys(pairs, "2023-12-19"))
+
+
+@pytest.mark.parametrize("data", [fixture[3]])
+def test_route_pairs_matches_dijkstra(data):
+    properties = list(data.values())[0]
+    # An extra station without connections cannot be reached
+    matrix = np.pad(np.array(properties["Matrix1"][0]), (0, 1))
+    pairs = [(start, dest) for start in range(len(matrix)) for dest in range(len(matrix))]
+    results = route_pairs(matrix, pairs, workers=2)
+    for (start, dest), (path, cost) in zip(pairs, results):
+        expected = Network.shortest_path(start, dest, Network.neighbour_lists(matrix))
+        assert (path, cost) == (tuple(expected) if expected is not None else (None, np.inf))
+
+
+def test_components(capsys):
+    network = random_directed_network(40, 30, seed=6)
+    distances, _ = network.all_pairs()
+    # Nodes share a label exactly when one can be reached from the other, following connections either way
+    connected = (distances < np.inf) | (distances.T < np.inf)
+    for _ in range(40):
+        connected = connected | ((connected.astype(int) @ connected.astype(int)) > 0)
+    labels = network.components
+    assert np.array_equal(labels[:, None] == labels[None, :], connected)
+    assert np.array_equal(labels, Network.component_labels(network.adjacency_matrix))
+    start, dest = 39, int(np.flatnonzero(labels != labels[39])[0])
+    assert Network.dijkstra(start, dest, network) is None
+    assert capsys.readouterr().out == "No possible paths.\n"
+    # Closing connections splits components, and the labels are recomputed
+    network = Network(3, np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]))
+    assert network.components.tolist() == [0, 0, 0]
+    network.scale_edge(1, 2, 0)
+    network.scale_edge(2, 1, 0)
+    assert network.components.tolist() == [0, 0, 2]
+
+
+def test_distance_matrix():
+    network = random_directed_network(30, 70, seed=5)
+    distances, _ = network.all_pairs()
+    sources, targets = [3, 0, 29, 3], [5, 29, 0, 17, 8]
+    for workers in [1, 2]:
+        result = network.distance_matrix(sources, targets, workers=workers)
+        assert result.shape == (4, 5)
+        assert np.array_equal(result, distances[np.ix_(sources, targets)])
+    assert network.distance_matrix([], targets).shape == (0, 5)
+    assert Network.target_costs(0, [], network.neighbours).shape == (0,)
+
+
+def test_k_shortest_paths(capsys):
+    network = random_directed_network(12, 40, seed=7)
+    neighbours = network.neighbours
+
+    def simple_paths(path, cost, dest):
+        if path[-1] == dest:
+            yield cost
+            return
+        for neighbour, weight in neighbours[path[-1]]:
+            if neighbour not in path:
+                yield from simple_paths(path + [neighbour], cost + weight, dest)
+
+    for start, dest in [(0, 5), (3, 9), (7, 2), (4, 4)]:
+        paths = network.k_shortest_paths(start, dest, k=6)
+        expected = sorted(simple_paths([start], 0, dest))[:6]
+        assert [cost for _, cost in paths] == expected
+        assert len({tuple(path) for path, _ in paths}) == len(paths)
+        for path, cost in paths:
+            assert path[0] == start and path[-1] == dest and len(set(path)) == len(path)
+            assert cost == sum(network.adjacency_matrix[a, b] for a, b in zip(path, path[1:]))
+    assert paths == [([4], 0.0)]
+    assert network.k_shortest_paths(0, 11) == []
+    assert capsys.readouterr().out == "No possible paths.\n"
+
+
+def test_alternatives_planner(small_tube, capsys):
+    # Add a slower route from Westminster to Warren Street
+    small_tube[1, 3] = small_tube[3, 1] = 12
+    assert journey_planner.plan_journey_alternatives("Waterloo", "Warren Street", "2023-12-19", k=3) == [
+        ([0, 1, 4, 3], 9.0), ([0, 1, 3], 14.0)]
+    journey_planner.alternatives_planner("Waterloo", "Warren Street", "2023-12-19", k=3)
+    assert capsys.readouterr().out.splitlines() == [
+        "Date: 2023-12-19", "1. 9 minutes: Waterloo > Westminster > Green Park > Warren Street",
+        "2. 14 minutes: Waterloo > Westminster > Warren Street"]
+
+
+def test_shared_network_released(monkeypatch):
+    with SharedNetwork(np.array([[0, 1], [1, 0]])) as shared:
+        name, shape, dtype = shared.layout[0]
+        block = shared_memory.SharedMemory(name=name)
+        assert np.array_equal(np.ndarray(shape, dtype, buffer=block.buf), [0, 1, 2])
+        block.close()
+        # Workers copy the network and close their mappings before any task runs
+        monkeypatch.setattr(parallel, "_worker_neighbours", None)
+        parallel._attach_network(shared.n_nodes, shared.layout)
+        assert parallel._worker_neighbours == [[(1, 1.0)], [(0, 1.0)]]
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_batch_mode(small_tube, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", StringIO("start,dest\nwaterloo,warren street\n0,2\n"))
+    monkeypatch.setattr("sys.argv", ["journey-planner", "--batch", "-", "--date", "2023-12-19"])
+    journey_planner.process()
+    assert capsys.readouterr().out.splitlines() == ["start,dest,duration,route", "0,3,9,0 1 4 3", "0,2,,"]
+    monkeypatch.setattr("sys.stdin", StringIO("waterloo,green park\n"))
+    monkeypatch.setattr("sys.argv", ["journey-planner", "--batch", "-", "--format", "jsonl"])
+    journey_planner.process()
+    assert json.loads(capsys.readouterr().out) == {"start": 0, "dest": 4, "duration": 5.0, "route": [0, 1, 4]}